@@ -5,7 +5,8 @@ API server for the crypto trading bot dashboard
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import os
 import pandas as pd
 import numpy as np
 import logging
@@ -13,8 +14,10 @@ import logging
 from config import cfg
 from exchange.binance_client import BinanceSpot
 from backtesting.engine import BacktestEngine, BacktestConfig
+from backtesting.optimizer import optimize
 from strategies import sma_crossover, rsi_reversion, bb_breakout
 from core.supabase_client import supabase_manager
+from core.ohlcv_store import OHLCVStore
 from utils.logger import logger
 
 app = Flask(__name__)
@@ -23,6 +26,9 @@ CORS(app, origins=["http://localhost:3000", "http://localhost:3001"])
 # Initialize Binance client
 spot = BinanceSpot(cfg.binance_api_key, cfg.binance_api_secret, cfg.binance_testnet)
 
+# Local kline store (history is read from disk, only new bars hit the API)
+store = OHLCVStore(spot, os.path.join(cfg.data_dir, "klines"))
+
 # Strategy map
 STRATEGY_MAP = {
     'sma_crossover': sma_crossover,
@@ -51,6 +57,36 @@ def get_config():
         'timeframe': cfg.timeframe
     })
 
+def _as_utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+def _load_history(symbol: str, timeframe: str, start_date: datetime, end_date: datetime):
+    """Fetch OHLCV bars indexed by open time; returns (df, None) or (None, (message, status))"""
+    logger.info(f"Fetching historical data for {symbol} from {start_date} to {end_date}", module="api")
+    
+    # Calculate the number of days
+    days = (end_date - start_date).days
+    if days <= 0:
+        return None, ('End date must be after start date', 400)
+    
+    # Backfill/refresh the local store, then read the range from disk
+    start_ms = int(_as_utc(start_date).timestamp() * 1000)
+    end_ms = int(_as_utc(end_date).timestamp() * 1000)
+    try:
+        store.sync(symbol, timeframe, start_ms=start_ms)
+    except Exception as e:
+        logger.warning(f"Kline sync failed, using stored bars only: {e}", module="api")
+    df = store.load(symbol, timeframe, start_ms, end_ms)
+    
+    # Convert open_time to datetime and set as index
+    df['open_time'] = pd.to_datetime(df['open_time'], unit='ms', utc=True)
+    df.set_index('open_time', inplace=True)
+    
+    if df.empty:
+        return None, ('No data available for the specified date range', 400)
+    
+    return df, None
+
 @app.route('/api/backtest', methods=['POST'])
 def run_backtest():
     """Run backtest for a strategy"""
@@ -72,28 +108,9 @@ def run_backtest():
         timeframe = data.get('timeframe', cfg.timeframe)
         
         # Fetch historical data
-        logger.info(f"Fetching historical data for {symbol} from {start_date} to {end_date}", module="api")
-        
-        # Calculate the number of days
-        days = (end_date - start_date).days
-        if days <= 0:
-            return jsonify({'error': 'End date must be after start date'}), 400
-        
-        # Fetch klines from Binance (returns DataFrame)
-        df = spot.klines(symbol, timeframe, limit=min(days * 24, 1000))  # Adjust based on timeframe
-        
-        if df is None or df.empty:
-            return jsonify({'error': 'Failed to fetch historical data'}), 500
-        
-        # Convert open_time to datetime and set as index
-        df['open_time'] = pd.to_datetime(df['open_time'], unit='ms', utc=True)
-        df.set_index('open_time', inplace=True)
-        
-        # Filter by date range
-        df = df.loc[start_date:end_date]
-        
-        if df.empty:
-            return jsonify({'error': 'No data available for the specified date range'}), 400
+        df, error = _load_history(symbol, timeframe, start_date, end_date)
+        if error:
+            return jsonify({'error': error[0]}), error[1]
         
         # Get strategy module
         strategy_type = data['strategy_type']
@@ -117,26 +134,10 @@ def run_backtest():
         logger.info(f"Running backtest for {strategy_type} strategy", module="api")
         engine = BacktestEngine(config)
         
-        # Define strategy function wrapper
-        def strategy_func(data, index):
-            # Call the strategy's signal function
-            if index < 50:  # Need enough data for indicators
-                return 'HOLD'
-            
-            df_slice = data.iloc[:index+1]
-            signal_result = strategy_module.signal(df_slice)
-            
-            if signal_result.get('buy'):
-                return 'BUY'
-            elif signal_result.get('sell'):
-                return 'SELL'
-            else:
-                return 'HOLD'
-        
-        # Run the backtest
-        results = engine.run(
+        # Run the backtest (strategy evaluated once over the whole series)
+        results = engine.run_vectorized(
             data=df,
-            strategy_func=strategy_func,
+            signal_func=strategy_module.signal_series,
             start_date=start_date.isoformat(),
             end_date=end_date.isoformat()
         )
@@ -246,13 +247,80 @@ def run_backtest():
         
         return jsonify({'error': error_message}), 500
 
+@app.route('/api/optimize', methods=['POST'])
+def run_optimization():
+    """Sweep strategy parameters and return the ranked results"""
+    try:
+        data = request.json
+        
+        required_fields = ['strategy_type', 'start_date', 'end_date', 'param_grid']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+        
+        strategy_type = data['strategy_type']
+        if strategy_type not in STRATEGY_MAP:
+            return jsonify({'error': f'Unknown strategy type: {strategy_type}'}), 400
+        
+        start_date = datetime.fromisoformat(data['start_date'].replace('Z', '+00:00'))
+        end_date = datetime.fromisoformat(data['end_date'].replace('Z', '+00:00'))
+        symbol = data.get('symbol', cfg.symbol)
+        timeframe = data.get('timeframe', cfg.timeframe)
+        
+        df, error = _load_history(symbol, timeframe, start_date, end_date)
+        if error:
+            return jsonify({'error': error[0]}), error[1]
+        
+        config = BacktestConfig(
+            initial_capital=float(data.get('initial_capital', 10000)),
+            commission_rate=float(data.get('commission', 0.001)),
+            slippage_rate=float(data.get('slippage', 0.001)),
+            position_size=float(data.get('position_size', 0.1)),
+            max_positions=int(data.get('max_positions', 1))
+        )
+        
+        table = optimize(
+            df, strategy_type, data['param_grid'], config,
+            method=data.get('method', 'grid'),
+            n_iter=int(data.get('n_iter', 100)),
+            seed=data.get('seed'),
+            max_workers=data.get('max_workers'),
+            rank_by=data.get('rank_by', 'sharpe_ratio'),
+            ascending=bool(data.get('ascending', False))
+        )
+        
+        top = int(data.get('top', 50))
+        results = table.head(top).replace({np.nan: None}).to_dict(orient='records')
+        
+        return jsonify({
+            'success': True,
+            'total_combinations': len(table),
+            'results': results
+        })
+    
+    except Exception as e:
+        logger.error(f"Optimization failed: {str(e)}", module="api")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/strategies', methods=['GET'])
 def get_strategies():
     """Get available strategies"""
     try:
-        # Use sync version for Flask
-        response = supabase_manager.client.table("strategies").select("*").eq("status", "ACTIVE").execute()
-        return jsonify(response.data)
+        # Use sync version for Flask; served from the shared read cache
+        return jsonify(supabase_manager.get_active_strategies_sync())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/logs', methods=['GET'])
+def get_logs():
+    """Page through file logs, newest first: pass the last entry's `created` as `end` for the next page"""
+    try:
+        start = request.args.get('start', type=float)
+        end = request.args.get('end', type=float)
+        limit = min(request.args.get('limit', 100, type=int), 1000)
+        kinds = request.args.get('kind')
+        return jsonify(logger.query_logs(start=start, end=end, level=request.args.get('level'),
+                                         limit=limit, kinds=kinds.split(',') if kinds else None))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -279,5 +347,6 @@ def get_balance():
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
+    supabase_manager.watch_cache_invalidation()
     # Run the Flask app
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
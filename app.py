@@ -1,26 +1,64 @@
 import asyncio
 import logging
+import os
 import pandas as pd
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, ContextTypes, CallbackQueryHandler
 from config import cfg
-from utils.state import get_state, set_state
+from utils.state import get_state, set_state, store as state_store
 from exchange.binance_client import BinanceSpot, BinanceFutures
-from core.scanner import scan_symbols
-from core.trader import run_auto_loop
+from core.scanner import scan_symbols_concurrent
+from core.trader import run_auto_loop, run_auto_loop_ws
+from core.ohlcv_store import OHLCVStore
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
 # Clients
 spot = BinanceSpot(cfg.binance_api_key, cfg.binance_api_secret, cfg.binance_testnet)
 fut = BinanceFutures(cfg.futures_api_key, cfg.futures_api_secret, cfg.futures_testnet) if cfg.enable_futures else None
+store = OHLCVStore(spot, os.path.join(cfg.data_dir, "klines"))
 
 # Universe
 DEFAULT_UNIVERSE = ["BTCUSDT","ETHUSDT","BNBUSDT","SOLUSDT","XRPUSDT","ADAUSDT","DOGEUSDT","LTCUSDT","LINKUSDT","AVAXUSDT","TRXUSDT","MATICUSDT","NEARUSDT","ATOMUSDT","APTUSDT"]
 
 # Helper funcs to connect spot by default
 def fetch_klines(sym, interval):
-    return spot.klines(sym, interval, 300)
+    # 로컬 저장소에서 읽고, 새로 마감된 봉과 진행 중인 봉만 API로 가져옴
+    return store.klines(sym, interval, 300)
+
+# WebSocket 매니저는 AUTO_LOOP_MODE=ws 일 때만 생성
+_ws_manager = None
+
+def get_ws_manager():
+    global _ws_manager
+    if _ws_manager is None:
+        from core.websocket_manager import BinanceWebSocketManager
+        from core.market_recorder import MarketRecorder
+        recorder = MarketRecorder(cfg.record_dir) if cfg.record_dir else None
+        _ws_manager = BinanceWebSocketManager(testnet=cfg.binance_testnet, multiplex=True, fast_decode=True,
+                                              recorder=recorder)
+    return _ws_manager
+
+# 3m~4h 봉은 심볼당 1m 스트림 하나에서 집계 (core/bar_aggregator.py)
+_bar_aggregator = None
+
+def get_bar_aggregator():
+    global _bar_aggregator
+    if _bar_aggregator is None:
+        from core.bar_aggregator import BarAggregator
+        _bar_aggregator = BarAggregator(get_ws_manager())
+    return _bar_aggregator
+
+# 매수 전 슬리피지 추정: ws 모드는 로컬 호가창, poll 모드는 REST 스냅샷
+_order_books = None
+
+def get_order_books():
+    global _order_books
+    if _order_books is None:
+        from core.order_book import OrderBookManager
+        ws_manager = get_ws_manager() if cfg.auto_loop_mode == "ws" else None
+        _order_books = OrderBookManager(ws_manager, spot)
+    return _order_books
 
 def buy_market_quote(sym, quote):
     return spot.market_buy_quote(sym, quote)
@@ -45,8 +83,9 @@ async def on_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     if data == "scan":
         await q.edit_message_text("스캔 중... 상위 유동성 USDT 마켓을 분석합니다.")
-        syms = spot.top_usdt_symbols()
-        df = scan_symbols(fetch_klines, syms, cfg.timeframe)
+        syms = await asyncio.to_thread(spot.top_usdt_symbols, limit=cfg.scan_limit)
+        df = await scan_symbols_concurrent(fetch_klines, syms, cfg.timeframe,
+                                           max_concurrency=cfg.scan_concurrency)
         set_state(scan_result=df.to_dict(orient="records"))
 
         # 추천 상위 5 표시
@@ -83,14 +122,27 @@ async def on_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
             except Exception:
                 pass
 
-        async def get_flag():
-            return get_state()["auto_enabled"]
+        # auto_enabled 가 꺼지면 루프를 즉시 깨움 (get_state 는 메모리에서 읽음)
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        unwatch = state_store.watch(
+            lambda changes: changes["auto_enabled"] or loop.call_soon_threadsafe(stop_event.set),
+            keys=("auto_enabled",))
 
-        asyncio.create_task(run_auto_loop(
+        loop_args = (
             fetch_klines, buy_market_quote, sell_market_qty,
             s["selected_symbol"], cfg.timeframe, cfg.trade_usdt, cfg.tp_atr, cfg.sl_atr,
             lambda: get_state()["auto_enabled"], send_log
-        ))
+        )
+        slippage_args = dict(estimate_slippage=get_order_books().estimate_slippage, max_slippage=cfg.max_slippage,
+                             stop_event=stop_event)
+        if cfg.auto_loop_mode == "ws":
+            await get_order_books().track(s["selected_symbol"])
+            task = asyncio.create_task(run_auto_loop_ws(get_ws_manager(), *loop_args, **slippage_args,
+                                                        bars=get_bar_aggregator()))
+        else:
+            task = asyncio.create_task(run_auto_loop(*loop_args, **slippage_args))
+        task.add_done_callback(lambda _: unwatch())
 
     elif data == "auto_off":
         set_state(auto_enabled=False)
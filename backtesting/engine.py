@@ -11,6 +11,7 @@ import json
 from dataclasses import dataclass, asdict
 from utils.logger import logger
 from core.supabase_client import supabase_manager
+from backtesting.vectorized import simulate, to_signal_array
 
 @dataclass
 class BacktestConfig:
@@ -137,6 +138,99 @@ class BacktestEngine:
                    total_trades=len(self.trades),
                    final_capital=self.current_capital)
         
+        return self._build_results()
+    
+    def run_vectorized(self, data: pd.DataFrame, signal_func: Callable,
+                       start_date: str = None, end_date: str = None,
+                       warmup: int = 50) -> Dict:
+        """
+        Run backtest from a full-series signal array
+        
+        Same fills, stops and metrics as ``run``, but the strategy is called
+        once for the whole frame and the simulation walks NumPy arrays
+        instead of re-slicing the DataFrame on every bar.
+        
+        Args:
+            data: DataFrame with OHLCV data
+            signal_func: Function taking the whole DataFrame and returning
+                BUY/SELL/HOLD per bar (frame with buy/sell columns,
+                array of strings or array of 1/-1/0)
+            start_date: Start date for backtest
+            end_date: End date for backtest
+            warmup: Number of leading bars that are never traded
+        
+        Returns:
+            Dictionary with backtest results
+        """
+        logger.info(f"Starting vectorized backtest from {start_date} to {end_date}", module="backtest")
+        
+        self.evaluate_vectorized(data, signal_func, start_date, end_date, warmup)
+        
+        logger.info("Vectorized backtest completed", module="backtest",
+                   total_trades=len(self.trades),
+                   final_capital=self.current_capital)
+        
+        return self._build_results()
+    
+    def evaluate_vectorized(self, data: pd.DataFrame, signal_func: Callable,
+                            start_date: str = None, end_date: str = None,
+                            warmup: int = 50) -> Dict:
+        """
+        Simulate like ``run_vectorized`` but return only the metrics
+        
+        Skips packaging trades and the equity curve for JSON, which dominates
+        the cost of short runs (parameter sweeps call this per combination).
+        Trades and equity curve are still available on the engine afterwards.
+        """
+        if start_date:
+            data = data[data.index >= pd.to_datetime(start_date)]
+        if end_date:
+            data = data[data.index <= pd.to_datetime(end_date)]
+        
+        self.trades = []
+        self.open_positions = []
+        
+        data = self._prepare_data(data)
+        
+        try:
+            signals = to_signal_array(signal_func(data), len(data))
+        except Exception as e:
+            logger.error(f"Strategy error: {e}", module="backtest")
+            signals = np.zeros(len(data), dtype=np.int8)
+        
+        sim = simulate(
+            data["close"].to_numpy(),
+            data["high"].to_numpy(),
+            data["low"].to_numpy(),
+            data["atr"].to_numpy() if self.config.use_atr_stops else None,
+            signals,
+            self.config,
+            warmup=warmup
+        )
+        
+        index = data.index
+        for t in sim["trades"]:
+            self.trades.append(Trade(
+                entry_time=index[t["entry_idx"]],
+                exit_time=index[t["exit_idx"]],
+                symbol="BTCUSDT",  # Placeholder
+                side="BUY",
+                entry_price=t["entry_price"],
+                exit_price=t["exit_price"],
+                quantity=t["quantity"],
+                commission=t["commission"],
+                pnl=t["pnl"],
+                pnl_percent=t["pnl_percent"],
+                exit_reason=t["exit_reason"]
+            ))
+        self.equity_curve = sim["equity_curve"].tolist()
+        self.current_capital = sim["capital"]
+        
+        self.performance_metrics = self._calculate_metrics(data)
+        return self.performance_metrics
+    
+    def _build_results(self) -> Dict:
+        """Package trades, equity curve and metrics as JSON-serializable results"""
         # Ensure all values are JSON serializable
         def make_serializable(obj):
             if isinstance(obj, (np.integer, np.floating)):
@@ -207,7 +301,7 @@ class BacktestEngine:
         self.open_positions.append(trade)
         self.current_capital -= required_capital
         
-        logger.debug(f"Opened {side} position at {entry_price}", module="backtest")
+        logger.debug("Opened %s position at %s", side, entry_price, module="backtest")
     
     def _close_position(self, trade: Trade, bar: pd.Series, timestamp: datetime, reason: str):
         """Close a specific position"""
@@ -229,7 +323,7 @@ class BacktestEngine:
         self.open_positions.remove(trade)
         self.trades.append(trade)
         
-        logger.debug(f"Closed position at {exit_price}, PnL: {trade.pnl:.2f}", module="backtest")
+        logger.debug("Closed position at %s, PnL: %.2f", exit_price, trade.pnl, module="backtest")
     
     def _close_all_positions(self, bar: pd.Series, timestamp: datetime, reason: str):
         """Close all open positions"""
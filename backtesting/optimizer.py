@@ -0,0 +1,193 @@
+"""
+Parallel parameter-sweep optimizer built on BacktestEngine
+
+The OHLCV frame is copied once into shared memory; worker processes attach
+to it in their initializer, so each task only ships a small params dict.
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import logger
+from backtesting.engine import BacktestEngine, BacktestConfig
+from strategies import sma_crossover, rsi_reversion, bb_breakout
+
+STRATEGY_MODULES = {
+    'sma_crossover': sma_crossover,
+    'rsi_reversion': rsi_reversion,
+    'bb_breakout': bb_breakout
+}
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+# Per-worker state populated by _init_worker
+_worker: Dict = {}
+
+
+def _init_worker(values_name: str, index_name: str, n: int, tz: Optional[str],
+                 strategy_type: str, config: Dict, warmup: int):
+    """Attach to the shared OHLCV block and build this worker's engine once"""
+    values_shm = shared_memory.SharedMemory(name=values_name)
+    index_shm = shared_memory.SharedMemory(name=index_name)
+    values = np.ndarray((len(OHLCV_COLUMNS), n), dtype=np.float64, buffer=values_shm.buf)
+    index = pd.DatetimeIndex(np.ndarray((n,), dtype="datetime64[ns]", buffer=index_shm.buf))
+    if tz:
+        index = index.tz_localize("UTC").tz_convert(tz)
+
+    _worker.update(
+        shm=(values_shm, index_shm),  # keep mappings alive for the worker's lifetime
+        data=pd.DataFrame({c: values[k] for k, c in enumerate(OHLCV_COLUMNS)}, index=index),
+        strategy=STRATEGY_MODULES[strategy_type],
+        engine=BacktestEngine(BacktestConfig(**config)),
+        warmup=warmup,
+    )
+
+
+def _run_combo(params: Dict) -> Dict:
+    """Backtest one parameter combination inside a worker"""
+    strategy = _worker["strategy"]
+    try:
+        metrics = _worker["engine"].evaluate_vectorized(
+            _worker["data"],
+            lambda df: strategy.signal_series(df, **params),
+            warmup=_worker["warmup"]
+        )
+        return {**params, **metrics}
+    except Exception as e:
+        return {**params, "error": str(e)}
+
+
+def _grid_size(param_grid: Dict[str, List]) -> int:
+    size = 1
+    for values in param_grid.values():
+        size *= len(values)
+    return size
+
+
+def _combo_at(param_grid: Dict[str, List], flat_index: int) -> Dict:
+    """Decode a flat index into one combination (mixed-radix, last key fastest)"""
+    combo = {}
+    for key in reversed(list(param_grid)):
+        values = param_grid[key]
+        flat_index, pos = divmod(flat_index, len(values))
+        combo[key] = values[pos]
+    return {key: combo[key] for key in param_grid}
+
+
+def _copy_to_shared(data: pd.DataFrame, index: pd.DatetimeIndex,
+                    values_shm: shared_memory.SharedMemory, index_shm: shared_memory.SharedMemory):
+    n = len(data)
+    values = np.ndarray((len(OHLCV_COLUMNS), n), dtype=np.float64, buffer=values_shm.buf)
+    for k, col in enumerate(OHLCV_COLUMNS):
+        values[k] = data[col].to_numpy(dtype=np.float64)
+    stamps = np.ndarray((n,), dtype="datetime64[ns]", buffer=index_shm.buf)
+    stamps[:] = index.to_numpy(dtype="datetime64[ns]")
+
+
+def build_combinations(param_grid: Dict[str, Iterable], method: str = "grid",
+                       n_iter: int = 100, seed: Optional[int] = None) -> List[Dict]:
+    """
+    Expand a parameter grid into the combinations to evaluate
+
+    Args:
+        param_grid: Mapping of strategy keyword -> candidate values
+        method: "grid" for the full product, "random" for a sample of it
+        n_iter: Number of combinations drawn in random mode
+        seed: Random seed for reproducible sampling
+    """
+    grid = {k: list(v) for k, v in param_grid.items()}
+    if method == "grid":
+        keys = list(grid)
+        return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+    if method == "random":
+        total = _grid_size(grid)
+        rng = np.random.default_rng(seed)
+        picks = rng.choice(total, size=min(n_iter, total), replace=False)
+        return [_combo_at(grid, int(i)) for i in picks]
+    raise ValueError(f"Unknown search method: {method}")
+
+
+def optimize(data: pd.DataFrame, strategy_type: str, param_grid: Dict[str, Iterable],
+             config: BacktestConfig = None, method: str = "grid", n_iter: int = 100,
+             seed: Optional[int] = None, max_workers: Optional[int] = None,
+             rank_by: str = "sharpe_ratio", ascending: bool = False,
+             warmup: int = 50) -> pd.DataFrame:
+    """
+    Sweep strategy parameters and rank the backtest results
+
+    Args:
+        data: DataFrame with OHLCV columns and a DatetimeIndex
+        strategy_type: Key of STRATEGY_MODULES
+        param_grid: Mapping of ``signal_series`` keyword -> candidate values,
+            e.g. {"short": [10, 20], "long": [50, 100]}
+        config: Backtest configuration shared by every run
+        method: "grid" or "random"
+        n_iter: Number of combinations in random mode
+        seed: Random seed for random mode
+        max_workers: Worker processes (defaults to CPU count, 1 runs inline)
+        rank_by: Metric used for ranking
+        ascending: Sort order for ``rank_by`` (e.g. True for max_drawdown)
+        warmup: Leading bars never traded
+
+    Returns:
+        DataFrame with one row per combination (params + metrics), best first
+    """
+    if strategy_type not in STRATEGY_MODULES:
+        raise ValueError(f"Unknown strategy type: {strategy_type}")
+
+    config = config or BacktestConfig()
+    combos = build_combinations(param_grid, method, n_iter, seed)
+    if not combos:
+        return pd.DataFrame()
+
+    workers = min(max_workers or os.cpu_count() or 1, len(combos))
+    logger.info(f"Optimizing {strategy_type}: {len(combos)} combinations on {workers} workers",
+               module="backtest")
+
+    n = len(data)
+    index = pd.DatetimeIndex(data.index)
+    tz = str(index.tz) if index.tz is not None else None
+    if tz:
+        index = index.tz_convert("UTC").tz_localize(None)
+
+    values_shm = shared_memory.SharedMemory(create=True, size=max(len(OHLCV_COLUMNS) * n * 8, 1))
+    index_shm = shared_memory.SharedMemory(create=True, size=max(n * 8, 1))
+    try:
+        _copy_to_shared(data, index, values_shm, index_shm)
+
+        initargs = (values_shm.name, index_shm.name, n, tz, strategy_type, asdict(config), warmup)
+        if workers <= 1:
+            _init_worker(*initargs)
+            try:
+                rows = [_run_combo(p) for p in combos]
+            finally:
+                shms = _worker.pop("shm", ())
+                _worker.clear()  # drop views into the buffers before closing them
+                for shm in shms:
+                    shm.close()
+        else:
+            chunksize = max(1, len(combos) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=initargs) as executor:
+                rows = list(executor.map(_run_combo, combos, chunksize=chunksize))
+    finally:
+        values_shm.close()
+        values_shm.unlink()
+        index_shm.close()
+        index_shm.unlink()
+
+    table = pd.DataFrame(rows)
+    if rank_by in table.columns:
+        table = table.sort_values(rank_by, ascending=ascending, na_position="last")
+    table = table.reset_index(drop=True)
+    table.insert(0, "rank", range(1, len(table) + 1))
+
+    logger.info(f"Optimization completed: {len(table)} results", module="backtest")
+    return table
@@ -0,0 +1,231 @@
+"""
+Array-based backtest simulation
+
+Replays the same fill / stop / equity rules as ``BacktestEngine.run`` over
+NumPy arrays instead of re-slicing a DataFrame on every bar. Stretches of
+bars where nothing can happen (flat with no BUY signal, or holding with no
+exit trigger and no actionable signal) are skipped with array operations;
+only bars that carry an event are processed one at a time.
+"""
+
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+BUY, HOLD, SELL = 1, 0, -1
+
+_SIGNAL_CODES = {"BUY": BUY, "SELL": SELL, "HOLD": HOLD}
+
+# Initial look-ahead while holding; doubles up to _MAX_CHUNK on quiet stretches
+_MIN_CHUNK = 64
+_MAX_CHUNK = 65536
+
+
+def to_signal_array(signals, n: int) -> np.ndarray:
+    """Normalize strategy output to an int8 array of BUY(1)/SELL(-1)/HOLD(0).
+
+    Accepts a frame/dict with boolean ``buy``/``sell`` columns (BUY wins when
+    both are set, like the per-bar wrapper), an array of "BUY"/"SELL"/"HOLD"
+    strings, or a numeric array whose sign is the signal.
+    """
+    if isinstance(signals, (pd.DataFrame, dict)):
+        buy = np.asarray(signals["buy"], dtype=bool)
+        sell = np.asarray(signals["sell"], dtype=bool)
+        out = np.where(buy, BUY, np.where(sell, SELL, HOLD)).astype(np.int8)
+    else:
+        arr = np.asarray(signals)
+        if arr.dtype.kind in ("U", "S", "O"):
+            out = np.array([_SIGNAL_CODES.get(str(s), HOLD) for s in arr], dtype=np.int8)
+        else:
+            out = np.sign(np.nan_to_num(arr.astype(float))).astype(np.int8)
+
+    if len(out) != n:
+        raise ValueError(f"Signal length {len(out)} does not match data length {n}")
+    return out
+
+
+class _Position:
+    __slots__ = ("entry_idx", "entry_price", "quantity", "commission")
+
+    def __init__(self, entry_idx: int, entry_price: float, quantity: float, commission: float):
+        self.entry_idx = entry_idx
+        self.entry_price = entry_price
+        self.quantity = quantity
+        self.commission = commission
+
+
+def simulate(close: np.ndarray, high: np.ndarray, low: np.ndarray,
+             atr: Optional[np.ndarray], signals: np.ndarray, config,
+             warmup: int = 50) -> Dict:
+    """
+    Simulate long-only fills over arrays
+
+    Args:
+        close, high, low: Price arrays of equal length
+        atr: ATR array (or None) used when ``config.use_atr_stops`` is set
+        signals: int8 array from ``to_signal_array``
+        config: BacktestConfig
+        warmup: First bar index that is traded
+
+    Returns:
+        Dictionary with ``trades`` (list of dicts with bar indices),
+        ``equity_curve`` (ndarray, initial capital first) and ``capital``
+    """
+    close = np.asarray(close, dtype=float)
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    n = len(close)
+
+    cr = config.commission_rate
+    slip = config.slippage_rate
+    initial = config.initial_capital
+    max_positions = config.max_positions
+
+    # Per-bar stop / target multipliers: ATR distances where ATR is usable,
+    # percentage of entry elsewhere (same fallback as _check_exits)
+    if config.use_atr_stops and atr is not None:
+        atr = np.asarray(atr, dtype=float)
+        atr_ok = ~np.isnan(atr)
+        atr_filled = np.where(atr_ok, atr, 0.0)
+        stop_dist = atr_filled * config.atr_stop_multiplier
+        profit_dist = atr_filled * config.atr_profit_multiplier
+    else:
+        atr_ok = np.zeros(n, dtype=bool)
+        stop_dist = profit_dist = np.zeros(n)
+    stop_pct = 1 - config.stop_loss_pct
+    profit_pct = 1 + config.take_profit_pct
+
+    buy_idx = np.flatnonzero(signals == BUY)
+    is_sell = signals == SELL
+    is_buy = signals == BUY
+
+    equity = np.empty(n)
+    capital = initial
+    open_positions: List[_Position] = []
+    trades: List[Dict] = []
+
+    def stop_price(pos: _Position, i: int) -> float:
+        if atr_ok[i]:
+            return pos.entry_price - stop_dist[i]
+        return pos.entry_price * stop_pct
+
+    def profit_price(pos: _Position, i: int) -> float:
+        if atr_ok[i]:
+            return pos.entry_price + profit_dist[i]
+        return pos.entry_price * profit_pct
+
+    def close_position(pos: _Position, i: int, reason: str):
+        nonlocal capital
+        exit_price = close[i] * (1 - slip)
+        pos.commission += pos.quantity * exit_price * cr
+        pnl = (exit_price - pos.entry_price) * pos.quantity - pos.commission
+        capital += pos.quantity * exit_price - pos.commission
+        if pnl:
+            capital += pnl
+        open_positions.remove(pos)
+        trades.append({
+            "entry_idx": pos.entry_idx,
+            "exit_idx": i,
+            "entry_price": pos.entry_price,
+            "exit_price": exit_price,
+            "quantity": pos.quantity,
+            "commission": pos.commission,
+            "pnl": pnl,
+            "pnl_percent": (pnl / (pos.entry_price * pos.quantity)) * 100,
+            "exit_reason": reason,
+        })
+
+    def open_position(i: int):
+        nonlocal capital
+        price = close[i]
+        if config.position_sizing == "percentage":
+            size = config.position_size * capital / price
+        else:
+            size = config.position_size * initial / price
+        if size <= 0:
+            return
+        entry_price = price * (1 + slip)
+        commission = size * entry_price * cr
+        required = size * entry_price + commission
+        if required > capital:
+            return
+        open_positions.append(_Position(i, entry_price, size, commission))
+        capital -= required
+
+    def mark_to_market(lo: int, hi: int):
+        total = np.full(hi - lo, capital)
+        for pos in open_positions:
+            px = close[lo:hi]
+            total += pos.quantity * px + (px - pos.entry_price) * pos.quantity
+        equity[lo:hi] = total
+
+    def process_bar(i: int):
+        for pos in open_positions[:]:
+            if low[i] <= stop_price(pos, i):
+                close_position(pos, i, "stop_loss")
+            elif high[i] >= profit_price(pos, i):
+                close_position(pos, i, "take_profit")
+
+        if signals[i] == BUY and len(open_positions) < max_positions:
+            open_position(i)
+        elif signals[i] == SELL and open_positions:
+            for pos in open_positions[:]:
+                close_position(pos, i, "signal")
+
+        mark_to_market(i, i + 1)
+
+    i = warmup
+    chunk = _MIN_CHUNK
+    while i < n:
+        if not open_positions:
+            # Flat: capital is constant until the next BUY that can fill
+            k = np.searchsorted(buy_idx, i)
+            nxt = int(buy_idx[k]) if k < len(buy_idx) and max_positions > 0 else n
+            equity[i:nxt] = capital
+            if nxt >= n:
+                break
+            process_bar(nxt)
+            i = nxt + 1
+            chunk = _MIN_CHUNK
+            continue
+
+        # Holding: look ahead for the first bar where anything can change
+        hi = min(n, i + chunk)
+        event = is_sell[i:hi].copy()
+        if len(open_positions) < max_positions:
+            event |= is_buy[i:hi]
+        ok = atr_ok[i:hi]
+        for pos in open_positions:
+            stops = np.where(ok, pos.entry_price - stop_dist[i:hi], pos.entry_price * stop_pct)
+            targets = np.where(ok, pos.entry_price + profit_dist[i:hi], pos.entry_price * profit_pct)
+            event |= (low[i:hi] <= stops) | (high[i:hi] >= targets)
+
+        hits = np.flatnonzero(event)
+        if len(hits) == 0:
+            mark_to_market(i, hi)
+            i = hi
+            chunk = min(chunk * 2, _MAX_CHUNK)
+            continue
+
+        j = i + int(hits[0])
+        if j > i:
+            mark_to_market(i, j)
+        process_bar(j)
+        i = j + 1
+        chunk = _MIN_CHUNK
+
+    # Close any remaining positions on the last bar
+    if open_positions and n > 0:
+        for pos in open_positions[:]:
+            close_position(pos, n - 1, "end_of_data")
+
+    equity_curve = np.empty(max(n - warmup, 0) + 1)
+    equity_curve[0] = initial
+    if n > warmup:
+        equity_curve[1:] = equity[warmup:]
+
+    return {
+        "trades": trades,
+        "equity_curve": equity_curve,
+        "capital": capital,
+    }
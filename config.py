@@ -27,6 +27,33 @@ class Config:
     risk_per_trade_pct: float = float(os.getenv("RISK_PER_TRADE_PCT", "0.01"))
     tp_atr: float = float(os.getenv("TAKE_PROFIT_ATR", "2.0"))
     sl_atr: float = float(os.getenv("STOP_LOSS_ATR", "1.5"))
+    # "poll" = REST 5초 폴링, "ws" = WebSocket 이벤트 기반 (core/trader.py)
+    auto_loop_mode: str = os.getenv("AUTO_LOOP_MODE", "poll").lower()
+    # 호가창 기준 예상 슬리피지가 이 비율을 넘으면 매수 보류 (core/order_book.py)
+    max_slippage: float = float(os.getenv("MAX_SLIPPAGE", "0.002"))
+
+    # Scanner (core/scanner.py)
+    scan_limit: int = int(os.getenv("SCAN_LIMIT", "30"))
+    scan_concurrency: int = int(os.getenv("SCAN_CONCURRENCY", "16"))
+
+    # Local kline store (core/ohlcv_store.py)
+    data_dir: str = os.getenv("DATA_DIR", "data")
+    # 설정 시 WebSocket 원본 프레임을 기록 (core/market_recorder.py), 비우면 끔
+    record_dir: str = os.getenv("RECORD_DIR", "")
+
+    # Supabase 쓰기를 큐에 모아 백그라운드에서 일괄 반영 (core/db_writer.py)
+    supabase_write_behind: bool = os.getenv("SUPABASE_WRITE_BEHIND", "true").lower() == "true"
+    # 전략/오픈 포지션/성과 조회 캐시 유효 시간(초), 실시간 무효화가 안 될 때의 안전장치
+    supabase_cache_ttl: float = float(os.getenv("SUPABASE_CACHE_TTL", "30"))
+
+    # 로그 파일(system/trades/errors.log + .idx) 위치
+    log_dir: str = os.getenv("LOG_DIR", "logs")
+    # 이 레벨 미만 로그는 호출 시점에 바로 버림 (DEBUG/INFO/WARNING/ERROR)
+    log_level: str = os.getenv("LOG_LEVEL", "DEBUG")
+    # 로그 샘플링: "모듈:비율" 목록, WARNING 미만만 적용 (utils/logger.py), 비우면 끔
+    log_sample_rates: str = os.getenv("LOG_SAMPLE_RATES", "")
+    # 위 모듈별 초당 최대 로그 수 (0 = 제한 없음)
+    log_rate_limit: float = float(os.getenv("LOG_RATE_LIMIT", "50"))
 
     # Telegram
     tg_token: str = os.getenv("TELEGRAM_BOT_TOKEN", "")
@@ -0,0 +1,267 @@
+"""
+Multi-timeframe bars built from a single stream per symbol
+
+``BarAggregator`` subscribes once per symbol to ``@kline_1m`` (or
+``@aggTrade``) and folds every update into 3m/5m/15m/1h/4h bars, so
+strategies on different timeframes of the same symbol share one feed and
+all timeframes reflect the same last trade. Closed bars are kept in
+per-timeframe ring buffers; subscribers receive kline-shaped events
+(same keys as ``BinanceWebSocketManager`` kline callbacks), so code
+written against ``subscribe_kline`` works unchanged.
+
+Bars are aligned to UTC epoch multiples of the interval, which matches
+Binance for every interval up to 1d. A bar whose period started before
+the aggregator saw it (tracking began mid-period) is partial: it is
+never stored or emitted as closed. ``backfill`` with REST 1m klines
+completes the period in progress so the first closed bar is usable.
+"""
+
+import asyncio
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from core.ohlcv_store import INTERVAL_MS
+from utils.logger import logger
+
+DEFAULT_INTERVALS = ("3m", "5m", "15m", "1h", "4h")
+SOURCES = ("kline_1m", "aggTrade")
+BAR_FIELDS = ("open_time", "open", "high", "low", "close", "volume")
+AGG_TRADE_QUEUE = 10_000
+
+
+def _merge(bar: Optional[Dict], open_time: int, o: float, h: float, l: float, c: float, v: float) -> Dict:
+    """Fold one OHLCV piece into ``bar`` (a new bar when ``bar`` is None)"""
+    if bar is None:
+        return {"open_time": open_time, "open": o, "high": h, "low": l, "close": c, "volume": v}
+    bar["high"] = max(bar["high"], h)
+    bar["low"] = min(bar["low"], l)
+    bar["close"] = c
+    bar["volume"] += v
+    return bar
+
+
+class _Timeframe:
+    """State of one (symbol, interval): closed ring buffer plus the bar in progress"""
+
+    __slots__ = ("interval", "step", "closed", "settled", "live", "through", "partial", "primed")
+
+    def __init__(self, interval: str, buffer_size: int):
+        self.interval = interval
+        self.step = INTERVAL_MS[interval]
+        self.closed: deque = deque(maxlen=buffer_size)
+        # Bar in progress: settled = closed source bars so far, live = settled + open source bar
+        self.settled: Optional[Dict] = None
+        self.live: Optional[Dict] = None
+        self.through: Optional[int] = None  # open time of the last settled source bar
+        self.partial = False  # bar in progress is missing the start of its period
+        self.primed = False  # a period boundary has been seen, so later bars start complete
+
+    def period(self, ts: int) -> int:
+        return ts - ts % self.step
+
+    def start_bar(self, partial: bool):
+        self.partial = partial
+
+    def close_bar(self) -> Optional[Dict]:
+        """Move the bar in progress to ``closed``; None if there was none or it was partial"""
+        bar = self.live or self.settled
+        partial = self.partial
+        self.settled = self.live = self.through = None
+        self.partial = False
+        self.primed = True
+        if bar is None or partial:
+            return None
+        self.closed.append(bar)
+        return bar
+
+
+class BarAggregator:
+    """Builds higher-timeframe bars from one 1m kline or aggTrade stream per symbol"""
+
+    def __init__(self, ws_manager=None, intervals=DEFAULT_INTERVALS, source: str = "kline_1m",
+                 buffer_size: int = 500):
+        if source not in SOURCES:
+            raise ValueError(f"source must be one of {SOURCES}")
+        base = INTERVAL_MS["1m"]
+        for interval in intervals:
+            step = INTERVAL_MS.get(interval)
+            if step is None or step % base or step > INTERVAL_MS["1d"]:
+                raise ValueError(f"Unsupported aggregation interval: {interval}")
+        self.ws_manager = ws_manager
+        self.intervals = tuple(intervals)
+        self.source = source
+        self.buffer_size = buffer_size
+        self._frames: Dict[str, Dict[str, _Timeframe]] = {}
+        self._callbacks: Dict[Tuple[str, str], List[Callable]] = {}
+
+    # ============== Subscriptions ==============
+
+    def _symbol(self, symbol: str) -> Dict[str, _Timeframe]:
+        frames = self._frames.get(symbol)
+        if frames is None:
+            frames = {i: _Timeframe(i, self.buffer_size) for i in self.intervals}
+            self._frames[symbol] = frames
+        return frames
+
+    async def track(self, symbol: str):
+        """Subscribe to the source stream of ``symbol`` (once)"""
+        symbol = symbol.upper()
+        if symbol in self._frames:
+            return
+        self._symbol(symbol)
+        if self.ws_manager is None:
+            return
+        # Never block the shared socket reader: in-progress 1m updates are conflated
+        # (closed ones are kept); trades get a deep queue, with drops counted in queue_stats
+        if self.source == "kline_1m":
+            self.ws_manager.set_queue_policy(self.on_kline, overflow="keep_closed")
+            await self.ws_manager.subscribe_kline(symbol, "1m", self.on_kline)
+        else:
+            self.ws_manager.set_queue_policy(self.on_agg_trade, overflow="drop_oldest", maxsize=AGG_TRADE_QUEUE)
+            await self.ws_manager.subscribe_aggTrade(symbol, self.on_agg_trade)
+
+    async def subscribe(self, symbol: str, interval: str, callback: Callable):
+        """
+        Receive ``interval`` bars of ``symbol``
+
+        The callback gets kline-shaped events (``is_closed`` False while the
+        bar is forming, True exactly once when it closes).
+        """
+        if interval not in self.intervals:
+            raise ValueError(f"{interval} is not aggregated (intervals: {self.intervals})")
+        symbol = symbol.upper()
+        self._callbacks.setdefault((symbol, interval), []).append(callback)
+        await self.track(symbol)
+
+    def unsubscribe(self, symbol: str, interval: str, callback: Callable):
+        callbacks = self._callbacks.get((symbol.upper(), interval), [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def seed(self, symbol: str, interval: str, df: pd.DataFrame):
+        """Pre-fill the closed-bar buffer from REST / OHLCVStore history"""
+        tf = self._symbol(symbol.upper())[interval]
+        for row in df[list(BAR_FIELDS)].itertuples(index=False):
+            bar = dict(zip(BAR_FIELDS, row))
+            bar["open_time"] = int(bar["open_time"])
+            if not tf.closed or bar["open_time"] > tf.closed[-1]["open_time"]:
+                tf.closed.append(bar)
+
+    async def backfill(self, symbol: str, klines_1m: pd.DataFrame):
+        """
+        Fold closed 1m klines (REST / OHLCVStore) in before streaming starts
+
+        Completes the period in progress for every interval it covers back
+        to the period start, so its bar closes as a full bar. Periods already
+        in the closed buffer (``seed``) are skipped; ``klines_1m`` must not
+        include the minute that is still open.
+        """
+        symbol = symbol.upper()
+        self._symbol(symbol)
+        for row in klines_1m[list(BAR_FIELDS)].itertuples(index=False):
+            bar = dict(zip(BAR_FIELDS, row))
+            await self.on_kline({"symbol": symbol, **bar, "open_time": int(bar["open_time"]), "is_closed": True})
+
+    # ============== Stream handlers ==============
+
+    async def on_kline(self, data: Dict):
+        """BinanceWebSocketManager callback for ``@kline_1m``"""
+        frames = self._frames.get(data["symbol"])
+        if frames is None:
+            return
+        symbol = data["symbol"]
+        open_time = int(data["open_time"])
+        ohlcv = (data["open"], data["high"], data["low"], data["close"], data["volume"])
+        is_closed = bool(data["is_closed"])
+        minute = INTERVAL_MS["1m"]
+
+        for tf in frames.values():
+            period = tf.period(open_time)
+            current = tf.live or tf.settled
+            if current is not None and current["open_time"] < period:
+                await self._emit(symbol, tf, tf.close_bar(), True)  # also covers missed last minutes
+            elif current is not None and current["open_time"] > period:
+                continue  # late event for an older period
+            if tf.closed and tf.closed[-1]["open_time"] >= period:
+                continue  # replay of an already closed period (reconnect)
+            if tf.through is not None and open_time <= tf.through:
+                continue  # this minute is already folded in
+
+            if current is None or current["open_time"] < period:
+                tf.start_bar(partial=open_time != period)
+            base = dict(tf.settled) if tf.settled is not None else None
+            tf.live = _merge(base, period, *ohlcv)
+            if not is_closed:
+                await self._emit(symbol, tf, tf.live, False)
+                continue
+            tf.settled = dict(tf.live)
+            tf.through = open_time
+            if open_time + minute == period + tf.step:
+                await self._emit(symbol, tf, tf.close_bar(), True)
+            else:
+                await self._emit(symbol, tf, tf.live, False)
+
+    async def on_agg_trade(self, data: Dict):
+        """BinanceWebSocketManager callback for ``@aggTrade``"""
+        frames = self._frames.get(data["symbol"])
+        if frames is None:
+            return
+        symbol = data["symbol"]
+        ts = int(data.get("trade_time") or data["raw_data"]["T"])
+        price, qty = data["price"], data["quantity"]
+
+        # A trade in a new period closes the previous bar
+        for tf in frames.values():
+            period = tf.period(ts)
+            if tf.live is not None and tf.live["open_time"] < period:
+                await self._emit(symbol, tf, tf.close_bar(), True)
+            if tf.closed and tf.closed[-1]["open_time"] >= period:
+                continue
+            if tf.live is None:
+                # Trades before tracking started are unknown until a boundary passes
+                tf.start_bar(partial=not tf.primed)
+            tf.live = _merge(tf.live, period, price, price, price, price, qty)
+            await self._emit(symbol, tf, tf.live, False)
+
+    async def _emit(self, symbol: str, tf: _Timeframe, bar: Optional[Dict], is_closed: bool):
+        callbacks = self._callbacks.get((symbol, tf.interval))
+        if not callbacks or bar is None:
+            return
+        event = {"stream_type": "kline", "symbol": symbol, "interval": tf.interval,
+                 **bar, "is_closed": is_closed}
+        for callback in list(callbacks):
+            try:
+                if asyncio.iscoroutinefunction(callback):
+                    await callback(dict(event))
+                else:
+                    callback(dict(event))
+            except Exception as e:
+                logger.error(f"Bar callback error for {symbol} {tf.interval}: {e}", module="bar_aggregator")
+
+    # ============== Reads ==============
+
+    def current(self, symbol: str, interval: str) -> Optional[Dict]:
+        """Bar in progress, if any"""
+        tf = self._frames.get(symbol.upper(), {}).get(interval)
+        if tf is None:
+            return None
+        bar = tf.live or tf.settled
+        return dict(bar) if bar is not None else None
+
+    def bars(self, symbol: str, interval: str, include_partial: bool = False) -> pd.DataFrame:
+        """
+        Closed bars (optionally plus the one in progress) as a klines frame
+
+        Tagged with symbol/interval like ``BinanceSpot.klines`` output so
+        ``core.indicator_cache`` can reuse results across strategies.
+        """
+        tf = self._frames.get(symbol.upper(), {}).get(interval)
+        rows = list(tf.closed) if tf is not None else []
+        if include_partial and tf is not None and (tf.live or tf.settled) is not None:
+            rows.append(tf.live or tf.settled)
+        df = pd.DataFrame(rows, columns=list(BAR_FIELDS))
+        df.attrs["symbol"] = symbol.upper()
+        df.attrs["interval"] = interval
+        return df
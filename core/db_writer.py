@@ -0,0 +1,300 @@
+"""
+Write-behind queue for Supabase writes
+
+``SupabaseManager`` enqueues inserts, upserts and updates here instead of
+running ``.execute()`` (a blocking HTTP round trip) inside its async
+methods. A background task flushes every ``flush_interval`` seconds:
+
+- inserts are batched into one request per table and column set,
+- upserts to the same conflict key and updates to the same row are
+  coalesced, and an update to a row whose insert is still queued is
+  merged into that insert,
+- updates that set identical values are sent as one ``in_`` request.
+
+Rows get client-side ids (``uuid4``) so callers can reference a row
+before it is written. Requests run in a worker thread; failed groups are
+retried with backoff and re-queued up to ``max_attempts`` flushes. Ops
+that still fail (and whatever is pending at ``close``) are spilled to a
+local JSONL file, which is put back in front of the queue on the first
+flush after a restart or after the database accepts a write again.
+"""
+
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.logger import logger
+
+INSERT = "insert"
+UPSERT = "upsert"
+UPDATE = "update"
+
+
+class _Op:
+    """One queued write"""
+
+    __slots__ = ("kind", "table", "data", "on_conflict", "column", "value", "attempts")
+
+    def __init__(self, kind: str, table: str, data: Dict, on_conflict: str = None,
+                 column: str = None, value: Any = None):
+        self.kind = kind
+        self.table = table
+        self.data = data
+        self.on_conflict = on_conflict
+        self.column = column
+        self.value = value
+        self.attempts = 0
+
+    def to_json(self) -> str:
+        return json.dumps({"kind": self.kind, "table": self.table, "data": self.data,
+                           "on_conflict": self.on_conflict, "column": self.column,
+                           "value": self.value}, default=str)
+
+    @classmethod
+    def from_json(cls, line: str) -> "_Op":
+        return cls(**json.loads(line))
+
+
+class SupabaseWriteQueue:
+    """Batches and coalesces writes, flushed from a background task"""
+
+    def __init__(self, client, flush_interval: float = 1.0, max_batch: int = 500,
+                 max_retries: int = 2, retry_delay: float = 0.5, max_attempts: int = 5,
+                 on_write: Callable[[str], None] = None, spill_path: str = None):
+        if spill_path is None:
+            from config import cfg
+            spill_path = os.path.join(cfg.data_dir, "spill", "supabase_writes.jsonl")
+        self.client = client
+        self.on_write = on_write  # called with the table name after each successful request
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.spill_path = Path(spill_path)
+
+        self._ops: List[_Op] = []
+        self._index: Dict[Tuple, _Op] = {}  # coalescing key -> queued op
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._closing = False
+        self._healthy = True  # last request succeeded (or none yet) → replay the spill file
+
+        self.requests = 0
+        self.rows = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.spilled = 0
+        self.dropped = 0  # could not even be spilled
+
+    # ============== Enqueue ==============
+
+    @staticmethod
+    def _key(op: _Op) -> Tuple:
+        if op.kind == INSERT:
+            return (INSERT, op.table, op.data.get("id", id(op.data)))
+        if op.kind == UPSERT:
+            return (UPSERT, op.table, op.on_conflict) + \
+                tuple(op.data.get(c.strip()) for c in op.on_conflict.split(","))
+        return (UPDATE, op.table, op.column, op.value)
+
+    def _reindex(self):
+        # Later ops win, so new changes merge into the newest pending write
+        self._index = {self._key(op): op for op in self._ops}
+
+    def _enqueue(self, key: Tuple, op: _Op):
+        self._ops.append(op)
+        self._index[key] = op
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop yet; flushed by the first flush()/enqueue inside one
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        if len(self._ops) >= self.max_batch:
+            self._wakeup.set()
+
+    def insert(self, table: str, row: Dict):
+        """Queue an insert (rows with an ``id`` can later be updated before flushing)"""
+        op = _Op(INSERT, table, dict(row))  # copied: later updates merge into it
+        self._enqueue(self._key(op), op)
+
+    def upsert(self, table: str, row: Dict, on_conflict: str):
+        op = _Op(UPSERT, table, dict(row), on_conflict=on_conflict)
+        key = self._key(op)
+        pending = self._index.get(key)
+        if pending is not None:
+            pending.data.update(row)
+            self.coalesced += 1
+            return
+        self._enqueue(key, op)
+
+    def update(self, table: str, column: str, value: Any, updates: Dict):
+        """Queue ``UPDATE table SET updates WHERE column = value``"""
+        pending = self._index.get((INSERT, table, value)) if column == "id" else None
+        if pending is None:
+            pending = self._index.get((UPDATE, table, column, value))
+        if pending is not None:
+            pending.data.update(updates)
+            self.coalesced += 1
+            return
+        self._enqueue((UPDATE, table, column, value),
+                      _Op(UPDATE, table, dict(updates), column=column, value=value))
+
+    # ============== Flushing ==============
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Database flush failed: {e}", module="supabase")
+
+    def _groups(self, ops: List[_Op]) -> List[Tuple[List[_Op], Any]]:
+        """(ops, query builder) per request: inserts, then upserts, then updates"""
+        inserts: Dict[Tuple[str, frozenset], List[_Op]] = OrderedDict()
+        upserts: Dict[Tuple[str, str], List[_Op]] = OrderedDict()
+        updates: Dict[Tuple[str, str, str], List[_Op]] = OrderedDict()
+        for op in ops:
+            if op.kind == INSERT:
+                # Bulk inserts need the same columns in every row
+                inserts.setdefault((op.table, frozenset(op.data)), []).append(op)
+            elif op.kind == UPSERT:
+                upserts.setdefault((op.table, op.on_conflict), []).append(op)
+            else:
+                payload = json.dumps(op.data, sort_keys=True, default=str)
+                updates.setdefault((op.table, op.column, payload), []).append(op)
+
+        groups = []
+        for (table, _), group in inserts.items():
+            for i in range(0, len(group), self.max_batch):
+                chunk = group[i:i + self.max_batch]
+                groups.append((chunk, lambda t=table, c=chunk: self.client.table(t).insert([o.data for o in c])))
+        for (table, on_conflict), group in upserts.items():
+            for i in range(0, len(group), self.max_batch):
+                chunk = group[i:i + self.max_batch]
+                groups.append((chunk, lambda t=table, oc=on_conflict, c=chunk:
+                               self.client.table(t).upsert([o.data for o in c], on_conflict=oc)))
+        for (table, column, _), group in updates.items():
+            for i in range(0, len(group), self.max_batch):
+                chunk = group[i:i + self.max_batch]
+                if len(chunk) == 1:
+                    build = lambda t=table, col=column, op=chunk[0]: \
+                        self.client.table(t).update(op.data).eq(col, op.value)
+                else:
+                    build = lambda t=table, col=column, c=chunk: \
+                        self.client.table(t).update(c[0].data).in_(col, [o.value for o in c])
+                groups.append((chunk, build))
+        return groups
+
+    async def _execute(self, build) -> bool:
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            try:
+                await asyncio.to_thread(lambda: build().execute())
+                self.requests += 1
+                return True
+            except Exception as e:
+                self.failures += 1
+                if attempt == self.max_retries:
+                    logger.warning(f"Database write failed: {e}", module="supabase")
+                    return False
+                await asyncio.sleep(delay)
+                delay *= 2
+        return False
+
+    async def flush(self) -> int:
+        """Write everything queued so far; returns rows written"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            ops, self._ops, self._index = self._ops, [], {}
+            if self._healthy and self.spill_path.exists():
+                ops = await asyncio.to_thread(self._take_spill) + ops
+            written = 0
+            groups = self._groups(ops)
+            for i, (chunk, build) in enumerate(groups):
+                self._healthy = await self._execute(build)
+                if self._healthy:
+                    written += len(chunk)
+                    if self.on_write is not None:
+                        self.on_write(chunk[0].table)
+                    continue
+                # Keep order: the failed group and everything after it go back in front
+                retry, give_up = [], []
+                for op in chunk:
+                    op.attempts += 1
+                    (give_up if op.attempts >= self.max_attempts else retry).append(op)
+                for later, _ in groups[i + 1:]:
+                    retry.extend(later)
+                self._ops = retry + self._ops
+                self._reindex()
+                if give_up:
+                    await asyncio.to_thread(self._spill, give_up)
+                break
+            self.rows += written
+            return written
+
+    # ============== Local spill ==============
+
+    def _spill(self, ops: List[_Op]):
+        try:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for op in ops:
+                    f.write(op.to_json() + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            self.dropped += len(ops)
+            logger.error(f"Could not spill {len(ops)} database writes: {e}", module="supabase",
+                         rows=[op.data for op in ops])
+            return
+        self.spilled += len(ops)
+        logger.warning(f"Database unavailable; spilled {len(ops)} writes to {self.spill_path}",
+                       module="supabase")
+
+    def _take_spill(self) -> List[_Op]:
+        replay = self.spill_path.with_suffix(".replay")
+        os.replace(self.spill_path, replay)
+        with open(replay, encoding="utf-8") as f:
+            ops = [_Op.from_json(line) for line in f if line.strip()]
+        replay.unlink()
+        if ops:
+            logger.info(f"Replaying {len(ops)} spilled database writes", module="supabase")
+        return ops
+
+    async def close(self):
+        """Stop the background task and flush what is left"""
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        if self._ops:
+            # Still failing at shutdown: keep them for the next start
+            ops, self._ops, self._index = self._ops, [], {}
+            await asyncio.to_thread(self._spill, ops)
+        self._closing = False
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._ops),
+            "requests": self.requests,
+            "rows": self.rows,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "spilled": self.spilled,
+            "dropped": self.dropped,
+        }
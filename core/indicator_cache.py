@@ -0,0 +1,111 @@
+"""
+Shared LRU cache for indicator results
+
+Strategies, the scanner and the trader all compute the same indicators on
+the same klines frame. Frames fetched through the exchange layer carry
+``df.attrs["symbol"]`` / ``df.attrs["interval"]``; for those, results are
+cached per (symbol, interval, bar range, indicator, params) so each one is
+computed once per bar no matter how many consumers ask for it.
+
+The key includes the last bar's open time *and* its high/low/close, so an
+in-progress candle that keeps changing never serves a stale value. Callers
+get their own copy of the cached result, so mutating it (e.g. ``fillna``
+with ``inplace=True``) cannot corrupt what other consumers see.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+from core.indicators import sma, ema, rsi, bbands, atr, adx
+
+# name -> (function, input column or None for the whole OHLC frame)
+INDICATORS = {
+    "sma": (sma, "close"),
+    "ema": (ema, "close"),
+    "rsi": (rsi, "close"),
+    "bbands": (bbands, "close"),
+    "atr": (atr, None),
+    "adx": (adx, None),
+}
+
+
+def _copy(value: Any) -> Any:
+    if isinstance(value, tuple):  # bbands
+        return tuple(v.copy() for v in value)
+    return value.copy()
+
+
+def _frame_key(df: pd.DataFrame) -> Optional[Tuple[Hashable, ...]]:
+    """Identify the bars in ``df`` or return None when the frame is not tagged"""
+    symbol = df.attrs.get("symbol")
+    interval = df.attrs.get("interval")
+    if symbol is None or interval is None or df.empty:
+        return None
+
+    if "open_time" in df.columns:
+        first_time, last_time = df["open_time"].iloc[0], df["open_time"].iloc[-1]
+    else:
+        first_time, last_time = df.index[0], df.index[-1]
+    # Results carry the index of the frame that computed them, and callers align by
+    # label (pd.DataFrame(..., index=df.index)), so the labels are part of the key
+    return (
+        symbol, interval, len(df), first_time, last_time, df.index[0], df.index[-1],
+        float(df["high"].iat[-1]), float(df["low"].iat[-1]), float(df["close"].iat[-1]),
+    )
+
+
+class IndicatorCache:
+    """Thread-safe LRU cache of indicator results keyed by frame and params"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, df: pd.DataFrame, name: str, *params) -> Any:
+        """Return indicator ``name`` for ``df``, computing it at most once per bar"""
+        func, column = INDICATORS[name]
+        frame_key = _frame_key(df)
+        if frame_key is None:
+            return func(df[column] if column else df, *params)
+
+        key = frame_key + (name, params)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _copy(self._entries[key])
+            self.misses += 1
+
+        value = func(df[column] if column else df, *params)
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return _copy(value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Singleton instance
+indicator_cache = IndicatorCache()
+
+
+def indicator(df: pd.DataFrame, name: str, *params) -> Any:
+    """Cached indicator lookup, e.g. ``indicator(df, "rsi", 14)``"""
+    return indicator_cache.get(df, name, *params)
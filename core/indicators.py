@@ -14,7 +14,8 @@ def rsi(series: pd.Series, period: int = 14):
     ma_up = up.ewm(com=period - 1, adjust=False).mean()
     ma_down = down.ewm(com=period - 1, adjust=False).mean()
     rs = ma_up / (ma_down + 1e-12)
-    return 100 - (100 / (1 + rs))
+    # No movement at all is neutral, not oversold
+    return (100 - (100 / (1 + rs))).mask((ma_up == 0) & (ma_down == 0), 50.0)
 
 def bbands(series: pd.Series, window: int = 20, num_std: float = 2.0):
     ma = sma(series, window)
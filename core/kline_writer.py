@@ -0,0 +1,189 @@
+"""
+Write-behind persistence for closed klines
+
+Closed candles are queued in memory and upserted to ``market_data`` in
+bulk from one background task, either when ``max_batch`` rows are pending
+or every ``flush_interval`` seconds. Stream handlers only enqueue, so a
+slow or unavailable database never stalls the WebSocket reader. Failed
+batches are retried with backoff and then spilled to a local JSONL file,
+which is replayed after the next successful write.
+"""
+
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from utils.logger import logger
+
+
+def kline_record(data: Dict) -> Dict:
+    """``market_data`` row for a raw Binance kline payload"""
+    k = data.get("k", {})
+    return {
+        "symbol": data.get("s"),
+        "timeframe": k.get("i"),
+        "open_time": pd.Timestamp(k.get("t"), unit="ms").isoformat(),
+        "open": float(k.get("o", 0)),
+        "high": float(k.get("h", 0)),
+        "low": float(k.get("l", 0)),
+        "close": float(k.get("c", 0)),
+        "volume": float(k.get("v", 0)),
+    }
+
+
+class KlineWriteBehind:
+    """Buffers market_data rows and flushes them in bulk"""
+
+    def __init__(self, save_func: Callable[[List[Dict]], Awaitable[bool]] = None,
+                 max_batch: int = 500, flush_interval: float = 2.0, max_retries: int = 3,
+                 retry_delay: float = 1.0, spill_path: str = None):
+        if save_func is None:
+            from core.supabase_client import supabase_manager
+            save_func = supabase_manager.upsert_market_data
+        if spill_path is None:
+            from config import cfg
+            spill_path = os.path.join(cfg.data_dir, "spill", "market_data.jsonl")
+        self.save_func = save_func
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.spill_path = Path(spill_path)
+
+        # (symbol, timeframe, open_time) -> row; a re-sent candle replaces the queued one
+        self._pending: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.spilled = 0
+
+    # ============== Enqueue ==============
+
+    def add(self, record: Dict):
+        """Queue one row (never blocks; must be called from the event loop)"""
+        key = (record["symbol"], record["timeframe"], record["open_time"])
+        self._pending[key] = record
+        self._pending.move_to_end(key)
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    def add_kline(self, data: Dict):
+        """Queue a closed kline from a raw ``@kline`` payload"""
+        self.add(kline_record(data))
+
+    # ============== Flushing ==============
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Kline flush failed: {e}", module="websocket")
+
+    async def flush(self) -> int:
+        """Write everything pending now; returns rows written"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        written = 0
+        async with self._flush_lock:
+            while self._pending:
+                batch = []
+                while self._pending and len(batch) < self.max_batch:
+                    batch.append(self._pending.popitem(last=False)[1])
+                if await self._write(batch, self.max_retries):
+                    written += len(batch)
+                else:
+                    await asyncio.to_thread(self._spill, batch)
+            if written and self.spill_path.exists():
+                written += await self._replay_spill()
+        return written
+
+    async def _write(self, batch: List[Dict], retries: int) -> bool:
+        delay = self.retry_delay
+        for attempt in range(retries + 1):
+            try:
+                ok = await self.save_func(batch)
+            except Exception as e:
+                logger.warning(f"market_data upsert error: {e}", module="websocket")
+                ok = False
+            if ok:
+                self.written += len(batch)
+                self.batches += 1
+                return True
+            self.failures += 1
+            if attempt < retries:
+                await asyncio.sleep(delay)
+                delay *= 2
+        return False
+
+    # ============== Local spill ==============
+
+    def _spill(self, batch: List[Dict]):
+        self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for record in batch:
+                f.write(json.dumps(record) + "\n")
+        self.spilled += len(batch)
+        logger.warning(f"Database unavailable; spilled {len(batch)} klines to {self.spill_path}", module="websocket")
+
+    def _take_spill(self) -> List[Dict]:
+        replay = self.spill_path.with_suffix(".replay")
+        os.replace(self.spill_path, replay)
+        with open(replay, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        replay.unlink()
+        return records
+
+    async def _replay_spill(self) -> int:
+        """Upload rows spilled while the database was down"""
+        records = await asyncio.to_thread(self._take_spill)
+        written = 0
+        for i in range(0, len(records), self.max_batch):
+            batch = records[i:i + self.max_batch]
+            if not await self._write(batch, 0):
+                await asyncio.to_thread(self._spill, records[i:])
+                break
+            written += len(batch)
+        if written:
+            logger.info(f"Replayed {written} spilled klines", module="websocket")
+        return written
+
+    # ============== Lifecycle ==============
+
+    async def close(self):
+        """Stop the background task and flush what is left"""
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        self._closing = False
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "batches": self.batches,
+            "failures": self.failures,
+            "spilled": self.spilled,
+        }
@@ -0,0 +1,186 @@
+"""
+Raw market-data recorder and deterministic replay
+
+``MarketRecorder`` is attached to ``BinanceWebSocketManager(recorder=...)``
+and appends every received frame, unparsed, with its receive time to
+length-prefixed binary files that rotate by size and by UTC day. Files
+are read back through ``mmap``, so scanning a day of frames is
+sequential memory access.
+
+``MarketReplay`` feeds recorded frames through the manager's normal
+``_dispatch`` path (``_process_data`` / ``LazyEvent`` -> subscriber
+queues -> callbacks), either at recorded speed (``speed=1.0``), scaled,
+or as fast as possible (``speed=None``). In the fast mode each frame is
+fully delivered before the next one, so runs are repeatable. Use an
+offline manager so nothing connects to Binance or writes klines to the
+database::
+
+    manager = BinanceWebSocketManager(offline=True, fast_decode=True)
+    await price_book.start(manager)
+    await MarketReplay("data/recordings").run(manager)
+
+Record layout: ``<recv_ts f8><wrapped u1><key_len u2><type_len u2>
+<payload_len u4>`` followed by the stream key, stream type and the raw
+frame. ``wrapped`` marks combined-stream frames (``{"stream", "data"}``)
+whose ``data`` member is what the live path dispatched.
+"""
+
+import asyncio
+import mmap
+import struct
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Union
+
+from utils.logger import logger
+
+MAGIC = b"BMREC01\n"
+_HEADER = struct.Struct("<dBHHI")
+
+
+class Frame(NamedTuple):
+    recv_ts: float
+    stream_key: str
+    stream_type: str
+    wrapped: bool
+    payload: bytes
+
+
+class MarketRecorder:
+    """Appends raw WebSocket frames to rotating binary files"""
+
+    def __init__(self, directory: str = "data/recordings", rotate_bytes: int = 256 * 1024 * 1024,
+                 buffer_bytes: int = 1024 * 1024):
+        self.directory = Path(directory)
+        self.rotate_bytes = rotate_bytes
+        self.buffer_bytes = buffer_bytes
+        self._file = None
+        self._path: Optional[Path] = None
+        self._day: Optional[str] = None
+        self._size = 0
+        self._seq = 0
+        self.frames = 0
+        self.bytes = 0
+
+    def _open(self, now: float):
+        self.close()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.fromtimestamp(now, timezone.utc)
+        self._day = stamp.strftime("%Y%m%d")
+        self._seq += 1
+        self._path = self.directory / f"{stamp.strftime('%Y%m%d-%H%M%S')}-{self._seq:04d}.rec"
+        self._file = open(self._path, "ab", buffering=self.buffer_bytes)
+        self._file.write(MAGIC)
+        self._size = len(MAGIC)
+        logger.info(f"Recording market data to {self._path}", module="recorder")
+
+    def record(self, stream_key: str, stream_type: str, message: Union[str, bytes],
+               wrapped: bool = False, recv_ts: float = None):
+        """Append one frame exactly as received"""
+        now = time.time() if recv_ts is None else recv_ts
+        payload = message.encode() if isinstance(message, str) else bytes(message)
+        key, kind = stream_key.encode(), stream_type.encode()
+        if (self._file is None or self._size >= self.rotate_bytes
+                or datetime.fromtimestamp(now, timezone.utc).strftime("%Y%m%d") != self._day):
+            self._open(now)
+        self._file.write(_HEADER.pack(now, wrapped, len(key), len(kind), len(payload)))
+        self._file.write(key)
+        self._file.write(kind)
+        self._file.write(payload)
+        size = _HEADER.size + len(key) + len(kind) + len(payload)
+        self._size += size
+        self.bytes += size
+        self.frames += 1
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def path(self) -> Optional[Path]:
+        """File currently being written"""
+        return self._path
+
+
+def read_frames(path: Union[str, Path]) -> Iterator[Frame]:
+    """Frames of one recording file (a truncated tail record is ignored)"""
+    with open(path, "rb") as f:
+        if Path(path).stat().st_size <= len(MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"Not a market recording: {path}")
+            pos, end = len(MAGIC), len(mm)
+            while pos + _HEADER.size <= end:
+                recv_ts, wrapped, key_len, type_len, payload_len = _HEADER.unpack_from(mm, pos)
+                start = pos + _HEADER.size
+                stop = start + key_len + type_len + payload_len
+                if stop > end:
+                    break  # writer stopped mid-record
+                key = mm[start:start + key_len].decode()
+                kind = mm[start + key_len:start + key_len + type_len].decode()
+                yield Frame(recv_ts, key, kind, bool(wrapped), mm[start + key_len + type_len:stop])
+                pos = stop
+
+
+class MarketReplay:
+    """Feeds recorded frames back through a BinanceWebSocketManager"""
+
+    def __init__(self, source: Union[str, Path, List[Union[str, Path]]]):
+        if isinstance(source, (str, Path)) and Path(source).is_dir():
+            self.paths = sorted(Path(source).glob("*.rec"))
+        elif isinstance(source, (str, Path)):
+            self.paths = [Path(source)]
+        else:
+            self.paths = [Path(p) for p in source]
+
+    def frames(self, start: float = None, end: float = None) -> Iterator[Frame]:
+        """Frames in receive order, optionally limited to [start, end] (epoch seconds)"""
+        for path in self.paths:
+            for frame in read_frames(path):
+                if start is not None and frame.recv_ts < start:
+                    continue
+                if end is not None and frame.recv_ts > end:
+                    return
+                yield frame
+
+    async def run(self, manager, speed: Optional[float] = None, start: float = None,
+                  end: float = None) -> int:
+        """
+        Replay into ``manager``; returns the number of frames dispatched
+
+        Args:
+            manager: BinanceWebSocketManager (normally ``offline=True``)
+            speed: None = as fast as possible, 1.0 = recorded pace, 10 = 10x
+            start, end: Optional receive-time window (epoch seconds)
+        """
+        count = 0
+        first_ts = wall_start = None
+        for frame in self.frames(start, end):
+            if speed:
+                if first_ts is None:
+                    first_ts, wall_start = frame.recv_ts, time.monotonic()
+                delay = (frame.recv_ts - first_ts) / speed - (time.monotonic() - wall_start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            data = manager._loads(frame.payload)
+            stream_key = frame.stream_key
+            if frame.wrapped:
+                data = data.get("data")
+            elif stream_key not in manager.callbacks and isinstance(data, dict) and "stream" in data:
+                # Combined (non-multiplexed) connection recorded under its joined key
+                stream_key, data = data["stream"], data.get("data")
+            await manager._dispatch(stream_key, frame.stream_type, data, received=frame.recv_ts)
+            count += 1
+            if not speed:
+                await manager.drain()
+        await manager.drain()
+        logger.info(f"Replayed {count} frames", module="recorder")
+        return count
@@ -0,0 +1,270 @@
+"""
+Local columnar OHLCV store with incremental sync from Binance
+
+Closed klines are kept on disk as one raw little-endian column file per
+field under ``<data_dir>/<interval>/<SYMBOL>/``. Files are append-only and
+read back through ``np.memmap``, so loading years of bars is a slice, not
+an API call. ``sync`` backfills by paginating startTime/endTime and then
+only fetches bars newer than the last stored one.
+
+Whether a bar is closed is decided by the exchange, not the local clock:
+the newest row of a request that reaches the present is the candle still
+in progress, so it is never stored. Prepending older history rewrites the
+columns into a sibling directory that is swapped in as a whole.
+"""
+
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import logger
+
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000,
+    "8h": 28_800_000, "12h": 43_200_000, "1d": 86_400_000, "3d": 259_200_000,
+    "1w": 604_800_000,
+}
+
+# column -> on-disk dtype
+COLUMNS = {
+    "open_time": "<i8",
+    "open": "<f8",
+    "high": "<f8",
+    "low": "<f8",
+    "close": "<f8",
+    "volume": "<f8",
+}
+
+MAX_KLINES_PER_REQUEST = 1000
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class OHLCVStore:
+    """On-disk kline store shared by backtests, the scanner and the trader"""
+
+    def __init__(self, client, data_dir: str = "data/klines"):
+        self.client = client
+        self.data_dir = Path(data_dir)
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    # ============== Files ==============
+
+    def _path(self, symbol: str, interval: str) -> Path:
+        return self.data_dir / interval / symbol.upper()
+
+    def _lock(self, symbol: str, interval: str) -> threading.Lock:
+        key = (symbol.upper(), interval)
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def _length(self, path: Path) -> int:
+        """Number of complete rows (columns may be uneven after a crash mid-append)"""
+        lengths = []
+        for col, dtype in COLUMNS.items():
+            f = path / f"{col}.bin"
+            lengths.append(f.stat().st_size // np.dtype(dtype).itemsize if f.exists() else 0)
+        return min(lengths)
+
+    def _repair(self, path: Path, length: int):
+        for col, dtype in COLUMNS.items():
+            f = path / f"{col}.bin"
+            size = length * np.dtype(dtype).itemsize
+            if f.exists() and f.stat().st_size != size:
+                os.truncate(f, size)
+
+    def _columns(self, path: Path, length: int) -> Dict[str, np.ndarray]:
+        if length == 0:
+            return {col: np.empty(0, dtype=dtype) for col, dtype in COLUMNS.items()}
+        return {
+            col: np.memmap(path / f"{col}.bin", dtype=dtype, mode="r", shape=(length,))
+            for col, dtype in COLUMNS.items()
+        }
+
+    def _write(self, path: Path, bars: pd.DataFrame, mode: str = "ab"):
+        path.mkdir(parents=True, exist_ok=True)
+        for col, dtype in COLUMNS.items():
+            with open(path / f"{col}.bin", mode) as f:
+                f.write(bars[col].to_numpy().astype(dtype).tobytes())
+                if mode == "wb":
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def _rewrite(self, path: Path, bars: pd.DataFrame):
+        """Replace all columns at once: a crash leaves either the old or the new set"""
+        tmp, old = path.with_name(f"{path.name}.tmp"), path.with_name(f"{path.name}.old")
+        shutil.rmtree(tmp, ignore_errors=True)
+        self._write(tmp, bars, mode="wb")
+        os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def _recover(self, path: Path):
+        """Undo a ``_rewrite`` interrupted between its two renames"""
+        old = path.with_name(f"{path.name}.old")
+        if old.exists():
+            if path.exists():
+                shutil.rmtree(old, ignore_errors=True)
+            else:
+                os.replace(old, path)
+        shutil.rmtree(path.with_name(f"{path.name}.tmp"), ignore_errors=True)
+
+    # ============== Sync ==============
+
+    def _fetch_closed(self, symbol: str, interval: str, start_ms: int, end_ms: int,
+                      to_present: bool = False) -> pd.DataFrame:
+        """
+        Page through [start_ms, end_ms] and return closed bars only
+
+        With ``to_present`` the range reaches the current candle, so the
+        newest row the exchange returned is dropped: it is still open (or,
+        with a lagging local clock, closed moments ago and picked up by the
+        next sync).
+        """
+        step = INTERVAL_MS[interval]
+        pages = []
+        cursor = start_ms
+        while cursor <= end_ms:
+            df = self.client.klines(symbol, interval, limit=MAX_KLINES_PER_REQUEST,
+                                    start_time=cursor, end_time=end_ms)
+            if df is None or df.empty:
+                break
+            pages.append(df[list(COLUMNS)])
+            last = int(df["open_time"].iloc[-1])
+            if len(df) < MAX_KLINES_PER_REQUEST:
+                break
+            cursor = last + step
+
+        if not pages:
+            return pd.DataFrame(columns=list(COLUMNS))
+        bars = pd.concat(pages, ignore_index=True)
+        bars = bars.drop_duplicates("open_time").sort_values("open_time")
+        if to_present:
+            bars = bars.iloc[:-1]
+        return bars[bars["open_time"] >= start_ms].reset_index(drop=True)
+
+    def sync(self, symbol: str, interval: str, start_ms: Optional[int] = None) -> int:
+        """
+        Bring the local store up to date with the exchange
+
+        Args:
+            symbol: Trading pair, e.g. BTCUSDT
+            interval: Kline interval, e.g. 15m
+            start_ms: Oldest open time wanted; older history is backfilled
+                (prepended) if the store does not reach back that far
+
+        Returns:
+            Number of bars added
+        """
+        step = INTERVAL_MS[interval]
+        path = self._path(symbol, interval)
+        added = 0
+
+        with self._lock(symbol, interval):
+            self._recover(path)
+            length = self._length(path)
+            self._repair(path, length)
+            cols = self._columns(path, length)
+            first = int(cols["open_time"][0]) if length else None
+            last = int(cols["open_time"][-1]) if length else None
+            del cols
+
+            # Backfill older history in front of what we have
+            if start_ms is not None and first is not None and start_ms < first:
+                older = self._fetch_closed(symbol, interval, start_ms, first - step)
+                if not older.empty:
+                    existing = self.load(symbol, interval, _locked=True)
+                    self._rewrite(path, pd.concat([older, existing], ignore_index=True))
+                    added += len(older)
+
+            # Append bars newer than the last stored one
+            if last is None:
+                cursor = start_ms if start_ms is not None else _now_ms() - MAX_KLINES_PER_REQUEST * step
+            else:
+                cursor = last + step
+            if cursor + step <= _now_ms():
+                newer = self._fetch_closed(symbol, interval, cursor, _now_ms(), to_present=True)
+                if not newer.empty:
+                    self._write(path, newer)
+                    added += len(newer)
+
+        if added:
+            logger.debug(f"Synced {added} {interval} bars for {symbol}", module="ohlcv_store")
+        return added
+
+    # ============== Read ==============
+
+    def load(self, symbol: str, interval: str, start_ms: Optional[int] = None,
+             end_ms: Optional[int] = None, limit: Optional[int] = None,
+             _locked: bool = False) -> pd.DataFrame:
+        """
+        Read stored bars in [start_ms, end_ms] (open time, inclusive)
+
+        Returns a klines-shaped DataFrame (open_time in ms plus OHLCV),
+        tagged with symbol/interval for core.indicator_cache. ``limit``
+        keeps only the most recent rows of the range.
+        """
+        path = self._path(symbol, interval)
+        lock = self._lock(symbol, interval)
+        if not _locked:
+            lock.acquire()
+        try:
+            self._recover(path)
+            length = self._length(path)
+            cols = self._columns(path, length)
+            times = cols["open_time"]
+            lo = int(np.searchsorted(times, start_ms, side="left")) if start_ms is not None else 0
+            hi = int(np.searchsorted(times, end_ms, side="right")) if end_ms is not None else length
+            if limit is not None:
+                lo = max(lo, hi - limit)
+            df = pd.DataFrame({col: np.array(arr[lo:hi]) for col, arr in cols.items()})
+            del cols, times
+        finally:
+            if not _locked:
+                lock.release()
+
+        df.attrs["symbol"] = symbol
+        df.attrs["interval"] = interval
+        return df
+
+    def klines(self, symbol: str, interval: str = "15m", limit: int = 300,
+               include_live: bool = True) -> pd.DataFrame:
+        """
+        Drop-in replacement for ``BinanceSpot.klines`` backed by the store
+
+        Syncs closed bars (at most one small request when a candle closed),
+        then optionally appends the in-progress candle. The live request asks
+        for two bars so a candle that closes between the two calls is still
+        included rather than leaving a gap.
+        """
+        step = INTERVAL_MS[interval]
+        if self._length(self._path(symbol, interval)) == 0:
+            self.sync(symbol, interval, start_ms=_now_ms() - (limit + 1) * step)
+        else:
+            self.sync(symbol, interval)
+
+        df = self.load(symbol, interval, limit=limit)
+        if include_live:
+            live = self.client.klines(symbol, interval, limit=2)
+            if live is not None and not live.empty:
+                live = live[list(COLUMNS)]
+                if not df.empty:
+                    live = live[live["open_time"] > int(df["open_time"].iloc[-1])]
+                if not live.empty:
+                    df = pd.concat([df, live], ignore_index=True).tail(limit).reset_index(drop=True)
+
+        df.attrs["symbol"] = symbol
+        df.attrs["interval"] = interval
+        return df
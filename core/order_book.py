@@ -0,0 +1,318 @@
+"""
+Locally maintained L2 order books
+
+``LocalOrderBook`` keeps every price level of one symbol in sorted arrays
+(best level at the end, so best bid/ask are O(1) reads and removing the
+top of book is a pop). ``OrderBookManager`` keeps books in sync from the
+``<symbol>@depth@100ms`` diff stream plus a REST snapshot, following
+Binance's sequencing rules:
+
+1. Buffer diff events and fetch a depth snapshot.
+2. Refetch while the snapshot is older than the first buffered event.
+3. Drop buffered events with ``u <= lastUpdateId``.
+4. The first applied event must straddle ``lastUpdateId + 1``.
+5. Each later event must start at the previous ``u + 1``; otherwise the
+   book has a gap and is resynced from a fresh snapshot.
+"""
+
+import asyncio
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from utils.logger import logger
+
+BUY = "BUY"
+SELL = "SELL"
+# Queued diff events across all tracked books before the oldest are dropped
+DEPTH_QUEUE = 2000
+
+
+class _BookSide:
+    """Price levels of one side, sorted so the best level is last"""
+
+    __slots__ = ("_descending", "_keys", "_prices", "_qtys")
+
+    def __init__(self, descending: bool):
+        # Asks are stored by -price so that both sides are ascending by key
+        self._descending = descending
+        self._keys: List[float] = []
+        self._prices: List[float] = []
+        self._qtys: List[float] = []
+
+    def clear(self):
+        self._keys.clear()
+        self._prices.clear()
+        self._qtys.clear()
+
+    def set(self, price: float, qty: float):
+        key = -price if self._descending else price
+        i = bisect_left(self._keys, key)
+        exists = i < len(self._keys) and self._keys[i] == key
+        if qty == 0.0:
+            if exists:
+                del self._keys[i], self._prices[i], self._qtys[i]
+        elif exists:
+            self._qtys[i] = qty
+        else:
+            self._keys.insert(i, key)
+            self._prices.insert(i, price)
+            self._qtys.insert(i, qty)
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        if not self._prices:
+            return None
+        return self._prices[-1], self._qtys[-1]
+
+    def levels(self, n: int = None) -> List[Tuple[float, float]]:
+        """Top ``n`` levels, best first"""
+        start = 0 if n is None else max(0, len(self._prices) - n)
+        return list(zip(reversed(self._prices[start:]), reversed(self._qtys[start:])))
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+
+class LocalOrderBook:
+    """Full-depth order book for one symbol"""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = _BookSide(descending=False)
+        self.asks = _BookSide(descending=True)
+        self.last_update_id = 0
+        self.synced = False
+
+    # ============== Updates ==============
+
+    def apply_snapshot(self, snapshot: Dict):
+        """Load a REST depth snapshot ({lastUpdateId, bids, asks})"""
+        self.bids.clear()
+        self.asks.clear()
+        for price, qty in snapshot.get("bids", []):
+            self.bids.set(float(price), float(qty))
+        for price, qty in snapshot.get("asks", []):
+            self.asks.set(float(price), float(qty))
+        self.last_update_id = int(snapshot["lastUpdateId"])
+        self.synced = False  # until the first diff lines up with the snapshot
+
+    def apply_diff(self, event: Dict) -> bool:
+        """
+        Apply one ``depthUpdate`` event
+
+        Returns False when the event does not follow on from the book
+        (a gap), in which case the book must be resynced.
+        """
+        first, last = int(event["U"]), int(event["u"])
+        if last <= self.last_update_id:
+            return True  # already contained in the snapshot / applied
+        if self.synced:
+            if first != self.last_update_id + 1:
+                return False
+        elif not first <= self.last_update_id + 1 <= last:
+            return False
+
+        for price, qty in event.get("b", []):
+            self.bids.set(float(price), float(qty))
+        for price, qty in event.get("a", []):
+            self.asks.set(float(price), float(qty))
+        self.last_update_id = last
+        self.synced = True
+        return True
+
+    # ============== Queries ==============
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        return self.asks.best()
+
+    def mid(self) -> Optional[float]:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2
+
+    def spread(self) -> Optional[float]:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def microprice(self) -> Optional[float]:
+        """Top-of-book price weighted toward the side with less size"""
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        (bid_px, bid_qty), (ask_px, ask_qty) = bid, ask
+        return (bid_px * ask_qty + ask_px * bid_qty) / (bid_qty + ask_qty)
+
+    def depth(self, n: int = 10) -> Dict[str, List[Tuple[float, float]]]:
+        return {"bids": self.bids.levels(n), "asks": self.asks.levels(n)}
+
+    def estimate_fill(self, side: str, quantity: float = None, quote_qty: float = None) -> Dict:
+        """
+        Walk the book for a market order
+
+        Args:
+            side: BUY (consumes asks) or SELL (consumes bids)
+            quantity: Base quantity to fill
+            quote_qty: Quote amount to spend instead of a base quantity
+
+        Returns:
+            Dict with avg_price, filled_qty, filled_quote, worst_price,
+            fully_filled and slippage (avg price vs mid, as a fraction;
+            positive means worse than mid)
+        """
+        levels = self.asks.levels() if side == BUY else self.bids.levels()
+        remaining_base = quantity
+        remaining_quote = quote_qty
+        filled_qty = filled_quote = 0.0
+        worst = None
+
+        for price, qty in levels:
+            if remaining_quote is not None:
+                take = min(qty, remaining_quote / price)
+                remaining_quote -= take * price
+            else:
+                take = min(qty, remaining_base)
+                remaining_base -= take
+            filled_qty += take
+            filled_quote += take * price
+            worst = price
+            if (remaining_quote is not None and remaining_quote <= 1e-12) or \
+               (remaining_quote is None and remaining_base <= 1e-12):
+                break
+
+        remaining = remaining_quote if remaining_quote is not None else remaining_base
+        mid = self.mid()
+        avg = filled_quote / filled_qty if filled_qty else None
+        slippage = None
+        if avg is not None and mid:
+            slippage = (avg - mid) / mid if side == BUY else (mid - avg) / mid
+        return {
+            "avg_price": avg,
+            "filled_qty": filled_qty,
+            "filled_quote": filled_quote,
+            "worst_price": worst,
+            "fully_filled": remaining is not None and remaining <= 1e-12,
+            "slippage": slippage,
+        }
+
+
+class OrderBookManager:
+    """Keeps LocalOrderBooks in sync from the depth diff stream"""
+
+    def __init__(self, ws_manager, client, snapshot_limit: int = 1000):
+        self.ws_manager = ws_manager
+        self.client = client
+        self.snapshot_limit = snapshot_limit
+        self.books: Dict[str, LocalOrderBook] = {}
+        self._buffers: Dict[str, List[Dict]] = {}
+        self._syncing: Dict[str, asyncio.Task] = {}
+        self.resyncs = 0
+
+    async def _snapshot(self, symbol: str) -> Dict:
+        func = self.client.depth
+        if asyncio.iscoroutinefunction(func):
+            return await func(symbol, self.snapshot_limit)
+        return await asyncio.to_thread(func, symbol, self.snapshot_limit)
+
+    async def track(self, symbol: str):
+        """Start maintaining the book for ``symbol``"""
+        symbol = symbol.upper()
+        if symbol in self.books:
+            return
+        self.books[symbol] = LocalOrderBook(symbol)
+        self._buffers[symbol] = []
+        # A slow book must not stall the shared reader: dropped diffs show up as a
+        # sequence gap, which already triggers a resync from a fresh snapshot
+        self.ws_manager.set_queue_policy(self._on_depth, overflow="drop_oldest", maxsize=DEPTH_QUEUE)
+        await self.ws_manager.subscribe_depth_diff(symbol, self._on_depth)
+
+    async def untrack(self, symbol: str):
+        symbol = symbol.upper()
+        self.books.pop(symbol, None)
+        self._buffers.pop(symbol, None)
+        task = self._syncing.pop(symbol, None)
+        if task:
+            task.cancel()
+        await self.ws_manager.remove_callback(f"{symbol.lower()}@depth@100ms", self._on_depth)
+
+    async def _on_depth(self, data):
+        event = data["raw_data"]
+        symbol = event.get("s")
+        book = self.books.get(symbol)
+        if book is None:
+            return
+        if symbol in self._syncing:
+            self._buffers[symbol].append(event)
+            return
+        if book.apply_diff(event):
+            return
+
+        if book.last_update_id:
+            logger.warning(f"Order book gap for {symbol} (U={event['U']}, last={book.last_update_id}); resyncing",
+                           module="order_book")
+            self.resyncs += 1
+        book.synced = False
+        self._buffers[symbol] = [event]
+        self._syncing[symbol] = asyncio.create_task(self._resync(symbol))
+
+    async def _resync(self, symbol: str):
+        """Snapshot + buffered diffs -> synced book"""
+        try:
+            while symbol in self.books:
+                buffer = self._buffers[symbol]  # keeps growing while we wait
+                snapshot = await self._snapshot(symbol)
+                if buffer and int(snapshot["lastUpdateId"]) < int(buffer[0]["U"]):
+                    await asyncio.sleep(0.5)  # snapshot older than the stream; try again
+                    continue
+
+                book = self.books.get(symbol)
+                if book is None:
+                    return
+                book.apply_snapshot(snapshot)
+                for i, event in enumerate(buffer):
+                    if not book.apply_diff(event):
+                        # Gap inside the buffer: start over from the event after it
+                        self._buffers[symbol] = buffer[i:]
+                        break
+                else:
+                    self._buffers[symbol] = []
+                    # Synced, or waiting for the first diff past the snapshot
+                    logger.info(f"Order book synced: {symbol} @ {book.last_update_id}", module="order_book")
+                    return
+                await asyncio.sleep(0.5)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Order book resync failed for {symbol}: {e}", module="order_book")
+        finally:
+            self._syncing.pop(symbol, None)
+
+    def get(self, symbol: str) -> Optional[LocalOrderBook]:
+        """Synced book for ``symbol`` or None"""
+        book = self.books.get(symbol.upper())
+        return book if book is not None and book.synced else None
+
+    async def estimate_slippage(self, symbol: str, side: str, quote_qty: float) -> Optional[float]:
+        """
+        Expected slippage (fraction of mid) of a market order for ``quote_qty``
+
+        Uses the live book when it is synced, otherwise a one-off REST
+        snapshot. Returns None when no estimate is possible; an order larger
+        than the visible book returns infinity.
+        """
+        book = self.get(symbol)
+        if book is None:
+            try:
+                book = LocalOrderBook(symbol)
+                book.apply_snapshot(await self._snapshot(symbol))
+            except Exception as e:
+                logger.warning(f"Depth snapshot failed for {symbol}: {e}", module="order_book")
+                return None
+        fill = book.estimate_fill(side, quote_qty=quote_qty)
+        if fill["slippage"] is None:
+            return None
+        return fill["slippage"] if fill["fully_filled"] else float("inf")
@@ -5,13 +5,15 @@ Portfolio manager for multi-strategy trading
 import asyncio
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-import pandas as pd
 import numpy as np
 from decimal import Decimal
 from dataclasses import dataclass, asdict
+from config import cfg
 from utils.logger import logger
 from core.supabase_client import supabase_manager
 from core.websocket_manager import BinanceWebSocketManager
+from core.price_book import price_book
+from core.order_book import OrderBookManager, BUY
 from strategies.sma_crossover import sma_crossover_signal
 from strategies.rsi_reversion import rsi_reversion_signal
 from strategies.bb_breakout import bb_breakout_signal
@@ -39,7 +41,12 @@ class PortfolioManager:
         self.strategies: Dict[str, StrategyAllocation] = {}
         self.positions: Dict[str, Dict] = {}  # position_id: position_data
         self.ws_manager = None
+        self.order_books: Optional[OrderBookManager] = None
+        self.max_slippage = cfg.max_slippage  # skip entries expected to fill worse than mid by more than this
         self.running = False
+        self.price_book = price_book
+        if self.price_book.client is None:
+            self.price_book.bind(binance_client)
         
         # Strategy function mapping
         self.strategy_functions = {
@@ -50,9 +57,23 @@ class PortfolioManager:
         
         logger.info(f"Portfolio manager initialized with ${total_capital}", module="portfolio")
     
+    async def _exchange(self, method: str, *args):
+        """Call the exchange client without blocking the event loop
+
+        Works with both AsyncBinanceSpot (awaited) and the synchronous
+        BinanceSpot (run in a worker thread).
+        """
+        func = getattr(self.binance_client, method)
+        if asyncio.iscoroutinefunction(func):
+            return await func(*args)
+        return await asyncio.to_thread(func, *args)
+    
     async def initialize(self):
         """Initialize portfolio manager with strategies from database"""
         try:
+            # Cached reads below are dropped on realtime changes
+            supabase_manager.watch_cache_invalidation()
+            
             # Load active strategies
             strategies = await supabase_manager.get_active_strategies()
             
@@ -98,14 +119,23 @@ class PortfolioManager:
         logger.info(f"Starting portfolio monitoring for {symbols}", module="portfolio")
         
         # Initialize WebSocket manager
-        self.ws_manager = BinanceWebSocketManager(testnet=self.binance_client.testnet)
+        self.ws_manager = BinanceWebSocketManager(testnet=self.binance_client.testnet, multiplex=True, fast_decode=True)
+        
+        # Feed the shared price book from the all-market mini ticker
+        await self.price_book.start(self.ws_manager)
+        
+        # Local order books for pre-trade slippage checks
+        self.order_books = OrderBookManager(self.ws_manager, self.binance_client)
+        for symbol in symbols:
+            await self.order_books.track(symbol)
+        
+        # Closed candles must not be dropped, but the shared reader must never wait:
+        # in-progress updates are conflated per symbol instead
+        self.ws_manager.set_queue_policy(self._on_kline_update, overflow="keep_closed", maxsize=len(symbols) * 4)
         
         # Subscribe to real-time data
         for symbol in symbols:
-            await self.ws_manager.subscribe_kline(
-                symbol, timeframe, 
-                lambda data: asyncio.create_task(self._on_kline_update(data))
-            )
+            await self.ws_manager.subscribe_kline(symbol, timeframe, self._on_kline_update)
         
         # Start main monitoring loop
         asyncio.create_task(self._monitoring_loop(symbols, timeframe))
@@ -117,6 +147,9 @@ class PortfolioManager:
         if self.ws_manager:
             await self.ws_manager.close_all()
         
+        # Write out queued position/trade/alert rows
+        await supabase_manager.flush()
+        
         logger.info("Portfolio monitoring stopped", module="portfolio")
     
     async def _monitoring_loop(self, symbols: List[str], timeframe: str):
@@ -148,12 +181,12 @@ class PortfolioManager:
         """Evaluate a symbol for all active strategies"""
         try:
             # Get market data
-            klines = self.binance_client.klines(symbol, timeframe, 300)
-            if not klines:
+            # Frame is tagged with symbol/interval, so every strategy below
+            # shares one indicator computation per bar via core.indicator_cache
+            df = await self._exchange("klines", symbol, timeframe, 300)
+            if df is None or df.empty:
                 return
             
-            df = pd.DataFrame(klines)
-            
             # Evaluate each strategy
             for strategy_id, allocation in self.strategies.items():
                 if not allocation.is_active:
@@ -203,15 +236,23 @@ class PortfolioManager:
                 return
             
             # Get current price
-            ticker = self.binance_client.ticker_price(symbol)
-            if not ticker:
+            current_price = await self.price_book.get_price(symbol)
+            if not current_price:
                 return
             
-            current_price = float(ticker['price'])
             quantity = position_size / current_price
             
+            # Skip entries the book cannot absorb without excessive slippage
+            if self.order_books is not None:
+                slippage = await self.order_books.estimate_slippage(symbol, BUY, position_size)
+                if slippage is not None and slippage > self.max_slippage:
+                    logger.warning(
+                        f"Skipping {symbol} entry for {strategy_id}: expected slippage {slippage:.4%} "
+                        f"exceeds {self.max_slippage:.4%}", module="portfolio")
+                    return
+            
             # Place order
-            order = self.binance_client.market_buy_quote(symbol, position_size)
+            order = await self._exchange("market_buy_quote", symbol, position_size)
             
             if order and order.get('status') == 'FILLED':
                 # Record position in database
@@ -260,7 +301,7 @@ class PortfolioManager:
             for position_id, position in positions_to_close:
                 # Place sell order
                 quantity = position['entry_quantity']
-                order = self.binance_client.market_sell_base(symbol, quantity)
+                order = await self._exchange("market_sell_base", symbol, quantity)
                 
                 if order and order.get('status') == 'FILLED':
                     exit_price = float(order.get('fills', [{}])[0].get('price', 0))
@@ -268,7 +309,8 @@ class PortfolioManager:
                     
                     # Update position in database
                     await supabase_manager.close_position(
-                        position_id, exit_price, quantity, pnl
+                        position_id, exit_price, quantity, pnl,
+                        entry_price=position['entry_price'], entry_quantity=quantity
                     )
                     
                     # Update local state
@@ -300,11 +342,10 @@ class PortfolioManager:
             
             try:
                 # Get current price
-                ticker = self.binance_client.ticker_price(position['symbol'])
-                if not ticker:
+                current_price = await self.price_book.get_price(position['symbol'])
+                if not current_price:
                     continue
                 
-                current_price = float(ticker['price'])
                 entry_price = position['entry_price']
                 
                 # Check stop loss and take profit
@@ -363,9 +404,8 @@ class PortfolioManager:
             for position in self.positions.values():
                 if position['status'] == 'OPEN':
                     # Get current price
-                    ticker = self.binance_client.ticker_price(position['symbol'])
-                    if ticker:
-                        current_price = float(ticker['price'])
+                    current_price = await self.price_book.get_price(position['symbol'])
+                    if current_price:
                         position_value = current_price * position['entry_quantity']
                         total_value += position_value
                         
@@ -433,19 +473,18 @@ class PortfolioManager:
     async def _update_performance_metrics(self):
         """Update performance metrics for each strategy"""
         try:
+            # Latest row per strategy in one query
+            latest = await supabase_manager.get_latest_performance(days=7)
+            
             for strategy_id, allocation in self.strategies.items():
-                # Get recent performance
-                performance = await supabase_manager.get_performance_history(
-                    strategy_id=strategy_id, days=7
-                )
+                recent_performance = latest.get(strategy_id)
                 
-                if not performance.empty:
-                    # Calculate performance score based on recent metrics
-                    recent_performance = performance.iloc[0] if len(performance) > 0 else {}
-                    
+                if recent_performance:
                     # Simple scoring: win rate * profit factor
-                    win_rate = recent_performance.get('win_rate', 50) / 100
-                    profit_factor = recent_performance.get('profit_factor', 1)
+                    win_rate = recent_performance.get('win_rate')
+                    win_rate = (50 if win_rate is None else float(win_rate)) / 100
+                    profit_factor = recent_performance.get('profit_factor')
+                    profit_factor = 1 if profit_factor is None else float(profit_factor)
                     
                     allocation.performance_score = win_rate * profit_factor
                     
@@ -0,0 +1,137 @@
+"""
+Shared in-memory price book
+
+Last prices for every symbol, fed by the ``!miniTicker@arr`` stream (and
+optionally ``@bookTicker`` for tighter quotes). Reads are dict lookups;
+when a price is missing or stale a single bulk ``ticker_prices`` REST call
+refreshes the whole book at once instead of one request per symbol.
+Past ``hard_max_age`` a price is never served, even when the refresh was
+throttled or failed, so TP/SL checks skip a tick instead of acting on an
+old quote.
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+from utils.logger import logger
+
+
+class PriceBook:
+    """Latest price per symbol with a rate-limited bulk REST fallback"""
+
+    def __init__(self, max_age: float = 30.0, min_refresh_interval: float = 5.0,
+                 hard_max_age: float = 60.0):
+        self.max_age = max_age
+        self.hard_max_age = hard_max_age
+        self.min_refresh_interval = min_refresh_interval
+        self.client = None
+        self._prices: Dict[str, Tuple[float, float]] = {}  # symbol -> (price, monotonic ts)
+        self._quotes: Dict[str, Tuple[float, float]] = {}  # symbol -> (bid, ask)
+        self._last_refresh = 0.0
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self.refreshes = 0
+
+    def bind(self, client):
+        """Set the exchange client used for the REST fallback"""
+        self.client = client
+
+    # ============== Writes ==============
+
+    def update(self, symbol: str, price: float, ts: float = None):
+        if price > 0:
+            self._prices[symbol] = (price, ts if ts is not None else time.monotonic())
+
+    def on_mini_ticker(self, data: Dict):
+        """BinanceWebSocketManager callback for ``!miniTicker@arr`` / ``@miniTicker``"""
+        now = time.monotonic()
+        batch = data.get("batch")
+        if batch is not None:
+            # fast_decode: one structured array for the whole market
+            self._prices.update(
+                (symbol, (price, now))
+                for symbol, price in zip(batch["symbol"].tolist(), batch["close"].tolist())
+                if price > 0
+            )
+            return
+        for ticker in data.get("tickers") or [data]:
+            symbol = ticker.get("symbol")
+            if symbol:
+                self.update(symbol, ticker.get("price", 0.0), now)
+
+    def on_book_ticker(self, data: Dict):
+        """BinanceWebSocketManager callback for ``@bookTicker``"""
+        symbol = data.get("symbol")
+        bid, ask = data.get("bid_price", 0.0), data.get("ask_price", 0.0)
+        if symbol and bid > 0 and ask > 0:
+            self._quotes[symbol] = (bid, ask)
+            self.update(symbol, (bid + ask) / 2)
+
+    async def start(self, ws_manager, book_ticker_symbols=()):
+        """Subscribe to the all-market mini ticker (and optional bookTickers)"""
+        # Only the newest price matters
+        ws_manager.set_queue_policy(self.on_mini_ticker, overflow="conflate")
+        ws_manager.set_queue_policy(self.on_book_ticker, overflow="conflate")
+        await ws_manager.subscribe_miniTicker([], self.on_mini_ticker)
+        for symbol in book_ticker_symbols:
+            await ws_manager.subscribe_book_ticker(symbol, self.on_book_ticker)
+
+    # ============== Reads ==============
+
+    def get(self, symbol: str, max_age: float = None) -> Optional[float]:
+        """Cached price, or None when unknown or older than ``max_age`` seconds"""
+        entry = self._prices.get(symbol)
+        if entry is None:
+            return None
+        max_age = self.max_age if max_age is None else max_age
+        if time.monotonic() - entry[1] > max_age:
+            return None
+        return entry[0]
+
+    def quote(self, symbol: str) -> Optional[Tuple[float, float]]:
+        """Best (bid, ask) from bookTicker, if subscribed"""
+        return self._quotes.get(symbol)
+
+    async def get_price(self, symbol: str, max_age: float = None) -> Optional[float]:
+        """Cached price, refreshing the whole book over REST when stale
+        
+        None when no price younger than ``hard_max_age`` is available.
+        """
+        price = self.get(symbol, max_age)
+        if price is None:
+            await self.refresh()
+            # After a refresh, serve what we have even if the stream is quiet, up to the hard limit
+            price = self.get(symbol, max(self.hard_max_age, max_age or 0.0))
+        return price
+
+    async def refresh(self, force: bool = False):
+        """Reload every price with one bulk REST call (at most every few seconds)"""
+        if self.client is None:
+            return
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            if not force and time.monotonic() - self._last_refresh < self.min_refresh_interval:
+                return
+            func = self.client.ticker_prices
+            try:
+                if asyncio.iscoroutinefunction(func):
+                    prices = await func()
+                else:
+                    prices = await asyncio.to_thread(func)
+            except Exception as e:
+                logger.error(f"Price book refresh failed: {e}", module="portfolio")
+                return
+            finally:
+                self._last_refresh = time.monotonic()
+            now = time.monotonic()
+            for symbol, price in prices.items():
+                self.update(symbol, price, now)
+            self.refreshes += 1
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+
+# Singleton instance
+price_book = PriceBook()
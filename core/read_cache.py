@@ -0,0 +1,103 @@
+"""
+Versioned read-through cache for hot Supabase reads
+
+Entries are grouped by table. Every table has a version number; a change
+to the table (our own write, a realtime event) bumps the version, which
+makes every cached entry of that table stale at once. The version is
+captured before a load starts, so a result fetched while an invalidation
+happens is never served as fresh. Entries also expire after ``ttl``
+seconds in case realtime events are missed.
+
+Usable from async code (loaders run in a worker thread) and from the
+synchronous Flask API.
+"""
+
+import asyncio
+import copy
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Entry:
+    __slots__ = ("value", "version", "expires")
+
+    def __init__(self, value: Any, version: int, expires: float):
+        self.value = value
+        self.version = version
+        self.expires = expires
+
+
+class ReadThroughCache:
+    """Per-table versioned cache with TTL fallback"""
+
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, Hashable], _Entry] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def version(self, table: str) -> int:
+        return self._versions.get(table, 0)
+
+    def invalidate(self, table: str, *_):
+        """Mark every entry of ``table`` stale (extra args allow use as a realtime callback)"""
+        with self._lock:
+            self._versions[table] = self._versions.get(table, 0) + 1
+            for key in [k for k in self._entries if k[0] == table]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            for table in list(self._versions):
+                self._versions[table] += 1
+            self._entries.clear()
+
+    def _lookup(self, table: str, key: Hashable) -> Tuple[bool, Any, int]:
+        with self._lock:
+            version = self._versions.get(table, 0)
+            entry = self._entries.get((table, key))
+            if entry is not None and entry.version == version and entry.expires > time.monotonic():
+                self.hits += 1
+                return True, copy.deepcopy(entry.value), version
+            self.misses += 1
+            return False, None, version
+
+    def _store(self, table: str, key: Hashable, value: Any, version: int, ttl: Optional[float]):
+        with self._lock:
+            if self._versions.get(table, 0) != version:
+                return  # invalidated while loading
+            expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+            self._entries[(table, key)] = _Entry(copy.deepcopy(value), version, expires)
+
+    def get(self, table: str, key: Hashable, loader: Callable[[], Any], ttl: float = None) -> Any:
+        """Cached value or ``loader()`` (synchronous)"""
+        hit, value, version = self._lookup(table, key)
+        if hit:
+            return value
+        value = loader()
+        self._store(table, key, value, version, ttl)
+        return value
+
+    async def get_async(self, table: str, key: Hashable, loader: Callable[[], Any], ttl: float = None) -> Any:
+        """Cached value or ``loader()`` run in a worker thread"""
+        hit, value, version = self._lookup(table, key)
+        if hit:
+            return value
+        value = await asyncio.to_thread(loader)
+        self._store(table, key, value, version, ttl)
+        return value
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "versions": dict(self._versions),
+            }
@@ -1,17 +1,21 @@
+import asyncio
+import inspect
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Dict, Optional
 import pandas as pd
-from typing import List, Dict
-from core.indicators import ema, rsi, bbands, atr, adx
+from core.indicator_cache import indicator
 
 def evaluate_symbol(df: pd.DataFrame) -> Dict:
     df = df.copy()
     df = df.tail(250)
-    df["ema20"] = ema(df["close"], 20)
-    df["ema50"] = ema(df["close"], 50)
-    df["rsi"] = rsi(df["close"], 14)
-    up, mid, low, width = bbands(df["close"], 20, 2.0)
+    df["ema20"] = indicator(df, "ema", 20)
+    df["ema50"] = indicator(df, "ema", 50)
+    df["rsi"] = indicator(df, "rsi", 14)
+    up, mid, low, width = indicator(df, "bbands", 20, 2.0)
     df["bb_width"] = width
-    df["atr"] = atr(df, 14)
-    df["adx"] = adx(df, 14)
+    df["atr"] = indicator(df, "atr", 14)
+    df["adx"] = indicator(df, "adx", 14)
 
     slope = (df["ema20"].iloc[-1] - df["ema20"].iloc[-5]) / 5.0
     momentum = df["close"].pct_change(20).iloc[-1]
@@ -47,6 +51,15 @@ def evaluate_symbol(df: pd.DataFrame) -> Dict:
         "recommendations": recommend or ["관망"],
     }
 
+def _evaluate_row(sym: str, df: pd.DataFrame) -> Dict:
+    try:
+        return {"symbol": sym, **evaluate_symbol(df)}
+    except Exception as e:
+        return {"symbol": sym, "error": str(e), "score": -999}
+
+def _rank(rows: List[Dict]) -> pd.DataFrame:
+    return pd.DataFrame(rows).sort_values("score", ascending=False).reset_index(drop=True)
+
 def scan_symbols(fetch_klines_func, symbols: List[str], interval: str = "15m") -> pd.DataFrame:
     rows = []
     for sym in symbols:
@@ -56,5 +69,55 @@ def scan_symbols(fetch_klines_func, symbols: List[str], interval: str = "15m") -
             rows.append({"symbol": sym, **m})
         except Exception as e:
             rows.append({"symbol": sym, "error": str(e), "score": -999})
-    res = pd.DataFrame(rows).sort_values("score", ascending=False).reset_index(drop=True)
-    return res
\ No newline at end of file
+    return _rank(rows)
+
+# ============== Concurrent scan ==============
+
+# 평가용 프로세스 풀 (첫 스캔 때 생성 후 재사용)
+_eval_pool: Optional[ProcessPoolExecutor] = None
+
+def _default_pool() -> ProcessPoolExecutor:
+    global _eval_pool
+    if _eval_pool is None:
+        _eval_pool = ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+    return _eval_pool
+
+async def scan_symbols_concurrent(fetch_klines_func, symbols: List[str], interval: str = "15m",
+                                  max_concurrency: int = 16,
+                                  executor: Optional[Executor] = None) -> pd.DataFrame:
+    """
+    Concurrent version of ``scan_symbols``
+
+    Klines are fetched with at most ``max_concurrency`` requests in flight;
+    request weight is budgeted by the exchange clients' shared limiter.
+    Blocking fetch functions run on a dedicated thread pool sized to
+    ``max_concurrency`` (the loop's default pool is only ``cpu_count + 4``
+    threads); coroutine functions are awaited.
+    Each symbol is evaluated in ``executor`` (a shared process pool by
+    default) as soon as its klines arrive, so fetching and scoring overlap.
+
+    Returns the same ranked DataFrame as ``scan_symbols``.
+    """
+    loop = asyncio.get_running_loop()
+    pool = executor or _default_pool()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    is_async = inspect.iscoroutinefunction(fetch_klines_func)
+    fetch_pool = None if is_async else ThreadPoolExecutor(max_concurrency, thread_name_prefix="scan")
+
+    async def scan_one(sym: str) -> Dict:
+        try:
+            async with semaphore:
+                if is_async:
+                    df = await fetch_klines_func(sym, interval)
+                else:
+                    df = await loop.run_in_executor(fetch_pool, fetch_klines_func, sym, interval)
+            return await loop.run_in_executor(pool, _evaluate_row, sym, df)
+        except Exception as e:
+            return {"symbol": sym, "error": str(e), "score": -999}
+
+    try:
+        rows = await asyncio.gather(*(scan_one(sym) for sym in symbols))
+    finally:
+        if fetch_pool is not None:
+            fetch_pool.shutdown(wait=False)
+    return _rank(list(rows))
@@ -0,0 +1,250 @@
+"""
+Streaming (incremental) counterparts of core/indicators.py
+
+Each class keeps just enough state to fold in one new bar in O(1) and
+returns the same value the batch function would produce for the last row
+of the full series.
+"""
+
+import math
+from collections import deque
+from typing import Iterable, Optional, Tuple
+
+import pandas as pd
+
+NAN = float("nan")
+
+
+class _RollingWindow:
+    """Fixed-size window with O(1) sum / sum of squares.
+
+    NaN inputs are counted rather than summed so the window reports NaN
+    until it is full of valid values (pandas min_periods=window semantics).
+    Sums are rebuilt from the window once per full cycle to stop float drift.
+    """
+
+    def __init__(self, size: int):
+        if size < 1:
+            raise ValueError("window size must be >= 1")
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.nan_count = 0
+        self._since_rebuild = 0
+
+    def push(self, x: float):
+        if len(self.values) == self.size:
+            old = self.values[0]
+            if math.isnan(old):
+                self.nan_count -= 1
+            else:
+                self.total -= old
+                self.total_sq -= old * old
+        self.values.append(x)
+        if math.isnan(x):
+            self.nan_count += 1
+        else:
+            self.total += x
+            self.total_sq += x * x
+
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.size:
+            self._rebuild()
+
+    def _rebuild(self):
+        valid = [v for v in self.values if not math.isnan(v)]
+        self.total = math.fsum(valid)
+        self.total_sq = math.fsum(v * v for v in valid)
+        self._since_rebuild = 0
+
+    @property
+    def ready(self) -> bool:
+        return len(self.values) == self.size and self.nan_count == 0
+
+    def sum(self) -> float:
+        return self.total if self.ready else NAN
+
+    def mean(self) -> float:
+        return self.total / self.size if self.ready else NAN
+
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1), like Series.rolling().std()"""
+        if not self.ready or self.size < 2:
+            return NAN
+        mean = self.total / self.size
+        var = (self.total_sq - self.size * mean * mean) / (self.size - 1)
+        return math.sqrt(var) if var > 0 else 0.0
+
+
+class _EWMean:
+    """Recursive EWM mean matching ``ewm(alpha=..., adjust=False)``"""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.value = NAN
+        self._skipped = 0
+
+    def push(self, x: float) -> float:
+        if math.isnan(x):
+            self._skipped += 1
+            return self.value
+        if math.isnan(self.value):
+            self.value = x
+        else:
+            # pandas (ignore_na=False) keeps decaying the old mean across gaps
+            old_w = (1.0 - self.alpha) ** (self._skipped + 1)
+            self.value = (old_w * self.value + self.alpha * x) / (old_w + self.alpha)
+        self._skipped = 0
+        return self.value
+
+
+def _true_range(high: float, low: float, prev_close: float) -> float:
+    if math.isnan(prev_close):
+        return high - low
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+class StreamingSMA:
+    """Incremental equivalent of ``sma(series, window)``"""
+
+    def __init__(self, window: int):
+        self._win = _RollingWindow(window)
+        self.value = NAN
+
+    def update(self, close: float) -> float:
+        self._win.push(float(close))
+        self.value = self._win.mean()
+        return self.value
+
+
+class StreamingEMA:
+    """Incremental equivalent of ``ema(series, span)``"""
+
+    def __init__(self, span: int):
+        self._ewm = _EWMean(2.0 / (span + 1.0))
+        self.value = NAN
+
+    def update(self, close: float) -> float:
+        self.value = self._ewm.push(float(close))
+        return self.value
+
+
+class StreamingRSI:
+    """Incremental equivalent of ``rsi(series, period)``"""
+
+    def __init__(self, period: int = 14):
+        alpha = 1.0 / period  # com = period - 1
+        self._up = _EWMean(alpha)
+        self._down = _EWMean(alpha)
+        self._prev_close = NAN
+        self.value = NAN
+
+    def update(self, close: float) -> float:
+        close = float(close)
+        delta = close - self._prev_close
+        self._prev_close = close
+        ma_up = self._up.push(max(delta, 0.0) if not math.isnan(delta) else NAN)
+        ma_down = self._down.push(-min(delta, 0.0) if not math.isnan(delta) else NAN)
+        if math.isnan(ma_up) or math.isnan(ma_down):
+            self.value = NAN
+        elif ma_up == 0 and ma_down == 0:
+            self.value = 50.0
+        else:
+            rs = ma_up / (ma_down + 1e-12)
+            self.value = 100 - (100 / (1 + rs))
+        return self.value
+
+
+class StreamingBBands:
+    """Incremental equivalent of ``bbands(series, window, num_std)``
+
+    ``update`` returns ``(upper, mid, lower, width)`` like the batch function.
+    """
+
+    def __init__(self, window: int = 20, num_std: float = 2.0):
+        self.num_std = num_std
+        self._win = _RollingWindow(window)
+        self.value: Tuple[float, float, float, float] = (NAN, NAN, NAN, NAN)
+
+    def update(self, close: float) -> Tuple[float, float, float, float]:
+        self._win.push(float(close))
+        mid = self._win.mean()
+        sd = self._win.std()
+        upper = mid + self.num_std * sd
+        lower = mid - self.num_std * sd
+        width = (upper - lower) / mid if mid else NAN
+        self.value = (upper, mid, lower, width)
+        return self.value
+
+
+class StreamingATR:
+    """Incremental equivalent of ``atr(df, period)``"""
+
+    def __init__(self, period: int = 14):
+        self._win = _RollingWindow(period)
+        self._prev_close = NAN
+        self.value = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        tr = _true_range(float(high), float(low), self._prev_close)
+        self._prev_close = float(close)
+        self._win.push(tr)
+        self.value = self._win.mean()
+        return self.value
+
+
+class StreamingADX:
+    """Incremental equivalent of ``adx(df, period)``"""
+
+    def __init__(self, period: int = 14):
+        self._tr = _RollingWindow(period)
+        self._plus_dm = _RollingWindow(period)
+        self._minus_dm = _RollingWindow(period)
+        self._dx = _RollingWindow(period)
+        self._prev_high = NAN
+        self._prev_low = NAN
+        self._prev_close = NAN
+        self.value = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        high, low, close = float(high), float(low), float(close)
+        up_move = high - self._prev_high
+        down_move = low - self._prev_low
+        plus_dm = up_move if up_move > 0 else 0.0
+        minus_dm = -down_move if down_move < 0 else 0.0
+        tr = _true_range(high, low, self._prev_close)
+        self._prev_high, self._prev_low, self._prev_close = high, low, close
+
+        self._tr.push(tr)
+        self._plus_dm.push(plus_dm)
+        self._minus_dm.push(minus_dm)
+
+        tr_smooth = self._tr.sum()
+        if math.isnan(tr_smooth) or tr_smooth == 0:
+            dx = NAN
+        else:
+            plus_di = 100 * self._plus_dm.sum() / tr_smooth
+            minus_di = 100 * self._minus_dm.sum() / tr_smooth
+            di_sum = plus_di + minus_di
+            dx = abs(plus_di - minus_di) / di_sum * 100 if di_sum != 0 else NAN
+
+        self._dx.push(dx)
+        self.value = self._dx.mean()
+        return self.value
+
+
+def warm_up(indicator, df: pd.DataFrame, column: Optional[str] = "close"):
+    """Feed historical bars into a streaming indicator.
+
+    Close-based indicators take ``column``; ATR/ADX take high/low/close.
+    Returns the indicator's value after the last bar.
+    """
+    if isinstance(indicator, (StreamingATR, StreamingADX)):
+        rows: Iterable = zip(df["high"].tolist(), df["low"].tolist(), df["close"].tolist())
+        for h, l, c in rows:
+            indicator.update(h, l, c)
+    else:
+        for x in df[column].tolist():
+            indicator.update(x)
+    return indicator.value
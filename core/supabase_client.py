@@ -3,6 +3,7 @@ Supabase client integration for database operations
 """
 
 import os
+import uuid
 import asyncio
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
@@ -11,7 +12,42 @@ import json
 from supabase import create_client, Client
 from supabase.client import ClientOptions
 import pandas as pd
+import numpy as np
 from utils.logger import logger
+from core.db_writer import SupabaseWriteQueue
+from core.read_cache import ReadThroughCache
+
+# market_data bulk I/O
+MARKET_DATA_CHUNK_ROWS = 1000
+MAX_REQUEST_BYTES = 1_000_000
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+MARKET_DATA_COLUMNS = ("open_time",) + PRICE_COLUMNS
+
+
+def _iso(ts) -> str:
+    """ISO timestamp for datetimes, strings or epoch milliseconds"""
+    if isinstance(ts, (int, float, np.integer)):
+        return pd.Timestamp(int(ts), unit="ms").isoformat()
+    return pd.Timestamp(ts).isoformat()
+
+
+def market_data_records(symbol: str, timeframe: str, data: pd.DataFrame) -> List[Dict]:
+    """market_data rows built column-wise (no iterrows)
+    
+    Open times come from a DatetimeIndex, or from an ``open_time`` column in
+    epoch ms (the klines / OHLCVStore frame layout).
+    """
+    if "open_time" in data.columns:
+        times = pd.to_datetime(data["open_time"].to_numpy(), unit="ms")
+    else:
+        times = pd.DatetimeIndex(data.index)
+    open_times = np.datetime_as_string(times.values.astype("datetime64[s]")).tolist()
+    columns = [data[c].to_numpy(dtype=np.float64).tolist() for c in PRICE_COLUMNS]
+    return [
+        {"symbol": symbol, "timeframe": timeframe, "open_time": t,
+         "open": o, "high": h, "low": l, "close": c, "volume": v}
+        for t, o, h, l, c, v in zip(open_times, *columns)
+    ]
 
 class SupabaseManager:
     """Manage all Supabase database operations"""
@@ -34,28 +70,70 @@ class SupabaseManager:
         # Track if we're in testnet mode
         from config import cfg
         self.is_testnet = cfg.binance_testnet
+        
+        # Hot reads are cached per table and invalidated on writes / realtime events
+        self.cache = ReadThroughCache(ttl=cfg.supabase_cache_ttl)
+        self._cache_subscriptions = None
+        
+        # Hot paths only enqueue; see core/db_writer.py. Queued writes invalidate the
+        # cache once they reach the database, not when queued: a read in between would
+        # otherwise cache the old rows as fresh
+        self.writer = SupabaseWriteQueue(self.client, on_write=self.cache.invalidate) \
+            if cfg.supabase_write_behind else None
+    
+    # ============== Writes ==============
+    
+    async def _insert(self, table: str, row: Dict):
+        if self.writer is not None:
+            self.writer.insert(table, row)
+        else:
+            await asyncio.to_thread(self.client.table(table).insert(row).execute)
+            self.cache.invalidate(table)
+    
+    async def _upsert(self, table: str, row: Dict, on_conflict: str):
+        if self.writer is not None:
+            self.writer.upsert(table, row, on_conflict)
+        else:
+            await asyncio.to_thread(self.client.table(table).upsert(row, on_conflict=on_conflict).execute)
+            self.cache.invalidate(table)
+    
+    async def _update(self, table: str, column: str, value: Any, updates: Dict):
+        if self.writer is not None:
+            self.writer.update(table, column, value, updates)
+        else:
+            await asyncio.to_thread(self.client.table(table).update(updates).eq(column, value).execute)
+            self.cache.invalidate(table)
+    
+    async def flush(self):
+        """Write all queued changes now (e.g. before shutdown)"""
+        if self.writer is not None:
+            await self.writer.close()
     
     # ============== Strategy Management ==============
     
-    async def get_active_strategies(self) -> List[Dict]:
-        """Get all active trading strategies"""
+    def _load_active_strategies(self, columns: str) -> List[Dict]:
+        return self.client.table("strategies")\
+            .select(columns)\
+            .eq("status", "ACTIVE")\
+            .execute().data
+    
+    async def get_active_strategies(self, columns: str = "*") -> List[Dict]:
+        """Get all active trading strategies (cached)"""
         try:
-            response = self.client.table("strategies")\
-                .select("*")\
-                .eq("status", "ACTIVE")\
-                .execute()
-            return response.data
+            return await self.cache.get_async("strategies", ("active", columns),
+                                              lambda: self._load_active_strategies(columns))
         except Exception as e:
             logger.error(f"Failed to get active strategies: {e}", module="supabase")
             return []
     
+    def get_active_strategies_sync(self, columns: str = "*") -> List[Dict]:
+        """Blocking variant of get_active_strategies for the Flask API (same cache)"""
+        return self.cache.get("strategies", ("active", columns), lambda: self._load_active_strategies(columns))
+    
     async def update_strategy(self, strategy_id: str, updates: Dict) -> bool:
         """Update strategy configuration"""
         try:
-            response = self.client.table("strategies")\
-                .update(updates)\
-                .eq("id", strategy_id)\
-                .execute()
+            await self._update("strategies", "id", strategy_id, updates)
             logger.info(f"Strategy {strategy_id} updated", module="supabase", updates=updates)
             return True
         except Exception as e:
@@ -70,14 +148,13 @@ class SupabaseManager:
             # Convert Decimal to float for JSON serialization
             position_data = self._convert_decimals(position_data)
             
-            # Add testnet flag
+            # Add testnet flag; the id is assigned here so the row can be referenced before it is written
             position_data["is_testnet"] = self.is_testnet
+            position_data.setdefault("id", str(uuid.uuid4()))
             
-            response = self.client.table("positions")\
-                .insert(position_data)\
-                .execute()
+            await self._insert("positions", position_data)
             
-            position_id = response.data[0]["id"]
+            position_id = position_data["id"]
             logger.log_position("OPENED", position_data)
             logger.info(f"Position created: {position_id}", module="supabase", position=position_data)
             return position_id
@@ -85,18 +162,21 @@ class SupabaseManager:
             logger.error(f"Failed to create position: {e}", module="supabase")
             return None
     
-    async def get_open_positions(self, symbol: str = None) -> List[Dict]:
-        """Get all open positions, optionally filtered by symbol"""
-        try:
+    async def get_open_positions(self, symbol: str = None,
+                                 columns: str = "*, strategies(name, type)") -> List[Dict]:
+        """Get all open positions, optionally filtered by symbol (cached)"""
+        def load():
             query = self.client.table("positions")\
-                .select("*, strategies(name, type)")\
+                .select(columns)\
                 .eq("status", "OPEN")
             
             if symbol:
                 query = query.eq("symbol", symbol)
             
-            response = query.execute()
-            return response.data
+            return query.execute().data
+        
+        try:
+            return await self.cache.get_async("positions", ("open", symbol, columns), load)
         except Exception as e:
             logger.error(f"Failed to get open positions: {e}", module="supabase")
             return []
@@ -106,10 +186,7 @@ class SupabaseManager:
         try:
             updates = self._convert_decimals(updates)
             
-            response = self.client.table("positions")\
-                .update(updates)\
-                .eq("id", position_id)\
-                .execute()
+            await self._update("positions", "id", position_id, updates)
             
             logger.log_position("UPDATED", updates)
             return True
@@ -118,8 +195,12 @@ class SupabaseManager:
             return False
     
     async def close_position(self, position_id: str, exit_price: float, 
-                           exit_quantity: float, pnl: float) -> bool:
-        """Close a position with exit details"""
+                           exit_quantity: float, pnl: float,
+                           entry_price: float = None, entry_quantity: float = None) -> bool:
+        """Close a position with exit details
+        
+        Pass entry_price/entry_quantity when known to skip reading the position back.
+        """
         try:
             updates = {
                 "status": "CLOSED",
@@ -131,9 +212,12 @@ class SupabaseManager:
             }
             
             # Get position to calculate PnL percentage
-            position = await self.get_position(position_id)
-            if position:
-                entry_value = float(position["entry_price"]) * float(position["entry_quantity"])
+            if entry_price is None or entry_quantity is None:
+                position = await self.get_position(position_id)
+                if position:
+                    entry_price, entry_quantity = position["entry_price"], position["entry_quantity"]
+            if entry_price is not None and entry_quantity is not None:
+                entry_value = float(entry_price) * float(entry_quantity)
                 if entry_value > 0:
                     updates["pnl_percent"] = (pnl / entry_value) * 100
             
@@ -170,12 +254,11 @@ class SupabaseManager:
             
             # Add testnet flag
             trade_data["is_testnet"] = self.is_testnet
+            trade_data.setdefault("id", str(uuid.uuid4()))
             
-            response = self.client.table("trades")\
-                .insert(trade_data)\
-                .execute()
+            await self._insert("trades", trade_data)
             
-            trade_id = response.data[0]["id"]
+            trade_id = trade_data["id"]
             
             logger.log_trade(
                 action="EXECUTED",
@@ -220,9 +303,7 @@ class SupabaseManager:
             metrics["is_testnet"] = self.is_testnet
             
             # Try to update existing record, or insert new one
-            response = self.client.table("performance")\
-                .upsert(metrics, on_conflict="strategy_id,date")\
-                .execute()
+            await self._upsert("performance", metrics, "strategy_id,date")
             
             logger.log_performance(metrics)
             return True
@@ -232,22 +313,25 @@ class SupabaseManager:
     
     async def get_performance_history(self, strategy_id: str = None, 
                                      days: int = 30) -> pd.DataFrame:
-        """Get performance history as DataFrame"""
+        """Get performance history as DataFrame (cached)"""
         try:
             start_date = (datetime.utcnow() - timedelta(days=days)).date().isoformat()
             
-            query = self.client.table("performance")\
-                .select("*, strategies(name)")\
-                .gte("date", start_date)\
-                .order("date", desc=True)
-            
-            if strategy_id:
-                query = query.eq("strategy_id", strategy_id)
-            
-            response = query.execute()
-            
-            if response.data:
-                df = pd.DataFrame(response.data)
+            def load():
+                query = self.client.table("performance")\
+                    .select("*, strategies(name)")\
+                    .gte("date", start_date)\
+                    .order("date", desc=True)
+                
+                if strategy_id:
+                    query = query.eq("strategy_id", strategy_id)
+                
+                return query.execute().data
+            
+            rows = await self.cache.get_async("performance", ("history", strategy_id, start_date), load)
+            
+            if rows:
+                df = pd.DataFrame(rows)
                 df['date'] = pd.to_datetime(df['date'])
                 df.set_index('date', inplace=True)
                 return df
@@ -257,36 +341,72 @@ class SupabaseManager:
             logger.error(f"Failed to get performance history: {e}", module="supabase")
             return pd.DataFrame()
     
+    async def get_latest_performance(self, columns: str = "*", days: int = 7) -> Dict[str, Dict]:
+        """Most recent performance row per strategy, in one (cached) query"""
+        start_date = (datetime.utcnow() - timedelta(days=days)).date().isoformat()
+        select = columns if columns == "*" else ",".join(sorted({"strategy_id", "date", *columns.split(",")}))
+        
+        def load():
+            rows = self.client.table("performance")\
+                .select(select)\
+                .gte("date", start_date)\
+                .order("date", desc=True)\
+                .execute().data
+            latest = {}
+            for row in rows:
+                latest.setdefault(row["strategy_id"], row)
+            return latest
+        
+        try:
+            return await self.cache.get_async("performance", ("latest", select, start_date), load)
+        except Exception as e:
+            logger.error(f"Failed to get latest performance: {e}", module="supabase")
+            return {}
+    
     # ============== Market Data ==============
     
-    async def save_market_data(self, symbol: str, timeframe: str, data: pd.DataFrame):
-        """Save market data to database"""
+    async def save_market_data(self, symbol: str, timeframe: str, data: pd.DataFrame,
+                               chunk_size: int = MARKET_DATA_CHUNK_ROWS, max_concurrency: int = 4):
+        """Save market data to database (DatetimeIndex or ms open_time column)"""
         try:
-            records = []
-            for idx, row in data.iterrows():
-                record = {
-                    "symbol": symbol,
-                    "timeframe": timeframe,
-                    "open_time": idx.isoformat() if isinstance(idx, pd.Timestamp) else idx,
-                    "open": float(row["open"]),
-                    "high": float(row["high"]),
-                    "low": float(row["low"]),
-                    "close": float(row["close"]),
-                    "volume": float(row["volume"])
-                }
-                records.append(record)
-            
-            # Batch insert with upsert to handle duplicates
-            response = self.client.table("market_data")\
-                .upsert(records, on_conflict="symbol,timeframe,open_time")\
-                .execute()
-            
-            logger.debug(f"Saved {len(records)} market data records for {symbol}", module="supabase")
-            return True
+            records = market_data_records(symbol, timeframe, data)
+            return await self.upsert_market_data(records, chunk_size, max_concurrency)
         except Exception as e:
             logger.error(f"Failed to save market data: {e}", module="supabase")
             return False
     
+    async def upsert_market_data(self, records: List[Dict], chunk_size: int = MARKET_DATA_CHUNK_ROWS,
+                                 max_concurrency: int = 4) -> bool:
+        """Upsert prepared market_data rows (any mix of symbols)
+        
+        Large inputs are split into request-size-bounded chunks that are sent
+        concurrently, each in a worker thread.
+        """
+        if not records:
+            return True
+        row_bytes = max(1, len(json.dumps(records[0])))
+        rows = max(1, min(chunk_size, MAX_REQUEST_BYTES // row_bytes))
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def send(chunk: List[Dict]) -> bool:
+            async with semaphore:
+                try:
+                    # Batch insert with upsert to handle duplicates; run off the event loop
+                    query = self.client.table("market_data")\
+                        .upsert(chunk, on_conflict="symbol,timeframe,open_time")
+                    await asyncio.to_thread(query.execute)
+                    return True
+                except Exception as e:
+                    logger.error(f"Failed to save market data: {e}", module="supabase")
+                    return False
+        
+        chunks = [records[i:i + rows] for i in range(0, len(records), rows)]
+        results = await asyncio.gather(*(send(chunk) for chunk in chunks))
+        saved = sum(len(chunk) for chunk, ok in zip(chunks, results) if ok)
+        logger.debug(f"Saved {saved}/{len(records)} market data records in {len(chunks)} requests",
+                     module="supabase")
+        return all(results)
+    
     async def get_market_data(self, symbol: str, timeframe: str, 
                              limit: int = 100) -> pd.DataFrame:
         """Get market data from database"""
@@ -311,6 +431,50 @@ class SupabaseManager:
             logger.error(f"Failed to get market data: {e}", module="supabase")
             return pd.DataFrame()
     
+    async def get_market_data_range(self, symbol: str, timeframe: str, start=None, end=None,
+                                    columns: List[str] = MARKET_DATA_COLUMNS,
+                                    page_size: int = 1000) -> pd.DataFrame:
+        """Get market data in [start, end] (open_time, inclusive) of any length
+        
+        Pages with keyset pagination on open_time (``open_time > last``), so
+        each request is an index range scan no matter how deep the range is.
+        start/end accept datetimes, ISO strings or epoch milliseconds.
+        """
+        try:
+            columns = list(columns)
+            select = ",".join(columns if "open_time" in columns else ["open_time"] + columns)
+            data: Dict[str, List] = {}
+            last = None
+            while True:
+                query = self.client.table("market_data")\
+                    .select(select)\
+                    .eq("symbol", symbol)\
+                    .eq("timeframe", timeframe)
+                if last is not None:
+                    query = query.gt("open_time", last)
+                elif start is not None:
+                    query = query.gte("open_time", _iso(start))
+                if end is not None:
+                    query = query.lte("open_time", _iso(end))
+                query = query.order("open_time").limit(page_size)
+                page = (await asyncio.to_thread(query.execute)).data or []
+                for row in page:
+                    for key, value in row.items():
+                        data.setdefault(key, []).append(value)
+                if len(page) < page_size:
+                    break
+                last = page[-1]["open_time"]
+            
+            if not data:
+                return pd.DataFrame(columns=[c for c in columns if c != "open_time"])
+            index = pd.DatetimeIndex(pd.to_datetime(data.pop("open_time")), name="open_time")
+            df = pd.DataFrame({k: np.asarray(v, dtype=float) if k in PRICE_COLUMNS else v
+                               for k, v in data.items()}, index=index)
+            return df
+        except Exception as e:
+            logger.error(f"Failed to get market data range: {e}", module="supabase")
+            return pd.DataFrame()
+    
     # ============== Balance Tracking ==============
     
     async def save_balance_snapshot(self, balance_data: Dict):
@@ -321,9 +485,7 @@ class SupabaseManager:
             # Add testnet flag
             balance_data["is_testnet"] = self.is_testnet
             
-            response = self.client.table("balance_snapshots")\
-                .insert(balance_data)\
-                .execute()
+            await self._insert("balance_snapshots", balance_data)
             
             logger.info("Balance snapshot saved", module="supabase", balance=balance_data)
             return True
@@ -367,11 +529,9 @@ class SupabaseManager:
                 "metadata": metadata or {}
             }
             
-            response = self.client.table("alerts")\
-                .insert(alert_data)\
-                .execute()
+            await self._insert("alerts", alert_data)
             
-            logger.log_alert(alert_type, title, message, severity, metadata)
+            logger.log_alert(alert_type, title, message, severity, metadata, save=False)
             return True
         except Exception as e:
             logger.error(f"Failed to create alert: {e}", module="supabase")
@@ -394,10 +554,13 @@ class SupabaseManager:
     async def mark_alerts_read(self, alert_ids: List[str]):
         """Mark alerts as read"""
         try:
-            response = self.client.table("alerts")\
-                .update({"is_read": True})\
-                .in_("id", alert_ids)\
-                .execute()
+            if self.writer is not None:
+                # Identical updates are sent as one in_() request by the write queue
+                for alert_id in alert_ids:
+                    self.writer.update("alerts", "id", alert_id, {"is_read": True})
+            else:
+                await asyncio.to_thread(
+                    self.client.table("alerts").update({"is_read": True}).in_("id", alert_ids).execute)
             
             return True
         except Exception as e:
@@ -433,6 +596,31 @@ class SupabaseManager:
             logger.error(f"Failed to subscribe to alerts: {e}", module="supabase")
             return None
     
+    def _subscribe_changes(self, table: str, callback):
+        """Subscribe to all changes of a table in realtime"""
+        try:
+            return self.client.table(table)\
+                .on("*", callback)\
+                .subscribe()
+        except Exception as e:
+            logger.error(f"Failed to subscribe to {table}: {e}", module="supabase")
+            return None
+    
+    def watch_cache_invalidation(self) -> bool:
+        """Drop cached strategies/positions/performance on realtime changes
+        
+        Returns False when realtime is unavailable; entries then expire by TTL.
+        """
+        if self._cache_subscriptions is not None:
+            return all(sub is not None for sub in self._cache_subscriptions)
+        self._cache_subscriptions = subscriptions = [self.subscribe_to_positions(lambda payload: self.cache.invalidate("positions"))]
+        for table in ("strategies", "performance"):
+            subscriptions.append(self._subscribe_changes(table, lambda payload, t=table: self.cache.invalidate(t)))
+        ok = all(sub is not None for sub in subscriptions)
+        if not ok:
+            logger.warning(f"Realtime cache invalidation unavailable; using {self.cache.ttl}s TTL", module="supabase")
+        return ok
+    
     # ============== Utility Methods ==============
     
     def _convert_decimals(self, data: Any) -> Any:
@@ -1,7 +1,9 @@
 import asyncio, time
 from typing import Callable, Dict
 import pandas as pd
-from core.indicators import atr
+from core.indicator_cache import indicator
+from core.ohlcv_store import INTERVAL_MS
+from core.streaming_indicators import StreamingATR, warm_up
 from strategies import sma_crossover, rsi_reversion, bb_breakout
 
 STRATEGIES = {
@@ -10,6 +12,33 @@ STRATEGIES = {
     "bb_breakout": bb_breakout.signal,
 }
 
+async def _call(func: Callable, *args):
+    """Await coroutine functions, run blocking ones in a thread"""
+    if asyncio.iscoroutinefunction(func):
+        return await func(*args)
+    return await asyncio.to_thread(func, *args)
+
+async def _pause(seconds: float, stop_event: asyncio.Event = None):
+    """sleep, 단 stop_event 가 set 되면 즉시 깨어남"""
+    if stop_event is None:
+        await asyncio.sleep(seconds)
+        return
+    try:
+        await asyncio.wait_for(stop_event.wait(), seconds)
+    except asyncio.TimeoutError:
+        pass
+
+async def _slippage_ok(estimate_slippage: Callable, symbol: str, trade_usdt: float,
+                       max_slippage: float, send_log: Callable) -> bool:
+    """호가창 기준 예상 슬리피지가 한도 이내인지 (추정 불가 시 통과)"""
+    if estimate_slippage is None:
+        return True
+    slippage = await _call(estimate_slippage, symbol, "BUY", trade_usdt)
+    if slippage is not None and slippage > max_slippage:
+        await send_log(f"예상 슬리피지 {slippage:.3%} > 한도 {max_slippage:.3%} → 매수 보류")
+        return False
+    return True
+
 async def run_auto_loop(
     fetch_klines: Callable,
     buy_market_quote: Callable,
@@ -21,6 +50,9 @@ async def run_auto_loop(
     sl_atr: float,
     get_auto_flag: Callable,
     send_log: Callable,
+    estimate_slippage: Callable = None,
+    max_slippage: float = 0.002,
+    stop_event: asyncio.Event = None,
 ):
     await send_log(f"자동매매 루프 시작: {symbol} ({interval}), {trade_usdt} USDT/트레이드")
     position_qty = 0.0
@@ -28,19 +60,22 @@ async def run_auto_loop(
 
     while get_auto_flag():
         try:
-            df = fetch_klines(symbol, interval)
+            df = await _call(fetch_klines, symbol, interval)
             df = df.tail(200)
             # 기본 전략: SMA 크로스 + RSI 보조
             sig1 = STRATEGIES["sma_crossover"](df, 20, 50)
             sig2 = STRATEGIES["rsi_reversion"](df, 30, 70, 14)
 
             price = float(df["close"].iloc[-1])
-            _atr = float(atr(df, 14).iloc[-1])
+            _atr = float(indicator(df, "atr", 14).iloc[-1])
 
             if position_qty == 0.0:
                 if sig1["buy"] or (sig2["buy"] and sig1["trend_up"]):
                     await send_log(f"매수 시그널 발생 @ {price:.2f}  (ATR={_atr:.2f})")
-                    resp = buy_market_quote(symbol, trade_usdt)
+                    if not await _slippage_ok(estimate_slippage, symbol, trade_usdt, max_slippage, send_log):
+                        await _pause(5, stop_event)
+                        continue
+                    resp = await _call(buy_market_quote, symbol, trade_usdt)
                     entry_price = price
                     # 대략 수량 추정
                     position_qty = trade_usdt / price
@@ -50,17 +85,159 @@ async def run_auto_loop(
                 sl = entry_price - sl_atr * _atr
                 if price >= tp:
                     await send_log(f"TP 도달({tp:.2f}) → 전량 매도")
-                    sell_market_qty(symbol, position_qty)
+                    await _call(sell_market_qty, symbol, position_qty)
                     position_qty = 0.0
                     entry_price = None
                 elif price <= sl or sig1["sell"]:
                     await send_log(f"손절/크로스 다운 ({sl:.2f}) → 전량 매도")
-                    sell_market_qty(symbol, position_qty)
+                    await _call(sell_market_qty, symbol, position_qty)
                     position_qty = 0.0
                     entry_price = None
 
         except Exception as e:
             await send_log(f"에러: {e}")
 
-        await asyncio.sleep(5)
-    await send_log("자동매매 루프 종료")
\ No newline at end of file
+        await _pause(5, stop_event)
+    await send_log("자동매매 루프 종료")
+
+async def run_auto_loop_ws(
+    ws_manager,
+    fetch_klines: Callable,
+    buy_market_quote: Callable,
+    sell_market_qty: Callable,
+    symbol: str,
+    interval: str,
+    trade_usdt: float,
+    tp_atr: float,
+    sl_atr: float,
+    get_auto_flag: Callable,
+    send_log: Callable,
+    buffer_size: int = 300,
+    estimate_slippage: Callable = None,
+    max_slippage: float = 0.002,
+    bars=None,
+    stop_event: asyncio.Event = None,
+):
+    """
+    Event-driven version of ``run_auto_loop``
+
+    The kline buffer is seeded once over REST and then extended from the
+    ``@kline`` stream; signals are evaluated only when a candle closes.
+    TP/SL levels are fixed on each close and checked on every ``@trade``
+    and ``@bookTicker`` tick instead of every 5 seconds. When ``bars`` (a
+    ``core.bar_aggregator.BarAggregator``) aggregates ``interval``, candles
+    come from its shared 1m feed instead of a separate kline stream.
+    Setting ``stop_event`` ends the loop without waiting for the next
+    ``get_auto_flag`` check.
+    """
+    await send_log(f"자동매매 루프 시작(WebSocket): {symbol} ({interval}), {trade_usdt} USDT/트레이드")
+
+    # 마감된 봉만 버퍼에 보관 (진행 중인 봉 제외)
+    df = await _call(fetch_klines, symbol, interval)
+    step = INTERVAL_MS[interval]
+    df = df[df["open_time"] + step <= int(time.time() * 1000)]
+    buffer = df[["open_time", "open", "high", "low", "close", "volume"]].tail(buffer_size).reset_index(drop=True)
+    buffer.attrs.update(symbol=symbol, interval=interval)
+
+    atr14 = StreamingATR(14)
+    warm_up(atr14, buffer)
+
+    state = {"qty": 0.0, "entry": None, "tp": None, "sl": None, "buffer": buffer}
+    order_lock = asyncio.Lock()
+
+    async def exit_position(reason: str):
+        await send_log(reason)
+        try:
+            await _call(sell_market_qty, symbol, state["qty"])
+        except Exception as e:
+            # 매도 실패 시 포지션/TP/SL 유지 → 다음 틱이나 봉 마감에서 다시 시도
+            await send_log(f"매도 실패, 포지션 유지: {e}")
+            return
+        state.update(qty=0.0, entry=None, tp=None, sl=None)
+
+    async def on_kline(data: Dict):
+        if not data.get("is_closed"):
+            return
+        buf = state["buffer"]
+        if len(buf) and data["open_time"] <= int(buf["open_time"].iloc[-1]):
+            return  # 재연결 시 중복 수신
+        row = pd.DataFrame([{k: data[k] for k in ("open_time", "open", "high", "low", "close", "volume")}])
+        buf = pd.concat([buf, row], ignore_index=True).tail(buffer_size).reset_index(drop=True)
+        buf.attrs.update(symbol=symbol, interval=interval)
+        state["buffer"] = buf
+        _atr = atr14.update(data["high"], data["low"], data["close"])
+
+        sig1 = STRATEGIES["sma_crossover"](buf, 20, 50)
+        sig2 = STRATEGIES["rsi_reversion"](buf, 30, 70, 14)
+        price = data["close"]
+
+        async with order_lock:
+            try:
+                if state["qty"] == 0.0:
+                    if sig1["buy"] or (sig2["buy"] and sig1["trend_up"]):
+                        await send_log(f"매수 시그널 발생 @ {price:.2f}  (ATR={_atr:.2f})")
+                        if not await _slippage_ok(estimate_slippage, symbol, trade_usdt, max_slippage, send_log):
+                            return
+                        await _call(buy_market_quote, symbol, trade_usdt)
+                        state.update(qty=trade_usdt / price, entry=price)
+                        await send_log(f"시장가 매수 실행: ~{state['qty']:.6f} {symbol[:-4]}")
+                elif sig1["sell"]:
+                    await exit_position(f"크로스 다운 @ {price:.2f} → 전량 매도")
+
+                if state["qty"] > 0.0:
+                    # 봉 마감 시점의 ATR로 TP/SL 갱신
+                    state["tp"] = state["entry"] + tp_atr * _atr
+                    state["sl"] = state["entry"] - sl_atr * _atr
+            except Exception as e:
+                await send_log(f"에러: {e}")
+
+    async def on_tick(data: Dict):
+        if state["qty"] == 0.0 or state["tp"] is None:
+            return
+        # bookTicker는 매도 가능한 최우선 매수호가 기준
+        price = data.get("bid_price") or data.get("price")
+        if not price:
+            return
+        if price < state["tp"] and price > state["sl"]:
+            return
+        async with order_lock:
+            if state["qty"] == 0.0:
+                return
+            try:
+                if price >= state["tp"]:
+                    await exit_position(f"TP 도달({state['tp']:.2f}) → 전량 매도")
+                elif price <= state["sl"]:
+                    await exit_position(f"손절 ({state['sl']:.2f}) → 전량 매도")
+            except Exception as e:
+                await send_log(f"에러: {e}")
+
+    kline_stream = f"{symbol.lower()}@kline_{interval}"
+    trade_stream = f"{symbol.lower()}@trade"
+    book_stream = f"{symbol.lower()}@bookTicker"
+    # 체결/호가 틱은 최신 값만 필요, 마감 봉은 절대 버리지 않음
+    ws_manager.set_queue_policy(on_tick, overflow="conflate")
+    use_bars = bars is not None and interval in bars.intervals
+    if use_bars:
+        # 집계기가 중간부터 시작하면 첫 봉이 불완전 → 과거 봉과 현재 구간의 1m 봉으로 채움
+        bars.seed(symbol, interval, buffer)
+        minutes = await _call(fetch_klines, symbol, "1m")
+        minutes = minutes[minutes["open_time"] + INTERVAL_MS["1m"] <= int(time.time() * 1000)]
+        await bars.backfill(symbol, minutes)
+        await bars.subscribe(symbol, interval, on_kline)
+    else:
+        ws_manager.set_queue_policy(on_kline, overflow="keep_closed")
+        await ws_manager.subscribe_kline(symbol, interval, on_kline)
+    await ws_manager.subscribe_trade(symbol, on_tick)
+    await ws_manager.subscribe_book_ticker(symbol, on_tick)
+
+    try:
+        while get_auto_flag():
+            await _pause(1, stop_event)
+    finally:
+        if use_bars:
+            bars.unsubscribe(symbol, interval, on_kline)
+        else:
+            await ws_manager.remove_callback(kline_stream, on_kline)
+        await ws_manager.remove_callback(trade_stream, on_tick)
+        await ws_manager.remove_callback(book_stream, on_tick)
+    await send_log("자동매매 루프 종료")
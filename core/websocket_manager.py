@@ -5,16 +5,265 @@ WebSocket manager for real-time Binance data streaming
 import json
 import asyncio
 import websockets
+from collections import OrderedDict, deque
 from typing import Dict, List, Callable, Optional
 from datetime import datetime
-import pandas as pd
 from utils.logger import logger
 from core.supabase_client import supabase_manager
+from core.kline_writer import KlineWriteBehind
+from core.ws_decode import LazyEvent, JSON_BACKEND, loads as fast_loads
+
+# Binance limits per connection
+MAX_STREAMS_PER_CONNECTION = 1024
+MAX_CONTROL_MESSAGES_PER_SECOND = 5
+# Streams per SUBSCRIBE/UNSUBSCRIBE frame
+CONTROL_BATCH_SIZE = 200
+
+class _MuxConnection:
+    """One /stream connection carrying many streams for the manager"""
+    
+    def __init__(self, manager: "BinanceWebSocketManager", conn_id: int):
+        self.manager = manager
+        self.conn_id = conn_id
+        self.streams = set()
+        self.websocket = None
+        self._pending_sub = set()
+        self._pending_unsub = set()
+        self._wakeup = asyncio.Event()
+        self._next_id = 1
+        self._closing = False
+        self._tasks = [
+            asyncio.create_task(self._run()),
+            asyncio.create_task(self._control_loop()),
+        ]
+    
+    def add(self, stream: str):
+        self.streams.add(stream)
+        self._pending_unsub.discard(stream)
+        self._pending_sub.add(stream)
+        self._wakeup.set()
+    
+    def remove(self, stream: str):
+        self.streams.discard(stream)
+        if stream in self._pending_sub:
+            self._pending_sub.discard(stream)  # never sent, nothing to undo
+        else:
+            self._pending_unsub.add(stream)
+            self._wakeup.set()
+    
+    async def _control_loop(self):
+        """Send queued SUBSCRIBE/UNSUBSCRIBE frames within the 5 msg/s limit"""
+        interval = 1.0 / MAX_CONTROL_MESSAGES_PER_SECOND
+        while not self._closing:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self.websocket is not None and (self._pending_unsub or self._pending_sub):
+                method, pending = (("UNSUBSCRIBE", self._pending_unsub) if self._pending_unsub
+                                   else ("SUBSCRIBE", self._pending_sub))
+                batch = [pending.pop() for _ in range(min(CONTROL_BATCH_SIZE, len(pending)))]
+                try:
+                    await self.websocket.send(json.dumps({"method": method, "params": batch, "id": self._next_id}))
+                    self._next_id += 1
+                except Exception as e:
+                    # Connection dropped; _run re-subscribes everything on reconnect
+                    logger.warning(f"Control frame failed on connection {self.conn_id}: {e}", module="websocket")
+                    break
+                await asyncio.sleep(interval)
+    
+    async def _run(self):
+        manager = self.manager
+        url = f"{manager.base_url}/stream"
+        reconnect_attempts = 0
+        
+        while not self._closing and reconnect_attempts < manager.max_reconnect_attempts:
+            try:
+                async with websockets.connect(url) as websocket:
+                    reconnect_attempts = 0
+                    self._pending_unsub.clear()
+                    self._pending_sub = set(self.streams)
+                    self.websocket = websocket
+                    self._wakeup.set()
+                    logger.info(f"Multiplexed WebSocket {self.conn_id} connected ({len(self.streams)} streams)",
+                                module="websocket")
+                    
+                    async for message in websocket:
+                        try:
+                            data = manager._loads(message)
+                            stream = data.get("stream") if isinstance(data, dict) else None
+                            if stream is None:
+                                # Control frame response: {"result": null, "id": n}
+                                if isinstance(data, dict) and data.get("error"):
+                                    logger.error(f"Control frame rejected: {data['error']}", module="websocket")
+                                continue
+                            stream_type = manager.stream_types.get(stream)
+                            if stream_type is not None:
+                                if manager.recorder is not None:
+                                    manager.recorder.record(stream, stream_type, message, wrapped=True)
+                                await manager._dispatch(stream, stream_type, data.get("data"))
+                        except json.JSONDecodeError as e:
+                            logger.error(f"Failed to parse WebSocket message: {e}", module="websocket")
+                        except Exception as e:
+                            logger.error(f"Error processing WebSocket message: {e}", module="websocket")
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Multiplexed WebSocket {self.conn_id} disconnected: {e}", module="websocket")
+            
+            self.websocket = None
+            if not self._closing:
+                reconnect_attempts += 1
+                await asyncio.sleep(manager.reconnect_delay * reconnect_attempts)
+        
+        if not self._closing:
+            logger.error(f"Max reconnection attempts reached for multiplexed connection {self.conn_id}",
+                         module="websocket")
+    
+    async def close(self):
+        self._closing = True
+        self._wakeup.set()
+        if self.websocket is not None:
+            try:
+                await self.websocket.close()
+            except Exception:
+                pass
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+# Subscriber queue overflow policies
+DROP_OLDEST = "drop_oldest"   # discard the oldest queued event
+CONFLATE = "conflate"         # keep only the latest event per (stream, symbol)
+BLOCK = "block"               # pause the socket reader until there is room
+KEEP_CLOSED = "keep_closed"   # conflate in-progress klines, never drop closed ones
+OVERFLOW_POLICIES = (DROP_OLDEST, CONFLATE, BLOCK, KEEP_CLOSED)
+
+class _Subscriber:
+    """Bounded event queue plus consumer task for one callback"""
+    
+    def __init__(self, callback: Callable, maxsize: int = 1000, overflow: str = DROP_OLDEST):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.callback = callback
+        self.name = getattr(callback, "__qualname__", repr(callback))
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self._is_async = asyncio.iscoroutinefunction(callback)
+        # conflate/keep_closed: (stream, symbol[, open_time]) -> event; otherwise FIFO
+        self._keyed = overflow in (CONFLATE, KEEP_CLOSED)
+        self._queue = OrderedDict() if self._keyed else deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.errors = 0
+        self.max_depth = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task = asyncio.create_task(self._consume())
+    
+    async def put(self, stream: str, event):
+        self.received += 1
+        self._idle.clear()
+        queue = self._queue
+        if self.overflow == CONFLATE:
+            key = (stream, event.get("symbol"))
+            if key in queue:
+                queue[key] = event  # keeps its place in line, carries the newest data
+                self.conflated += 1
+                return
+            if len(queue) >= self.maxsize:
+                queue.popitem(last=False)
+                self.dropped += 1
+            queue[key] = event
+        elif self.overflow == KEEP_CLOSED:
+            key = (stream, event.get("symbol"))
+            if event.get("is_closed"):
+                # Closed candles are queued in order and never dropped; a pending
+                # in-progress update for the same candle is stale by now
+                if queue.pop(key, None) is not None:
+                    self.conflated += 1
+                queue[key + (event.get("open_time"),)] = event
+            elif key in queue:
+                queue[key] = event
+                self.conflated += 1
+                return
+            else:
+                if len(queue) >= self.maxsize:
+                    oldest = next((k for k in queue if len(k) == 2), None)
+                    if oldest is not None:
+                        del queue[oldest]
+                        self.dropped += 1
+                queue[key] = event
+        else:
+            if len(queue) >= self.maxsize:
+                if self.overflow == BLOCK:
+                    while len(queue) >= self.maxsize:
+                        self._not_full.clear()
+                        await self._not_full.wait()
+                else:
+                    queue.popleft()
+                    self.dropped += 1
+            queue.append(event)
+        self.max_depth = max(self.max_depth, len(queue))
+        self._not_empty.set()
+    
+    def _pop(self):
+        if self._keyed:
+            return self._queue.popitem(last=False)[1]
+        return self._queue.popleft()
+    
+    async def _consume(self):
+        while True:
+            await self._not_empty.wait()
+            while self._queue:
+                event = self._pop()
+                self._not_full.set()
+                try:
+                    if self._is_async:
+                        await self.callback(event)
+                    else:
+                        self.callback(event)
+                    self.delivered += 1
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"Callback error ({self.name}): {e}", module="websocket")
+            self._not_empty.clear()
+            self._idle.set()
+    
+    def stats(self) -> Dict:
+        return {
+            "depth": len(self._queue),
+            "max_depth": self.max_depth,
+            "maxsize": self.maxsize,
+            "overflow": self.overflow,
+            "received": self.received,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+            "errors": self.errors,
+        }
+    
+    async def join(self):
+        """Wait until every queued event has been delivered"""
+        await self._idle.wait()
+    
+    async def close(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
 
 class BinanceWebSocketManager:
     """Manage Binance WebSocket connections for real-time data"""
     
-    def __init__(self, testnet: bool = False):
+    def __init__(self, testnet: bool = False, multiplex: bool = False,
+                 max_streams_per_connection: int = MAX_STREAMS_PER_CONNECTION,
+                 max_connections: int = 4, fast_decode: bool = False,
+                 queue_size: int = 1000, overflow: str = DROP_OLDEST,
+                 kline_writer: KlineWriteBehind = None, offline: bool = False,
+                 recorder=None, persist_klines: bool = None):
         self.testnet = testnet
         self.base_url = "wss://testnet.binance.vision" if testnet else "wss://stream.binance.com:9443"
         self.connections = {}
@@ -23,7 +272,36 @@ class BinanceWebSocketManager:
         self.reconnect_delay = 5  # seconds
         self.max_reconnect_attempts = 10
         
-        logger.info(f"WebSocket manager initialized (testnet={testnet})", module="websocket")
+        # Multiplexed mode: streams share a few /stream connections and are
+        # added/removed live with SUBSCRIBE/UNSUBSCRIBE frames
+        self.multiplex = multiplex
+        self.max_streams_per_connection = max_streams_per_connection
+        self.max_connections = max_connections
+        self.stream_types: Dict[str, str] = {}
+        self._mux_pool: List[_MuxConnection] = []
+        self._stream_conn: Dict[str, _MuxConnection] = {}
+        
+        # Fast decoding: orjson when available, lazily converted LazyEvent records
+        self.fast_decode = fast_decode
+        self._loads = fast_loads if fast_decode else json.loads
+        
+        # Each callback gets its own bounded queue and consumer task so a slow
+        # subscriber never stalls the socket reader
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self._subscribers: Dict[Callable, _Subscriber] = {}
+        self._subscriber_options: Dict[Callable, Dict] = {}
+        
+        # Closed klines are persisted in bulk by a background writer, never inline
+        self.kline_writer = kline_writer
+        
+        # Offline: subscriptions only register callbacks (for core/market_recorder.py replay)
+        self.offline = offline
+        self.persist_klines = (not offline) if persist_klines is None else persist_klines
+        self.recorder = recorder
+        
+        logger.info(f"WebSocket manager initialized (testnet={testnet}, multiplex={multiplex}, "
+                    f"fast_decode={fast_decode}{', ' + JSON_BACKEND if fast_decode else ''})", module="websocket")
     
     def _get_stream_url(self, streams: List[str]) -> str:
         """Build WebSocket URL for multiple streams"""
@@ -45,11 +323,21 @@ class BinanceWebSocketManager:
         stream = f"{symbol.lower()}@depth{levels}"
         await self._subscribe(stream, callback, "depth")
     
+    async def subscribe_depth_diff(self, symbol: str, callback: Callable, speed_ms: int = 100):
+        """Subscribe to order book diffs (for maintaining a local book)"""
+        stream = f"{symbol.lower()}@depth@{speed_ms}ms"
+        await self._subscribe(stream, callback, "depthUpdate")
+    
     async def subscribe_trade(self, symbol: str, callback: Callable):
         """Subscribe to individual trade data"""
         stream = f"{symbol.lower()}@trade"
         await self._subscribe(stream, callback, "trade")
     
+    async def subscribe_book_ticker(self, symbol: str, callback: Callable):
+        """Subscribe to best bid/ask updates"""
+        stream = f"{symbol.lower()}@bookTicker"
+        await self._subscribe(stream, callback, "bookTicker")
+    
     async def subscribe_aggTrade(self, symbol: str, callback: Callable):
         """Subscribe to aggregated trade data"""
         stream = f"{symbol.lower()}@aggTrade"
@@ -67,6 +355,10 @@ class BinanceWebSocketManager:
     
     async def _subscribe(self, stream: str, callback: Callable, stream_type: str):
         """Internal method to subscribe to a single stream"""
+        if self.multiplex or self.offline:
+            await self._mux_subscribe([stream], callback, stream_type)
+            return
+        
         url = f"{self.base_url}/ws/{stream}"
         
         if stream in self.callbacks:
@@ -79,6 +371,10 @@ class BinanceWebSocketManager:
     
     async def _subscribe_multiple(self, streams: List[str], callback: Callable, stream_type: str):
         """Subscribe to multiple streams in a single connection"""
+        if self.multiplex or self.offline:
+            await self._mux_subscribe(streams, callback, stream_type)
+            return
+        
         url = self._get_stream_url(streams)
         combined_key = "|".join(streams)
         
@@ -93,7 +389,8 @@ class BinanceWebSocketManager:
         """Connect to WebSocket and listen for messages"""
         reconnect_attempts = 0
         
-        while reconnect_attempts < self.max_reconnect_attempts:
+        # Stop once the stream has been unsubscribed
+        while stream_key in self.callbacks and reconnect_attempts < self.max_reconnect_attempts:
             try:
                 async with websockets.connect(url) as websocket:
                     self.connections[stream_key] = websocket
@@ -106,20 +403,10 @@ class BinanceWebSocketManager:
                     
                     async for message in websocket:
                         try:
-                            data = json.loads(message)
-                            
-                            # Process data based on stream type
-                            processed_data = await self._process_data(data, stream_type)
-                            
-                            # Call all registered callbacks
-                            for callback in self.callbacks.get(stream_key, []):
-                                try:
-                                    if asyncio.iscoroutinefunction(callback):
-                                        await callback(processed_data)
-                                    else:
-                                        callback(processed_data)
-                                except Exception as e:
-                                    logger.error(f"Callback error: {e}", module="websocket")
+                            if self.recorder is not None:
+                                self.recorder.record(stream_key, stream_type, message)
+                            data = self._loads(message)
+                            await self._dispatch(stream_key, stream_type, data)
                         
                         except json.JSONDecodeError as e:
                             logger.error(f"Failed to parse WebSocket message: {e}", module="websocket")
@@ -149,6 +436,57 @@ class BinanceWebSocketManager:
         if stream_key in self.callbacks:
             del self.callbacks[stream_key]
     
+    async def _dispatch(self, stream_key: str, stream_type: str, data, received: float = None):
+        """Process one payload and hand it to the stream's callbacks"""
+        if self.fast_decode:
+            processed_data = LazyEvent(stream_type, data, received)
+            if stream_type == "kline" and data.get("k", {}).get("x", False):
+                self._save_kline_to_db(data)
+        else:
+            # Process data based on stream type
+            processed_data = await self._process_data(data, stream_type, received)
+        
+        # Queue for every registered callback
+        for callback in list(self.callbacks.get(stream_key, [])):
+            await self._subscriber(callback).put(stream_key, processed_data)
+    
+    def _subscriber(self, callback: Callable) -> _Subscriber:
+        subscriber = self._subscribers.get(callback)
+        if subscriber is None:
+            options = self._subscriber_options.get(callback, {})
+            subscriber = self._subscribers[callback] = _Subscriber(
+                callback,
+                maxsize=options.get("maxsize", self.queue_size),
+                overflow=options.get("overflow", self.overflow),
+            )
+        return subscriber
+    
+    def set_queue_policy(self, callback: Callable, overflow: str = None, maxsize: int = None):
+        """Override queue size / overflow policy for one callback (call before events arrive)"""
+        if overflow is not None and overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        options = self._subscriber_options.setdefault(callback, {})
+        if overflow is not None:
+            options["overflow"] = overflow
+        if maxsize is not None:
+            options["maxsize"] = maxsize
+    
+    async def drain(self):
+        """Wait until every subscriber has processed what it has been given"""
+        await asyncio.gather(*(s.join() for s in list(self._subscribers.values())))
+    
+    def queue_stats(self) -> Dict[str, Dict]:
+        """Depth and drop counters per subscriber"""
+        return {s.name: s.stats() for s in self._subscribers.values()}
+    
+    async def _release_subscriber(self, callback: Callable):
+        if any(callback in cbs for cbs in self.callbacks.values()):
+            return
+        self._subscriber_options.pop(callback, None)
+        subscriber = self._subscribers.pop(callback, None)
+        if subscriber is not None:
+            await subscriber.close()
+    
     async def _keep_alive(self, websocket):
         """Send ping to keep WebSocket connection alive"""
         try:
@@ -158,11 +496,49 @@ class BinanceWebSocketManager:
         except Exception as e:
             logger.debug(f"Keep-alive ping failed: {e}", module="websocket")
     
-    async def _process_data(self, data: Dict, stream_type: str) -> Dict:
+    # ============== Multiplexed mode ==============
+    
+    def _pick_connection(self) -> "_MuxConnection":
+        """Least-loaded pooled connection, opening another once each carries a fair share"""
+        fair_share = max(1, self.max_streams_per_connection // self.max_connections)
+        least = min(self._mux_pool, key=lambda c: len(c.streams), default=None)
+        if len(self._mux_pool) < self.max_connections and (least is None or len(least.streams) >= fair_share):
+            least = _MuxConnection(self, len(self._mux_pool))
+            self._mux_pool.append(least)
+        if len(least.streams) >= self.max_streams_per_connection:
+            raise RuntimeError(
+                f"Stream limit reached ({self.max_connections} x {self.max_streams_per_connection})")
+        return least
+    
+    async def _mux_subscribe(self, streams: List[str], callback: Callable, stream_type: str):
+        added = 0
+        for stream in streams:
+            self.callbacks.setdefault(stream, []).append(callback)
+            self.stream_types[stream] = stream_type
+            if stream in self._stream_conn or self.offline:
+                continue
+            conn = self._pick_connection()
+            self._stream_conn[stream] = conn
+            conn.add(stream)
+            added += 1
+        if added:
+            logger.info(f"Subscribed to {added} streams (multiplexed, {len(self._mux_pool)} connections)",
+                        module="websocket")
+    
+    def _mux_unsubscribe(self, stream: str):
+        conn = self._stream_conn.pop(stream, None)
+        self.callbacks.pop(stream, None)
+        self.stream_types.pop(stream, None)
+        if conn is not None:
+            conn.remove(stream)
+            logger.info(f"Unsubscribed from stream: {stream}", module="websocket")
+    
+    async def _process_data(self, data: Dict, stream_type: str, received: float = None) -> Dict:
         """Process raw WebSocket data based on stream type"""
         processed = {
             "stream_type": stream_type,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": (datetime.utcfromtimestamp(received) if received is not None
+                          else datetime.utcnow()).isoformat(),
             "raw_data": data
         }
         
@@ -183,6 +559,7 @@ class BinanceWebSocketManager:
                 processed.update({
                     "symbol": data.get("s"),
                     "interval": k.get("i"),
+                    "open_time": k.get("t"),
                     "open": float(k.get("o", 0)),
                     "high": float(k.get("h", 0)),
                     "low": float(k.get("l", 0)),
@@ -193,7 +570,7 @@ class BinanceWebSocketManager:
                 
                 # Save closed candles to database
                 if k.get("x", False):
-                    await self._save_kline_to_db(data)
+                    self._save_kline_to_db(data)
             
             elif stream_type == "depth":
                 processed.update({
@@ -212,6 +589,25 @@ class BinanceWebSocketManager:
                     "is_buyer_maker": data.get("m")
                 })
             
+            elif stream_type == "depthUpdate":
+                processed.update({
+                    "symbol": data.get("s"),
+                    "first_update_id": data.get("U"),
+                    "last_update_id": data.get("u"),
+                    "bids": data.get("b", []),
+                    "asks": data.get("a", [])
+                })
+            
+            elif stream_type == "bookTicker":
+                processed.update({
+                    "symbol": data.get("s"),
+                    "bid_price": float(data.get("b", 0)),
+                    "bid_qty": float(data.get("B", 0)),
+                    "ask_price": float(data.get("a", 0)),
+                    "ask_qty": float(data.get("A", 0)),
+                    "update_id": data.get("u")
+                })
+            
             elif stream_type == "aggTrade":
                 processed.update({
                     "symbol": data.get("s"),
@@ -219,6 +615,7 @@ class BinanceWebSocketManager:
                     "quantity": float(data.get("q", 0)),
                     "first_trade_id": data.get("f"),
                     "last_trade_id": data.get("l"),
+                    "trade_time": data.get("T"),
                     "is_buyer_maker": data.get("m")
                 })
             
@@ -247,28 +644,22 @@ class BinanceWebSocketManager:
         
         return processed
     
-    async def _save_kline_to_db(self, data: Dict):
-        """Save closed kline to database"""
+    def _save_kline_to_db(self, data: Dict):
+        """Queue a closed kline for bulk persistence (see core/kline_writer.py)"""
+        if not self.persist_klines:
+            return
         try:
-            k = data.get("k", {})
-            kline_data = pd.DataFrame([{
-                "open": float(k.get("o", 0)),
-                "high": float(k.get("h", 0)),
-                "low": float(k.get("l", 0)),
-                "close": float(k.get("c", 0)),
-                "volume": float(k.get("v", 0))
-            }], index=[pd.Timestamp(k.get("t"), unit='ms')])
-            
-            await supabase_manager.save_market_data(
-                symbol=data.get("s"),
-                timeframe=k.get("i"),
-                data=kline_data
-            )
+            if self.kline_writer is None:
+                self.kline_writer = KlineWriteBehind()
+            self.kline_writer.add_kline(data)
         except Exception as e:
-            logger.error(f"Failed to save kline to database: {e}", module="websocket")
+            logger.error(f"Failed to queue kline for database: {e}", module="websocket")
     
     async def unsubscribe(self, stream: str):
         """Unsubscribe from a stream"""
+        if stream in self._stream_conn:
+            self._mux_unsubscribe(stream)
+            return
         if stream in self.connections:
             try:
                 await self.connections[stream].close()
@@ -278,8 +669,26 @@ class BinanceWebSocketManager:
             except Exception as e:
                 logger.error(f"Error unsubscribing from stream: {e}", module="websocket")
     
+    async def remove_callback(self, stream: str, callback: Callable):
+        """Detach one callback, closing the stream when nobody else listens"""
+        callbacks = self.callbacks.get(stream, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            if stream in self.connections or stream in self._stream_conn:
+                await self.unsubscribe(stream)
+            else:
+                self.callbacks.pop(stream, None)
+        await self._release_subscriber(callback)
+    
     async def close_all(self):
         """Close all WebSocket connections"""
+        for conn in self._mux_pool:
+            await conn.close()
+        self._mux_pool.clear()
+        self._stream_conn.clear()
+        self.stream_types.clear()
+        
         for stream, ws in list(self.connections.items()):
             try:
                 await ws.close()
@@ -289,6 +698,14 @@ class BinanceWebSocketManager:
         
         self.connections.clear()
         self.callbacks.clear()
+        for subscriber in self._subscribers.values():
+            await subscriber.close()
+        self._subscribers.clear()
+        self._subscriber_options.clear()
+        if self.kline_writer is not None:
+            await self.kline_writer.close()
+        if self.recorder is not None:
+            self.recorder.close()
         logger.info("All WebSocket connections closed", module="websocket")
 
 # Example usage with real-time price monitoring
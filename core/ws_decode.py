@@ -0,0 +1,211 @@
+"""
+Fast-path decoding for Binance WebSocket payloads
+
+Used by ``BinanceWebSocketManager(fast_decode=True)``. Instead of building
+a fully converted dict per message, each payload is wrapped in a
+``LazyEvent`` that converts a field only when a callback reads it, and the
+timestamp comes from the exchange event time ``E`` rather than a
+``datetime.utcnow()`` call. ``!miniTicker@arr`` batches are additionally
+exposed as one NumPy structured array.
+
+orjson is used for parsing when installed; the standard library is the
+fallback.
+"""
+
+import json
+import time
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+    loads: Callable[[Any], Any] = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    loads = json.loads
+    JSON_BACKEND = "json"
+
+# field -> (path into the raw payload, converter or None)
+FieldSpec = Dict[str, Tuple[Tuple[str, ...], Optional[Callable]]]
+
+FIELDS: Dict[str, FieldSpec] = {
+    "ticker": {
+        "symbol": (("s",), None),
+        "price": (("c",), float),
+        "volume": (("v",), float),
+        "quote_volume": (("q",), float),
+        "change_24h": (("P",), float),
+        "high_24h": (("h",), float),
+        "low_24h": (("l",), float),
+    },
+    "kline": {
+        "symbol": (("s",), None),
+        "interval": (("k", "i"), None),
+        "open_time": (("k", "t"), None),
+        "open": (("k", "o"), float),
+        "high": (("k", "h"), float),
+        "low": (("k", "l"), float),
+        "close": (("k", "c"), float),
+        "volume": (("k", "v"), float),
+        "is_closed": (("k", "x"), bool),
+    },
+    "depth": {
+        "symbol": (("s",), None),
+        "bids": (("b",), None),
+        "asks": (("a",), None),
+        "last_update_id": (("u",), None),
+    },
+    "depthUpdate": {
+        "symbol": (("s",), None),
+        "first_update_id": (("U",), None),
+        "last_update_id": (("u",), None),
+        "bids": (("b",), None),
+        "asks": (("a",), None),
+    },
+    "bookTicker": {
+        "symbol": (("s",), None),
+        "bid_price": (("b",), float),
+        "bid_qty": (("B",), float),
+        "ask_price": (("a",), float),
+        "ask_qty": (("A",), float),
+        "update_id": (("u",), None),
+    },
+    "trade": {
+        "symbol": (("s",), None),
+        "price": (("p",), float),
+        "quantity": (("q",), float),
+        "trade_id": (("t",), None),
+        "is_buyer_maker": (("m",), None),
+    },
+    "aggTrade": {
+        "symbol": (("s",), None),
+        "price": (("p",), float),
+        "quantity": (("q",), float),
+        "first_trade_id": (("f",), None),
+        "last_trade_id": (("l",), None),
+        "trade_time": (("T",), None),
+        "is_buyer_maker": (("m",), None),
+    },
+    "miniTicker": {
+        "symbol": (("s",), None),
+        "price": (("c",), float),
+        "volume": (("v",), float),
+        "quote_volume": (("q",), float),
+    },
+}
+
+MINI_TICKER_DTYPE = np.dtype([
+    ("symbol", "U20"),
+    ("event_time", "i8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+    ("quote_volume", "f8"),
+])
+
+
+def decode_mini_ticker_batch(items: List[Dict]) -> np.ndarray:
+    """Pack a ``!miniTicker@arr`` payload into a MINI_TICKER_DTYPE array"""
+    return np.array(
+        [(t["s"], t["E"], t["o"], t["h"], t["l"], t["c"], t["v"], t["q"]) for t in items],
+        dtype=MINI_TICKER_DTYPE,
+    )
+
+
+class _TickerView(Mapping):
+    """Per-symbol view into a decoded miniTicker batch (``tickers`` entries)"""
+
+    __slots__ = ("_batch", "_i")
+
+    _KEYS = ("symbol", "price", "volume", "quote_volume")
+    _COLUMNS = {"symbol": "symbol", "price": "close", "volume": "volume", "quote_volume": "quote_volume"}
+
+    def __init__(self, batch: np.ndarray, i: int):
+        self._batch = batch
+        self._i = i
+
+    def __getitem__(self, key):
+        value = self._batch[self._COLUMNS[key]][self._i]
+        return str(value) if key == "symbol" else float(value)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+
+class LazyEvent(Mapping):
+    """
+    Read-only event with the same keys ``_process_data`` produces
+
+    Fields are converted on first access and cached; ``raw_data`` is the
+    parsed payload itself, not a copy.
+    """
+
+    __slots__ = ("stream_type", "raw_data", "_received", "_cache")
+
+    _BASE_KEYS = ("stream_type", "timestamp", "raw_data")
+
+    def __init__(self, stream_type: str, raw_data: Any, received: float = None):
+        self.stream_type = stream_type
+        self.raw_data = raw_data
+        self._received = received if received is not None else time.time()
+        self._cache: Dict[str, Any] = {}
+
+    @property
+    def event_time(self) -> int:
+        """Exchange event time in ms (receive time when the payload has no ``E``)"""
+        data = self.raw_data
+        if isinstance(data, list):
+            data = data[0] if data else {}
+        event_time = data.get("E") if isinstance(data, dict) else None
+        return int(event_time) if event_time is not None else int(self._received * 1000)
+
+    def _keys(self) -> Tuple[str, ...]:
+        if self.stream_type == "miniTicker" and isinstance(self.raw_data, list):
+            return self._BASE_KEYS + ("tickers", "batch")
+        return self._BASE_KEYS + tuple(FIELDS.get(self.stream_type, ()))
+
+    def __getitem__(self, key: str):
+        if key == "stream_type":
+            return self.stream_type
+        if key == "raw_data":
+            return self.raw_data
+        cache = self._cache
+        if key in cache:
+            return cache[key]
+
+        if key == "timestamp":
+            value = datetime.fromtimestamp(self.event_time / 1000, timezone.utc).replace(tzinfo=None).isoformat()
+        elif key in ("batch", "tickers") and isinstance(self.raw_data, list):
+            if "batch" not in cache:
+                cache["batch"] = decode_mini_ticker_batch(self.raw_data)
+            batch = cache["batch"]
+            value = batch if key == "batch" else [_TickerView(batch, i) for i in range(len(batch))]
+        else:
+            spec = FIELDS.get(self.stream_type, {}).get(key)
+            if spec is None or not isinstance(self.raw_data, dict):
+                raise KeyError(key)
+            path, convert = spec
+            value = self.raw_data
+            for part in path:
+                value = value.get(part) if isinstance(value, dict) else None
+            if convert is not None:
+                value = convert(value or 0)
+        cache[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self):
+        return f"LazyEvent({self.stream_type}, {self.raw_data!r})"
@@ -8,79 +8,514 @@ except ImportError:
     except ImportError:
         # UMFutures not available in binance-connector
         UMFutures = None
-from tenacity import retry, stop_after_attempt, wait_exponential_jitter
+from binance.error import ClientError, ServerError
+from concurrent.futures import Future
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential_jitter
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional
+from urllib.parse import urlencode
+import aiohttp
+import asyncio
+import copy
+import hashlib
+import hmac
+import threading
+import time
 import pandas as pd
+from utils.logger import logger
+
+KLINE_COLUMNS = ["open_time","open","high","low","close","volume",
+                 "close_time","qav","ntrades","tbbv","tbqav","ignore"]
+
+def _klines_frame(raw, symbol: str, interval: str) -> pd.DataFrame:
+    df = pd.DataFrame(raw, columns=KLINE_COLUMNS)
+    df["open"] = df["open"].astype(float)
+    df["high"] = df["high"].astype(float)
+    df["low"] = df["low"].astype(float)
+    df["close"] = df["close"].astype(float)
+    df["volume"] = df["volume"].astype(float)
+    # Tag the frame so core.indicator_cache can share results across consumers
+    df.attrs["symbol"] = symbol
+    df.attrs["interval"] = interval
+    return df
+
+def _pick_top_usdt(tickers, min_volume_usdt: float, limit: int):
+    # Filter USDT pairs, exclude stable/stable and leveraged tokens
+    def ok(sym):
+        return sym.endswith("USDT") and not any(x in sym for x in ["UPUSDT","DOWNUSDT","BULLUSDT","BEARUSDT"])
+    filtered = [t for t in tickers if ok(t["symbol"])]
+    # Sort by quoteVolume desc
+    filtered.sort(key=lambda x: float(x.get("quoteVolume", 0.0)), reverse=True)
+    result = []
+    for t in filtered[:max(limit, 1)]:
+        if float(t.get("quoteVolume", 0.0)) >= min_volume_usdt:
+            result.append(t["symbol"])
+    return result or ["BTCUSDT","ETHUSDT","BNBUSDT","SOLUSDT"]
+
+# ============== Rate limiting ==============
+
+# Request weight per REST call (Binance spot docs)
+SPOT_WEIGHTS = {
+    "klines": 2,
+    "ticker_24hr": 80,      # all symbols
+    "ticker_price": 2,      # one symbol
+    "ticker_prices": 4,     # all symbols
+    "order": 1,
+    "account": 20,
+}
+
+def depth_weight(limit: int) -> int:
+    return 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
+
+def futures_klines_weight(limit: int) -> int:
+    return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+
+class BinanceRateLimiter:
+    """
+    Shared request-weight and order-count budget for one Binance API
+
+    Every request reserves its weight before it is sent. The budget follows
+    Binance's fixed windows (weight per clock minute, orders per 10s/day)
+    and is corrected from the X-MBX-USED-WEIGHT-* / X-MBX-ORDER-COUNT-*
+    response headers, so calls made by other processes on the same IP are
+    accounted for. A 429/418 blocks every caller until Retry-After has
+    passed instead of letting retries dig the ban deeper.
+    """
+
+    def __init__(self, weight_limit: int = 6000, order_limit_10s: int = 100,
+                 order_limit_1d: int = 200_000, safety: float = 0.9):
+        self.weight_limit = int(weight_limit * safety)
+        self.order_limit_10s = int(order_limit_10s * safety)
+        self.order_limit_1d = int(order_limit_1d * safety)
+        self._lock = threading.Lock()
+        self._windows = {"weight": -1, "orders_10s": -1, "orders_1d": -1}
+        self._used = {"weight": 0, "orders_10s": 0, "orders_1d": 0}
+        self._banned_until = 0.0
+        self.throttled = 0
+
+    # window key -> (length in seconds, limit attribute)
+    _WINDOW_SPECS = {
+        "weight": (60, "weight_limit"),
+        "orders_10s": (10, "order_limit_10s"),
+        "orders_1d": (86_400, "order_limit_1d"),
+    }
+
+    def _roll(self, now: float):
+        for key, (length, _) in self._WINDOW_SPECS.items():
+            window = int(now // length)
+            if window != self._windows[key]:
+                self._windows[key] = window
+                self._used[key] = 0
+
+    def reserve(self, weight: int = 1, orders: int = 0) -> float:
+        """
+        Try to spend ``weight`` (and ``orders``) from the current windows
+
+        Returns 0.0 when the request may go out now (the budget is spent),
+        otherwise the number of seconds to wait before trying again.
+        """
+        with self._lock:
+            now = time.time()
+            if now < self._banned_until:
+                return self._banned_until - now
+            self._roll(now)
+            needs = {"weight": weight, "orders_10s": orders, "orders_1d": orders}
+            for key, amount in needs.items():
+                length, limit_attr = self._WINDOW_SPECS[key]
+                if amount and self._used[key] + amount > getattr(self, limit_attr):
+                    self.throttled += 1
+                    return (self._windows[key] + 1) * length - now + 0.05
+            for key, amount in needs.items():
+                self._used[key] += amount
+            return 0.0
+
+    def acquire(self, weight: int = 1, orders: int = 0):
+        """Block the calling thread until the request fits the budget"""
+        while True:
+            delay = self.reserve(weight, orders)
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    async def acquire_async(self, weight: int = 1, orders: int = 0):
+        """Coroutine version of ``acquire``"""
+        while True:
+            delay = self.reserve(weight, orders)
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def update(self, headers: Optional[Mapping[str, str]]):
+        """Sync the local counters with the server's view from response headers"""
+        if not headers:
+            return
+        server = {}
+        for name, value in headers.items():
+            name = name.lower()
+            if name == "x-mbx-used-weight-1m":
+                server["weight"] = int(value)
+            elif name == "x-mbx-order-count-10s":
+                server["orders_10s"] = int(value)
+            elif name == "x-mbx-order-count-1d":
+                server["orders_1d"] = int(value)
+        if server:
+            with self._lock:
+                self._roll(time.time())
+                for key, value in server.items():
+                    # Local count also covers requests still in flight
+                    self._used[key] = max(self._used[key], value)
+
+    def penalize(self, status: int, headers: Optional[Mapping[str, str]] = None):
+        """Record a 429 (rate limited) or 418 (IP banned) response"""
+        retry_after = 60.0
+        for name, value in (headers or {}).items():
+            if name.lower() == "retry-after":
+                try:
+                    retry_after = float(value)
+                except ValueError:
+                    pass
+        with self._lock:
+            self._banned_until = max(self._banned_until, time.time() + retry_after)
+        logger.warning(f"Binance returned {status}; pausing requests for {retry_after:.0f}s",
+                       module="exchange")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._roll(time.time())
+            return {
+                **self._used,
+                "banned_for": max(0.0, self._banned_until - time.time()),
+                "throttled": self.throttled,
+            }
+
+class RequestCoalescer:
+    """
+    Share one in-flight request between identical concurrent callers
+
+    The first caller for a key performs the request; callers arriving while
+    it is in flight wait for the same result. Every caller, the first one
+    included, receives its own copy, so a caller mutating its DataFrame never
+    affects another (or one still copying it).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._inflight_async: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+
+    @staticmethod
+    def _copy(result: Any) -> Any:
+        if isinstance(result, pd.DataFrame):
+            return result.copy()
+        return copy.deepcopy(result)
+
+    def run(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return self._copy(future.result())
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return self._copy(result)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def run_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        future = self._inflight_async.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return self._copy(await asyncio.shield(future))
+
+        future = self._inflight_async[key] = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting; don't warn about an unretrieved exception
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            result = await fn()
+            future.set_result(result)
+            return self._copy(result)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight_async.pop(key, None)
+
+# Shared by every client in the process (limits are per IP / account)
+spot_rate_limiter = BinanceRateLimiter(weight_limit=6000, order_limit_10s=100)
+futures_rate_limiter = BinanceRateLimiter(weight_limit=2400, order_limit_10s=300)
+request_coalescer = RequestCoalescer()
+
+# Retry network/server failures, but not 4xx rejections (bad symbol, 429/418...)
+_retry = retry(stop=stop_after_attempt(3), wait=wait_exponential_jitter(1, 3),
+               retry=retry_if_not_exception_type(ClientError), reraise=True)
+
+def _send(limiter: BinanceRateLimiter, weight: int, fn: Callable, *args, orders: int = 0, **kwargs):
+    """Call a connector method (created with show_limit_usage=True) under the limiter"""
+    limiter.acquire(weight, orders)
+    try:
+        resp = fn(*args, **kwargs)
+    except ClientError as e:
+        if e.status_code in (418, 429):
+            limiter.penalize(e.status_code, e.header)
+        raise
+    limiter.update(resp.get("limit_usage"))
+    return resp["data"]
 
 class BinanceSpot:
-    def __init__(self, key: str, secret: str, testnet: bool = True):
+    def __init__(self, key: str, secret: str, testnet: bool = True,
+                 limiter: BinanceRateLimiter = None, coalescer: RequestCoalescer = None):
         base_url = "https://testnet.binance.vision" if testnet else None
-        self.client = Spot(api_key=key, api_secret=secret, base_url=base_url)
-
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential_jitter(1, 3))
-    def klines(self, symbol: str, interval: str = "15m", limit: int = 300) -> pd.DataFrame:
-        raw = self.client.klines(symbol, interval, limit=limit)
-        cols = ["open_time","open","high","low","close","volume",
-                "close_time","qav","ntrades","tbbv","tbqav","ignore"]
-        df = pd.DataFrame(raw, columns=cols)
-        df["open"] = df["open"].astype(float)
-        df["high"] = df["high"].astype(float)
-        df["low"] = df["low"].astype(float)
-        df["close"] = df["close"].astype(float)
-        df["volume"] = df["volume"].astype(float)
-        return df
-
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential_jitter(1, 3))
+        self.testnet = testnet
+        self.limiter = limiter or spot_rate_limiter
+        self.coalescer = coalescer or request_coalescer
+        self.client = Spot(api_key=key, api_secret=secret, base_url=base_url, show_limit_usage=True)
+
+    def _send(self, weight: int, fn: Callable, *args, orders: int = 0, **kwargs):
+        return _send(self.limiter, weight, fn, *args, orders=orders, **kwargs)
+
+    @_retry
+    def klines(self, symbol: str, interval: str = "15m", limit: int = 300,
+               start_time: int = None, end_time: int = None) -> pd.DataFrame:
+        params = {"limit": limit}
+        if start_time is not None:
+            params["startTime"] = int(start_time)
+        if end_time is not None:
+            params["endTime"] = int(end_time)
+        key = ("spot", self.testnet, "klines", symbol, interval, limit, start_time, end_time)
+        return self.coalescer.run(key, lambda: _klines_frame(
+            self._send(SPOT_WEIGHTS["klines"], self.client.klines, symbol, interval, **params),
+            symbol, interval))
+
+    @_retry
     def top_usdt_symbols(self, min_volume_usdt: float = 5_000_000, limit: int = 30):
-        tickers = self.client.ticker_24hr()
-        # Filter USDT pairs, exclude stable/stable and leveraged tokens
-        def ok(sym):
-            return sym.endswith("USDT") and not any(x in sym for x in ["UPUSDT","DOWNUSDT","BULLUSDT","BEARUSDT"])
-        filtered = [t for t in tickers if ok(t["symbol"])]
-        # Sort by quoteVolume desc
-        filtered.sort(key=lambda x: float(x.get("quoteVolume", 0.0)), reverse=True)
-        result = []
-        for t in filtered[:max(limit, 1)]:
-            if float(t.get("quoteVolume", 0.0)) >= min_volume_usdt:
-                result.append(t["symbol"])
-        return result or ["BTCUSDT","ETHUSDT","BNBUSDT","SOLUSDT"]
+        tickers = self.coalescer.run(("spot", self.testnet, "ticker_24hr"), lambda: self._send(
+            SPOT_WEIGHTS["ticker_24hr"], self.client.ticker_24hr))
+        return _pick_top_usdt(tickers, min_volume_usdt, limit)
+
+    @_retry
+    def ticker_price(self, symbol: str) -> Dict:
+        return self.coalescer.run(("spot", self.testnet, "ticker_price", symbol), lambda: self._send(
+            SPOT_WEIGHTS["ticker_price"], self.client.ticker_price, symbol))
+
+    @_retry
+    def ticker_prices(self) -> Dict[str, float]:
+        """Last price of every symbol in one request"""
+        tickers = self.coalescer.run(("spot", self.testnet, "ticker_prices"), lambda: self._send(
+            SPOT_WEIGHTS["ticker_prices"], self.client.ticker_price))
+        return {t["symbol"]: float(t["price"]) for t in tickers}
 
+    @_retry
+    def depth(self, symbol: str, limit: int = 1000) -> Dict:
+        """Order book snapshot: {lastUpdateId, bids, asks}"""
+        return self.coalescer.run(("spot", self.testnet, "depth", symbol, limit), lambda: self._send(
+            depth_weight(limit), self.client.depth, symbol, limit=limit))
+
+    # 주문은 병합/재시도하지 않음
     def market_buy_quote(self, symbol: str, quote_qty: float):
-        return self.client.new_order(symbol=symbol, side="BUY", type="MARKET", quoteOrderQty=str(quote_qty))
+        return self._send(SPOT_WEIGHTS["order"], self.client.new_order, orders=1,
+                          symbol=symbol, side="BUY", type="MARKET", quoteOrderQty=str(quote_qty))
 
     def market_sell_base(self, symbol: str, qty: float):
-        return self.client.new_order(symbol=symbol, side="SELL", type="MARKET", quantity=str(qty))
+        return self._send(SPOT_WEIGHTS["order"], self.client.new_order, orders=1,
+                          symbol=symbol, side="SELL", type="MARKET", quantity=str(qty))
 
     def balances(self):
-        return self.client.account().get("balances", [])
+        return self._send(SPOT_WEIGHTS["account"], self.client.account).get("balances", [])
+
+class AsyncBinanceSpot:
+    """
+    asyncio-native spot client on a pooled aiohttp session
+
+    Same surface as BinanceSpot, but every method is a coroutine, so
+    exchange calls never block the event loop. One keep-alive connection
+    pool is shared by all requests; call ``close()`` (or use ``async with``)
+    on shutdown. Errors are raised as binance.error ClientError/ServerError
+    just like the synchronous connector.
+    """
+
+    # Per-endpoint total timeouts in seconds
+    TIMEOUTS = {
+        "/api/v3/klines": 10,
+        "/api/v3/ticker/24hr": 15,
+        "/api/v3/ticker/price": 3,
+        "/api/v3/depth": 5,
+        "/api/v3/order": 5,
+        "/api/v3/account": 5,
+    }
+    DEFAULT_TIMEOUT = 10
+
+    # Request weight per endpoint
+    WEIGHTS = {
+        "/api/v3/klines": SPOT_WEIGHTS["klines"],
+        "/api/v3/ticker/24hr": SPOT_WEIGHTS["ticker_24hr"],
+        "/api/v3/ticker/price": SPOT_WEIGHTS["ticker_price"],
+        "/api/v3/order": SPOT_WEIGHTS["order"],
+        "/api/v3/account": SPOT_WEIGHTS["account"],
+    }
+
+    def __init__(self, key: str, secret: str, testnet: bool = True,
+                 pool_size: int = 20, recv_window: int = 5000,
+                 limiter: BinanceRateLimiter = None, coalescer: RequestCoalescer = None):
+        self.limiter = limiter or spot_rate_limiter
+        self.coalescer = coalescer or request_coalescer
+        self.key = key
+        self.secret = secret
+        self.testnet = testnet
+        self.base_url = "https://testnet.binance.vision" if testnet else "https://api.binance.com"
+        self.pool_size = pool_size
+        self.recv_window = recv_window
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # 세션은 실행 중인 이벤트 루프 안에서 한 번만 생성
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60, ttl_dns_cache=300)
+            headers = {"X-MBX-APIKEY": self.key} if self.key else {}
+            self._session = aiohttp.ClientSession(base_url=self.base_url, connector=connector, headers=headers)
+        return self._session
+
+    def _sign(self, params: Dict) -> Dict:
+        params = {**params, "timestamp": int(time.time() * 1000), "recvWindow": self.recv_window}
+        query = urlencode(params)
+        params["signature"] = hmac.new(self.secret.encode(), query.encode(), hashlib.sha256).hexdigest()
+        return params
+
+    async def _request(self, method: str, path: str, params: Dict = None, signed: bool = False):
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        is_order = path == "/api/v3/order" and method == "POST"
+        weight = self.WEIGHTS.get(path, 1)
+        if path == "/api/v3/ticker/price" and "symbol" not in params:
+            weight = SPOT_WEIGHTS["ticker_prices"]
+        elif path == "/api/v3/depth":
+            weight = depth_weight(params.get("limit", 100))
+        await self.limiter.acquire_async(weight, 1 if is_order else 0)
+        if signed:
+            params = self._sign(params)
+        session = await self._get_session()
+        timeout = aiohttp.ClientTimeout(total=self.TIMEOUTS.get(path, self.DEFAULT_TIMEOUT))
+        async with session.request(method, path, params=params, timeout=timeout) as resp:
+            self.limiter.update(resp.headers)
+            if resp.status in (418, 429):
+                self.limiter.penalize(resp.status, resp.headers)
+            if resp.status >= 500:
+                raise ServerError(resp.status, await resp.text())
+            data = await resp.json(content_type=None)
+            if resp.status >= 400:
+                raise ClientError(resp.status, data.get("code"), data.get("msg"), dict(resp.headers), data)
+            return data
+
+    @_retry
+    async def klines(self, symbol: str, interval: str = "15m", limit: int = 300,
+                     start_time: int = None, end_time: int = None) -> pd.DataFrame:
+        async def fetch():
+            raw = await self._request("GET", "/api/v3/klines", {
+                "symbol": symbol, "interval": interval, "limit": limit,
+                "startTime": start_time, "endTime": end_time,
+            })
+            return _klines_frame(raw, symbol, interval)
+        key = ("spot", self.testnet, "klines", symbol, interval, limit, start_time, end_time)
+        return await self.coalescer.run_async(key, fetch)
+
+    @_retry
+    async def top_usdt_symbols(self, min_volume_usdt: float = 5_000_000, limit: int = 30):
+        tickers = await self.coalescer.run_async(
+            ("spot", self.testnet, "ticker_24hr"), lambda: self._request("GET", "/api/v3/ticker/24hr"))
+        return _pick_top_usdt(tickers, min_volume_usdt, limit)
+
+    @_retry
+    async def ticker_price(self, symbol: str) -> Dict:
+        return await self.coalescer.run_async(
+            ("spot", self.testnet, "ticker_price", symbol),
+            lambda: self._request("GET", "/api/v3/ticker/price", {"symbol": symbol}))
+
+    @_retry
+    async def ticker_prices(self) -> Dict[str, float]:
+        """Last price of every symbol in one request"""
+        tickers = await self.coalescer.run_async(
+            ("spot", self.testnet, "ticker_prices"),
+            lambda: self._request("GET", "/api/v3/ticker/price"))
+        return {t["symbol"]: float(t["price"]) for t in tickers}
+
+    @_retry
+    async def depth(self, symbol: str, limit: int = 1000) -> Dict:
+        """Order book snapshot: {lastUpdateId, bids, asks}"""
+        return await self.coalescer.run_async(
+            ("spot", self.testnet, "depth", symbol, limit),
+            lambda: self._request("GET", "/api/v3/depth", {"symbol": symbol, "limit": limit}))
+
+    # Orders are not retried: a timed-out order may still have been filled
+    async def market_buy_quote(self, symbol: str, quote_qty: float):
+        return await self._request("POST", "/api/v3/order", {
+            "symbol": symbol, "side": "BUY", "type": "MARKET", "quoteOrderQty": str(quote_qty)
+        }, signed=True)
+
+    async def market_sell_base(self, symbol: str, qty: float):
+        return await self._request("POST", "/api/v3/order", {
+            "symbol": symbol, "side": "SELL", "type": "MARKET", "quantity": str(qty)
+        }, signed=True)
+
+    async def balances(self):
+        account = await self._request("GET", "/api/v3/account", signed=True)
+        return account.get("balances", [])
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
 
 class BinanceFutures:
     def __init__(self, key: str, secret: str, testnet: bool = True):
         if UMFutures is None:
             raise ImportError("UMFutures not available. Install binance-futures-connector if needed.")
         base_url = "https://testnet.binancefuture.com" if testnet else None
-        self.client = UMFutures(key=key, secret=secret, base_url=base_url)
-
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential_jitter(1, 3))
-    def klines(self, symbol: str, interval: str = "15m", limit: int = 300) -> pd.DataFrame:
-        raw = self.client.klines(symbol=symbol, interval=interval, limit=limit)
-        cols = ["open_time","open","high","low","close","volume",
-                "close_time","qav","ntrades","tbbv","tbqav","ignore"]
-        df = pd.DataFrame(raw, columns=cols)
-        df["open"] = df["open"].astype(float)
-        df["high"] = df["high"].astype(float)
-        df["low"] = df["low"].astype(float)
-        df["close"] = df["close"].astype(float)
-        df["volume"] = df["volume"].astype(float)
-        return df
+        self.testnet = testnet
+        self.limiter = futures_rate_limiter
+        self.coalescer = request_coalescer
+        self.client = UMFutures(key=key, secret=secret, base_url=base_url, show_limit_usage=True)
+
+    def _send(self, weight: int, fn: Callable, *args, orders: int = 0, **kwargs):
+        return _send(self.limiter, weight, fn, *args, orders=orders, **kwargs)
+
+    @_retry
+    def klines(self, symbol: str, interval: str = "15m", limit: int = 300,
+               start_time: int = None, end_time: int = None) -> pd.DataFrame:
+        params = {"limit": limit}
+        if start_time is not None:
+            params["startTime"] = int(start_time)
+        if end_time is not None:
+            params["endTime"] = int(end_time)
+        key = ("futures", self.testnet, "klines", symbol, interval, limit, start_time, end_time)
+        return self.coalescer.run(key, lambda: _klines_frame(
+            self._send(futures_klines_weight(limit), self.client.klines,
+                       symbol=symbol, interval=interval, **params),
+            symbol, interval))
 
     def market_long(self, symbol: str, qty: float):
-        return self.client.new_order(symbol=symbol, side="BUY", type="MARKET", quantity=str(qty))
+        return self._send(1, self.client.new_order, orders=1,
+                          symbol=symbol, side="BUY", type="MARKET", quantity=str(qty))
 
     def market_short(self, symbol: str, qty: float):
-        return self.client.new_order(symbol=symbol, side="SELL", type="MARKET", quantity=str(qty))
+        return self._send(1, self.client.new_order, orders=1,
+                          symbol=symbol, side="SELL", type="MARKET", quantity=str(qty))
 
     def set_leverage(self, symbol: str, leverage: int = 3):
         try:
-            return self.client.change_leverage(symbol, leverage)
+            return self._send(1, self.client.change_leverage, symbol, leverage)
         except Exception as e:
             return {"error": str(e)}
\ No newline at end of file
@@ -1,10 +1,20 @@
 import pandas as pd
-from core.indicators import bbands
+from core.indicator_cache import indicator
+
+def signal_series(df: pd.DataFrame, window: int = 20, num_std: float = 2.0, squeeze: float = 0.06) -> pd.DataFrame:
+    up, mid, low, width = indicator(df, "bbands", window, num_std)
+    # 직전 봉이 스퀴즈 상태였는지
+    squeezed = width.shift(1) < squeeze
+    return pd.DataFrame({
+        "buy": (df["close"] > up) & squeezed,
+        "sell": (df["close"] < low) & squeezed,
+        "width": width,
+    }, index=df.index)
 
 def signal(df: pd.DataFrame, window: int = 20, num_std: float = 2.0, squeeze: float = 0.06):
-    df = df.copy()
-    up, mid, low, width = bbands(df["close"], window, num_std)
-    df["up"], df["mid"], df["low"], df["width"] = up, mid, low, width
-    buy = (df["close"].iloc[-1] > df["up"].iloc[-1]) and (df["width"].iloc[-2] < squeeze)
-    sell = (df["close"].iloc[-1] < df["low"].iloc[-1]) and (df["width"].iloc[-2] < squeeze)
-    return {"buy": bool(buy), "sell": bool(sell), "width": float(df["width"].iloc[-1])}
\ No newline at end of file
+    last = signal_series(df, window, num_std, squeeze).iloc[-1]
+    return {"buy": bool(last["buy"]), "sell": bool(last["sell"]), "width": float(last["width"])}
+
+def bb_breakout_signal(df: pd.DataFrame, window: int = 20, num_std: float = 2.0, squeeze: float = 0.06) -> str:
+    s = signal(df, window, num_std, squeeze)
+    return "BUY" if s["buy"] else "SELL" if s["sell"] else "HOLD"
@@ -1,8 +1,14 @@
 import pandas as pd
-from core.indicators import rsi
+from core.indicator_cache import indicator
+
+def signal_series(df: pd.DataFrame, low: int = 30, high: int = 70, period: int = 14) -> pd.DataFrame:
+    val = indicator(df, "rsi", period)
+    return pd.DataFrame({"buy": val <= low, "sell": val >= high, "rsi": val}, index=df.index)
 
 def signal(df: pd.DataFrame, low: int = 30, high: int = 70, period: int = 14):
-    df = df.copy()
-    df["rsi"] = rsi(df["close"], period)
-    val = df["rsi"].iloc[-1]
-    return {"buy": val <= low, "sell": val >= high, "rsi": float(val)}
\ No newline at end of file
+    last = signal_series(df, low, high, period).iloc[-1]
+    return {"buy": bool(last["buy"]), "sell": bool(last["sell"]), "rsi": float(last["rsi"])}
+
+def rsi_reversion_signal(df: pd.DataFrame, low: int = 30, high: int = 70, period: int = 14) -> str:
+    s = signal(df, low, high, period)
+    return "BUY" if s["buy"] else "SELL" if s["sell"] else "HOLD"
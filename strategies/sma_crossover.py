@@ -1,13 +1,20 @@
 import pandas as pd
-from core.indicators import sma
+from core.indicator_cache import indicator
 
-def signal(df: pd.DataFrame, short: int = 20, long: int = 50):
-    df = df.copy()
-    df["sma_s"] = sma(df["close"], short)
-    df["sma_l"] = sma(df["close"], long)
-    df["diff"] = df["sma_s"] - df["sma_l"]
-    df["cross"] = (df["diff"] > 0).astype(int).diff().fillna(0)
+def signal_series(df: pd.DataFrame, short: int = 20, long: int = 50) -> pd.DataFrame:
+    diff = indicator(df, "sma", short) - indicator(df, "sma", long)
+    cross = (diff > 0).astype(int).diff().fillna(0)
     # 1 = 골든크로스(매수), -1 = 데드크로스(매도)
-    last_cross = int(df["cross"].iloc[-1]) if len(df) else 0
-    trend_up = bool(df["diff"].iloc[-1] > 0)
-    return {"buy": last_cross == 1, "sell": last_cross == -1, "trend_up": trend_up}
\ No newline at end of file
+    return pd.DataFrame({
+        "buy": cross == 1,
+        "sell": cross == -1,
+        "trend_up": diff > 0,
+    }, index=df.index)
+
+def signal(df: pd.DataFrame, short: int = 20, long: int = 50):
+    last = signal_series(df, short, long).iloc[-1]
+    return {"buy": bool(last["buy"]), "sell": bool(last["sell"]), "trend_up": bool(last["trend_up"])}
+
+def sma_crossover_signal(df: pd.DataFrame, short: int = 20, long: int = 50) -> str:
+    s = signal(df, short, long)
+    return "BUY" if s["buy"] else "SELL" if s["sell"] else "HOLD"
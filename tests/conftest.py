@@ -0,0 +1,18 @@
+"""
+Shared test setup
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+
+# core.supabase_client creates the Supabase singleton at import, which needs credentials
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_KEY",
+                      "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.test")
+
+# Keep the logger singleton's files out of the repo's logs/ (removed after the
+# singleton's own atexit flush, which is registered later and so runs first)
+os.environ["LOG_DIR"] = tempfile.mkdtemp(prefix="crypto-bot-test-logs-")
+atexit.register(shutil.rmtree, os.environ["LOG_DIR"], ignore_errors=True)
@@ -0,0 +1,75 @@
+"""
+Unit tests for the asyncio Binance spot client
+"""
+
+import asyncio
+import hashlib
+import hmac
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from binance.error import ClientError
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exchange.binance_client import AsyncBinanceSpot
+
+SECRET = "test-secret"
+
+async def klines_handler(request):
+    q = request.query
+    assert q["symbol"] == "BTCUSDT" and q["limit"] == "2"
+    assert "startTime" not in q
+    row = [0, "1.0", "2.0", "0.5", "1.5", "10.0", 59_999, "15.0", 3, "5.0", "7.5", "0"]
+    return web.json_response([row, [60_000] + row[1:]])
+
+async def order_handler(request):
+    assert request.headers["X-MBX-APIKEY"] == "test-key"
+    query = request.query_string
+    payload, signature = query.rsplit("&signature=", 1)
+    expected = hmac.new(SECRET.encode(), payload.encode(), hashlib.sha256).hexdigest()
+    if signature != expected:
+        return web.json_response({"code": -1022, "msg": "Signature invalid"}, status=400)
+    return web.json_response({"status": "FILLED", "side": request.query["side"],
+                              "quoteOrderQty": request.query.get("quoteOrderQty")})
+
+async def price_handler(request):
+    return web.json_response({"code": -1121, "msg": "Invalid symbol."}, status=400)
+
+def run_with_server(scenario):
+    async def main():
+        app = web.Application()
+        app.router.add_get("/api/v3/klines", klines_handler)
+        app.router.add_post("/api/v3/order", order_handler)
+        app.router.add_get("/api/v3/ticker/price", price_handler)
+        async with TestServer(app) as server:
+            client = AsyncBinanceSpot("test-key", SECRET)
+            client.base_url = str(server.make_url(""))
+            async with client:
+                await scenario(client)
+    asyncio.run(main())
+
+class TestAsyncBinanceSpot:
+    """Test suite for exchange.binance_client.AsyncBinanceSpot"""
+
+    def test_klines_frame_matches_sync_client(self):
+        async def scenario(client):
+            df = await client.klines("BTCUSDT", "1m", limit=2)
+            assert df["close"].tolist() == [1.5, 1.5]
+            assert df["open_time"].tolist() == [0, 60_000]
+            assert df.attrs == {"symbol": "BTCUSDT", "interval": "1m"}
+        run_with_server(scenario)
+
+    def test_signed_order(self):
+        async def scenario(client):
+            order = await client.market_buy_quote("BTCUSDT", 25.0)
+            assert order == {"status": "FILLED", "side": "BUY", "quoteOrderQty": "25.0"}
+        run_with_server(scenario)
+
+    def test_client_error_is_raised(self):
+        async def scenario(client):
+            with pytest.raises(ClientError) as err:
+                await client.ticker_price("NOPE")
+            assert err.value.error_code == -1121
+        run_with_server(scenario)
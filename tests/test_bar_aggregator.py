@@ -0,0 +1,142 @@
+"""
+Unit tests for the multi-timeframe bar aggregator
+"""
+
+import asyncio
+import pytest
+import pandas as pd
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.bar_aggregator import BarAggregator
+
+MINUTE = 60_000
+
+def kline(minute, o, h, l, c, v, closed=True, symbol="BTCUSDT"):
+    return {"stream_type": "kline", "symbol": symbol, "interval": "1m", "open_time": minute * MINUTE,
+            "open": o, "high": h, "low": l, "close": c, "volume": v, "is_closed": closed}
+
+def trade(ts, price, qty, symbol="BTCUSDT"):
+    return {"stream_type": "aggTrade", "symbol": symbol, "price": price, "quantity": qty, "trade_time": ts}
+
+class FakeWS:
+    def __init__(self):
+        self.subscriptions = []
+
+    def set_queue_policy(self, callback, overflow=None, maxsize=None):
+        pass
+
+    async def subscribe_kline(self, symbol, interval, callback):
+        self.subscriptions.append(f"{symbol.lower()}@kline_{interval}")
+
+    async def subscribe_aggTrade(self, symbol, callback):
+        self.subscriptions.append(f"{symbol.lower()}@aggTrade")
+
+class TestBarAggregator:
+    """Test suite for core.bar_aggregator"""
+
+    def test_one_source_stream_per_symbol(self):
+        async def run():
+            ws = FakeWS()
+            agg = BarAggregator(ws)
+            for interval in ("3m", "15m", "1h"):
+                await agg.subscribe("BTCUSDT", interval, lambda e: None)
+            await agg.subscribe("ETHUSDT", "5m", lambda e: None)
+            return ws.subscriptions
+
+        assert asyncio.run(run()) == ["btcusdt@kline_1m", "ethusdt@kline_1m"]
+
+    def test_three_minute_bar_from_1m_klines(self):
+        events = []
+
+        async def run():
+            agg = BarAggregator(intervals=("3m",))
+            await agg.subscribe("BTCUSDT", "3m", events.append)
+            await agg.on_kline(kline(0, 10, 12, 9, 11, 1.0))
+            await agg.on_kline(kline(1, 11, 15, 10, 14, 2.0, closed=False))
+            await agg.on_kline(kline(1, 11, 16, 10, 13, 2.5))
+            await agg.on_kline(kline(2, 13, 14, 8, 12, 1.5))
+            return agg
+
+        agg = asyncio.run(run())
+        closed = [e for e in events if e["is_closed"]]
+        assert len(closed) == 1
+        bar = closed[0]
+        assert (bar["open_time"], bar["open"], bar["high"], bar["low"], bar["close"]) == (0, 10, 16, 8, 12)
+        assert bar["volume"] == pytest.approx(5.0)
+        # The live update for minute 1 was replaced, not added, when it closed
+        assert events[1]["volume"] == pytest.approx(3.0)
+
+        df = agg.bars("BTCUSDT", "3m")
+        assert len(df) == 1 and df.attrs == {"symbol": "BTCUSDT", "interval": "3m"}
+
+    def test_missed_minute_closes_bar_on_next_period(self):
+        async def run():
+            agg = BarAggregator(intervals=("3m",))
+            await agg.on_kline(kline(0, 10, 12, 9, 11, 1.0))  # symbol not tracked yet
+            await agg.track("BTCUSDT")
+            await agg.on_kline(kline(0, 10, 12, 9, 11, 1.0))
+            await agg.on_kline(kline(1, 11, 13, 10, 12, 1.0))
+            await agg.on_kline(kline(3, 12, 12, 11, 11, 1.0))  # minute 2 never arrived
+            await agg.on_kline(kline(3, 12, 12, 11, 11, 1.0))  # duplicate after reconnect
+            return agg
+
+        agg = asyncio.run(run())
+        df = agg.bars("BTCUSDT", "3m")
+        assert df["close"].tolist() == [12]
+        assert agg.current("BTCUSDT", "3m")["volume"] == pytest.approx(1.0)
+
+    def test_all_timeframes_share_last_trade(self):
+        async def run():
+            agg = BarAggregator(intervals=("1m", "5m", "15m"), source="aggTrade")
+            await agg.track("BTCUSDT")
+            await agg.on_agg_trade(trade(10_000, 100.0, 1.0))
+            await agg.on_agg_trade(trade(70_000, 105.0, 2.0))
+            return agg
+
+        agg = asyncio.run(run())
+        assert len(agg.bars("BTCUSDT", "1m")) == 0  # first minute started before tracking
+        assert len(agg.bars("BTCUSDT", "5m")) == 0
+        for interval in ("1m", "5m", "15m"):
+            assert agg.current("BTCUSDT", interval)["close"] == 105.0
+        assert agg.current("BTCUSDT", "5m")["volume"] == pytest.approx(3.0)
+        assert len(agg.bars("BTCUSDT", "5m", include_partial=True)) == 1
+
+    def test_partial_first_period_is_never_closed(self):
+        events = []
+
+        async def run():
+            agg = BarAggregator(intervals=("15m",))
+            await agg.subscribe("BTCUSDT", "15m", events.append)
+            for minute in range(12, 16):  # started 12 minutes into the period
+                await agg.on_kline(kline(minute, 100 + minute, 101 + minute, 99 + minute, 100 + minute, 1.0))
+            return agg
+
+        agg = asyncio.run(run())
+        assert not any(e["is_closed"] for e in events)
+        assert agg.bars("BTCUSDT", "15m").empty
+        assert agg.current("BTCUSDT", "15m")["open_time"] == 15 * MINUTE
+
+    def test_backfill_completes_period_in_progress(self):
+        events = []
+        history = pd.DataFrame([kline(m, 100 + m, 101 + m, 99 + m, 100 + m, 1.0) for m in range(0, 12)])
+
+        async def run():
+            agg = BarAggregator(intervals=("15m",))
+            await agg.backfill("BTCUSDT", history)
+            await agg.subscribe("BTCUSDT", "15m", events.append)
+            for minute in range(12, 15):
+                await agg.on_kline(kline(minute, 100 + minute, 101 + minute, 99 + minute, 100 + minute, 1.0))
+            return agg
+
+        asyncio.run(run())
+        closed = [e for e in events if e["is_closed"]]
+        assert len(closed) == 1
+        assert (closed[0]["open"], closed[0]["close"], closed[0]["volume"]) == (100, 114, 15.0)
+
+    def test_rejects_unaligned_intervals(self):
+        with pytest.raises(ValueError):
+            BarAggregator(intervals=("1w",))
+        with pytest.raises(ValueError):
+            BarAggregator(source="trade")
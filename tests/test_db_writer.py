@@ -0,0 +1,196 @@
+"""
+Unit tests for the Supabase write-behind queue
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import cfg
+from core.db_writer import SupabaseWriteQueue
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Spill files go under a per-test DATA_DIR"""
+    monkeypatch.setattr(cfg, "data_dir", str(tmp_path))
+    return tmp_path
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.call = [table]
+
+    def insert(self, rows):
+        self.call += ["insert", rows]
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.call += ["upsert", rows, on_conflict]
+        return self
+
+    def update(self, data):
+        self.call += ["update", data]
+        return self
+
+    def eq(self, column, value):
+        self.call += ["eq", column, value]
+        return self
+
+    def in_(self, column, values):
+        self.call += ["in", column, values]
+        return self
+
+    def execute(self):
+        if self.client.fail:
+            self.client.fail -= 1
+            raise ConnectionError("database unavailable")
+        self.client.requests.append(self.call)
+
+class FakeClient:
+    def __init__(self, fail=0):
+        self.fail = fail
+        self.requests = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+class TestSupabaseWriteQueue:
+    """Test suite for core.db_writer"""
+
+    def test_inserts_batch_per_table(self):
+        client = FakeClient()
+
+        async def run():
+            queue = SupabaseWriteQueue(client, flush_interval=60)
+            for i in range(3):
+                queue.insert("alerts", {"title": f"a{i}"})
+            queue.insert("trades", {"id": "t1", "price": 1.0})
+            await queue.close()
+
+        asyncio.run(run())
+        assert [r[:2] for r in client.requests] == [["alerts", "insert"], ["trades", "insert"]]
+        assert len(client.requests[0][2]) == 3
+
+    def test_update_merges_into_pending_insert(self):
+        client = FakeClient()
+
+        async def run():
+            queue = SupabaseWriteQueue(client, flush_interval=60)
+            queue.insert("positions", {"id": "p1", "status": "OPEN", "entry_price": 100.0})
+            queue.update("positions", "id", "p1", {"status": "CLOSED", "pnl": 5.0})
+            await queue.close()
+            return queue
+
+        queue = asyncio.run(run())
+        assert client.requests == [["positions", "insert",
+                                    [{"id": "p1", "status": "CLOSED", "entry_price": 100.0, "pnl": 5.0}]]]
+        assert queue.stats()["coalesced"] == 1
+
+    def test_upserts_and_updates_coalesce(self):
+        client = FakeClient()
+
+        async def run():
+            queue = SupabaseWriteQueue(client, flush_interval=60)
+            queue.upsert("performance", {"strategy_id": "s1", "date": "2024-01-01", "pnl": 1.0}, "strategy_id,date")
+            queue.upsert("performance", {"strategy_id": "s1", "date": "2024-01-01", "pnl": 2.0}, "strategy_id,date")
+            queue.update("positions", "id", "p9", {"current_price": 1.0})
+            queue.update("positions", "id", "p9", {"current_price": 2.0})
+            for alert_id in ("a1", "a2", "a3"):
+                queue.update("alerts", "id", alert_id, {"is_read": True})
+            await queue.close()
+
+        asyncio.run(run())
+        assert client.requests == [
+            ["performance", "upsert", [{"strategy_id": "s1", "date": "2024-01-01", "pnl": 2.0}], "strategy_id,date"],
+            ["positions", "update", {"current_price": 2.0}, "eq", "id", "p9"],
+            ["alerts", "update", {"is_read": True}, "in", "id", ["a1", "a2", "a3"]],
+        ]
+
+    def test_failed_writes_are_requeued_in_order(self):
+        client = FakeClient(fail=2)
+
+        async def run():
+            queue = SupabaseWriteQueue(client, flush_interval=60, max_retries=1, retry_delay=0)
+            queue.insert("positions", {"id": "p1"})
+            queue.update("strategies", "id", "s1", {"status": "PAUSED"})
+            assert await queue.flush() == 0
+            assert queue.stats()["pending"] == 2
+            assert await queue.flush() == 2
+            return queue
+
+        queue = asyncio.run(run())
+        assert [r[:2] for r in client.requests] == [["positions", "insert"], ["strategies", "update"]]
+        assert queue.stats()["dropped"] == 0
+
+    def test_spills_after_max_attempts_and_replays_on_start(self, data_dir):
+        client = FakeClient(fail=2)
+
+        async def run():
+            queue = SupabaseWriteQueue(client, flush_interval=60, max_retries=0, max_attempts=2)
+            queue.insert("positions", {"id": "p1", "status": "OPEN"})
+            await queue.flush()
+            await queue.flush()
+            assert queue.stats()["pending"] == 0
+            assert queue.stats()["spilled"] == 1 and queue.stats()["dropped"] == 0
+            assert client.requests == []
+
+            restarted = SupabaseWriteQueue(client, flush_interval=60)
+            restarted.update("positions", "id", "p1", {"status": "CLOSED"})
+            assert await restarted.flush() == 2
+            return restarted
+
+        asyncio.run(run())
+        assert client.requests == [["positions", "insert", [{"id": "p1", "status": "OPEN"}]],
+                                   ["positions", "update", {"status": "CLOSED"}, "eq", "id", "p1"]]
+        assert not (data_dir / "spill" / "supabase_writes.jsonl").exists()
+
+    def test_close_spills_what_could_not_be_written(self, data_dir):
+        client = FakeClient(fail=100)
+
+        async def run():
+            queue = SupabaseWriteQueue(client, flush_interval=60, max_retries=0)
+            queue.upsert("performance", {"strategy_id": "s1", "date": "2024-01-01", "pnl": 1.0}, "strategy_id,date")
+            await queue.close()
+            return queue
+
+        queue = asyncio.run(run())
+        assert queue.stats()["spilled"] == 1
+        assert len((data_dir / "spill" / "supabase_writes.jsonl").read_text().splitlines()) == 1
+
+    def test_retried_ops_still_coalesce(self):
+        client = FakeClient(fail=1)
+
+        async def run():
+            queue = SupabaseWriteQueue(client, flush_interval=60, max_retries=0)
+            queue.insert("positions", {"id": "p1", "status": "OPEN"})
+            queue.update("strategies", "id", "s1", {"status": "PAUSED"})
+            await queue.flush()
+            queue.update("positions", "id", "p1", {"status": "CLOSED"})
+            queue.update("strategies", "id", "s1", {"status": "ACTIVE"})
+            assert queue.stats()["pending"] == 2
+            await queue.flush()
+            return queue
+
+        queue = asyncio.run(run())
+        assert client.requests == [["positions", "insert", [{"id": "p1", "status": "CLOSED"}]],
+                                   ["strategies", "update", {"status": "ACTIVE"}, "eq", "id", "s1"]]
+        assert queue.stats()["coalesced"] == 2
+
+    def test_caller_rows_are_not_mutated(self):
+        client = FakeClient()
+        row = {"id": "p1", "status": "OPEN"}
+        perf = {"strategy_id": "s1", "date": "2024-01-01", "pnl": 1.0}
+
+        async def run():
+            queue = SupabaseWriteQueue(client, flush_interval=60)
+            queue.insert("positions", row)
+            queue.update("positions", "id", "p1", {"status": "CLOSED"})
+            queue.upsert("performance", perf, "strategy_id,date")
+            queue.upsert("performance", {**perf, "pnl": 2.0}, "strategy_id,date")
+            await queue.close()
+
+        asyncio.run(run())
+        assert row == {"id": "p1", "status": "OPEN"}
+        assert perf["pnl"] == 1.0
@@ -0,0 +1,105 @@
+"""
+Unit tests for the shared indicator cache
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.indicators import rsi, atr
+from core.indicator_cache import IndicatorCache
+
+class TestIndicatorCache:
+    """Test suite for core.indicator_cache"""
+
+    @pytest.fixture
+    def tagged_data(self):
+        """Klines-shaped frame tagged like BinanceSpot.klines output"""
+        np.random.seed(3)
+        n = 120
+        close = 45000 + np.cumsum(np.random.randn(n) * 100)
+        df = pd.DataFrame({
+            'open_time': np.arange(n) * 900_000,
+            'open': close,
+            'high': close + 50,
+            'low': close - 50,
+            'close': close,
+            'volume': np.ones(n)
+        })
+        df.attrs["symbol"] = "BTCUSDT"
+        df.attrs["interval"] = "15m"
+        return df
+
+    def test_values_match_uncached(self, tagged_data):
+        cache = IndicatorCache()
+        pd.testing.assert_series_equal(cache.get(tagged_data, "rsi", 14), rsi(tagged_data["close"], 14))
+        pd.testing.assert_series_equal(cache.get(tagged_data, "atr", 14), atr(tagged_data, 14))
+
+    def test_same_bar_is_computed_once(self, tagged_data):
+        cache = IndicatorCache()
+        first = cache.get(tagged_data, "rsi", 14)
+        second = cache.get(tagged_data.copy(), "rsi", 14)
+
+        pd.testing.assert_series_equal(first, second)
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_params_and_live_candle_change_key(self, tagged_data):
+        cache = IndicatorCache()
+        cache.get(tagged_data, "rsi", 14)
+        cache.get(tagged_data, "rsi", 7)
+
+        # Same open_time, but the in-progress candle's close moved
+        live = tagged_data.copy()
+        live.loc[live.index[-1], "close"] += 10
+        assert cache.get(live, "rsi", 14).iat[-1] != cache.get(tagged_data, "rsi", 14).iat[-1]
+        assert cache.stats() == {"entries": 3, "hits": 1, "misses": 3}
+
+    def test_callers_cannot_mutate_cached_values(self, tagged_data):
+        cache = IndicatorCache()
+        result = cache.get(tagged_data, "rsi", 14)
+        result.fillna(0, inplace=True)
+        result.iloc[-1] = -1.0
+        upper, _, _, _ = cache.get(tagged_data, "bbands", 20)
+        upper[:] = 0.0
+
+        pd.testing.assert_series_equal(cache.get(tagged_data, "rsi", 14), rsi(tagged_data["close"], 14))
+        assert cache.get(tagged_data, "bbands", 20)[0].iat[-1] > 0
+
+    def test_untagged_frames_are_not_cached(self, tagged_data):
+        cache = IndicatorCache()
+        untagged = tagged_data.copy()
+        untagged.attrs.clear()
+        cache.get(untagged, "rsi", 14)
+        assert cache.stats()["entries"] == 0
+
+    def test_lru_eviction(self, tagged_data):
+        cache = IndicatorCache(max_entries=2)
+        cache.get(tagged_data, "rsi", 5)
+        cache.get(tagged_data, "rsi", 6)
+        cache.get(tagged_data, "rsi", 7)
+
+        assert cache.stats()["entries"] == 2
+        cache.get(tagged_data, "rsi", 5)
+        assert cache.stats()["misses"] == 4
+
+    def test_same_bars_with_other_labels_are_not_shared(self, tagged_data):
+        from core.indicator_cache import indicator_cache
+        from strategies import rsi_reversion
+        cache = IndicatorCache()
+        tail = tagged_data.tail(60)
+        relabelled = tail.reset_index(drop=True)
+        relabelled.attrs = dict(tagged_data.attrs)
+
+        cache.get(tail, "rsi", 14)
+        result = cache.get(relabelled, "rsi", 14)
+        assert result.index.equals(relabelled.index)
+        pd.testing.assert_series_equal(result, rsi(relabelled["close"], 14))
+
+        # Through the shared cache, as the strategies use it
+        indicator_cache.clear()
+        rsi_reversion.signal_series(tail)
+        assert rsi_reversion.signal(relabelled)["rsi"] == pytest.approx(rsi(relabelled["close"], 14).iat[-1])
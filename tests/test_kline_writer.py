@@ -0,0 +1,87 @@
+"""
+Unit tests for the write-behind kline persistence
+"""
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.kline_writer import KlineWriteBehind, kline_record
+
+def raw_kline(symbol, minute, close=100.0):
+    return {"e": "kline", "s": symbol, "k": {
+        "t": minute * 60_000, "i": "1m", "o": "99", "h": "101", "l": "98", "c": str(close), "v": "5", "x": True}}
+
+class FakeDB:
+    def __init__(self, up=True):
+        self.up = up
+        self.batches = []
+
+    async def save(self, records):
+        if not self.up:
+            return False
+        self.batches.append(list(records))
+        return True
+
+    def rows(self):
+        return [r for batch in self.batches for r in batch]
+
+class TestKlineWriteBehind:
+    """Test suite for core.kline_writer"""
+
+    def test_record_shape(self):
+        record = kline_record(raw_kline("BTCUSDT", 1, close=105.5))
+        assert record == {"symbol": "BTCUSDT", "timeframe": "1m", "open_time": "1970-01-01T00:01:00",
+                          "open": 99.0, "high": 101.0, "low": 98.0, "close": 105.5, "volume": 5.0}
+
+    def test_many_symbols_flush_in_bulk(self, tmp_path):
+        db = FakeDB()
+
+        async def run():
+            writer = KlineWriteBehind(db.save, max_batch=100, flush_interval=0.05,
+                                      spill_path=str(tmp_path / "spill.jsonl"))
+            for i in range(250):
+                writer.add_kline(raw_kline(f"SYM{i}USDT", 1))
+            await asyncio.sleep(0.2)
+            await writer.close()
+            return writer
+
+        writer = asyncio.run(run())
+        assert [len(b) for b in db.batches] == [100, 100, 50]
+        assert writer.stats()["pending"] == 0
+
+    def test_resent_candle_replaces_queued_row(self, tmp_path):
+        db = FakeDB()
+
+        async def run():
+            writer = KlineWriteBehind(db.save, flush_interval=60, spill_path=str(tmp_path / "spill.jsonl"))
+            writer.add_kline(raw_kline("BTCUSDT", 1, close=100.0))
+            writer.add_kline(raw_kline("BTCUSDT", 1, close=101.0))
+            await writer.close()
+
+        asyncio.run(run())
+        assert [r["close"] for r in db.rows()] == [101.0]
+
+    def test_spills_when_down_and_replays_after_recovery(self, tmp_path):
+        db = FakeDB(up=False)
+        spill = tmp_path / "spill.jsonl"
+
+        async def run():
+            writer = KlineWriteBehind(db.save, flush_interval=60, max_retries=1, retry_delay=0,
+                                      spill_path=str(spill))
+            writer.add_kline(raw_kline("BTCUSDT", 1))
+            writer.add_kline(raw_kline("ETHUSDT", 1))
+            await writer.flush()
+            assert spill.exists() and writer.stats()["spilled"] == 2
+            assert writer.stats()["failures"] == 2
+
+            db.up = True
+            writer.add_kline(raw_kline("BTCUSDT", 2))
+            assert await writer.flush() == 3
+            await writer.close()
+
+        asyncio.run(run())
+        assert not spill.exists()
+        assert sorted((r["symbol"], r["open_time"]) for r in db.rows()) == [
+            ("BTCUSDT", "1970-01-01T00:01:00"), ("BTCUSDT", "1970-01-01T00:02:00"), ("ETHUSDT", "1970-01-01T00:01:00")]
@@ -0,0 +1,175 @@
+"""
+Unit tests for the queued, batched logging pipeline
+"""
+
+import json
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import CryptoLogger, LogSampler, SensitiveDataMasker
+
+class FakeClient:
+    def __init__(self, fail=0):
+        self.fail = fail
+        self.requests = []
+
+    def table(self, name):
+        self.name = name
+        return self
+
+    def insert(self, rows):
+        self.rows = rows
+        return self
+
+    def execute(self):
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("database unavailable")
+        self.requests.append((self.name, self.rows))
+
+@pytest.fixture
+def make_logger(tmp_path, request):
+    loggers = []
+
+    def make(**kwargs):
+        log = CryptoLogger(name=f"test_{request.node.name}_{len(loggers)}", log_dir=str(tmp_path), **kwargs)
+        loggers.append(log)
+        return log
+
+    yield make
+    for log in loggers:
+        log.close()
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+class TestLogger:
+    """Test suite for utils.logger"""
+
+    def test_rows_are_batched_per_table(self, make_logger):
+        log = make_logger(db_batch_size=3)
+        client = FakeClient()
+        log.set_supabase_client(client)
+        for i in range(7):
+            log.info(f"message {i}", module="scanner", step=i)
+        log.flush()
+        assert [(table, len(rows)) for table, rows in client.requests] == [("logs", 3), ("logs", 3), ("logs", 1)]
+        assert client.requests[0][1][1]["context"] == {"step": 1}
+        assert log.db_handler.rows == 7
+
+    def test_files_keep_json_and_traceback(self, make_logger, tmp_path):
+        log = make_logger()
+        try:
+            raise ValueError("bad tick")
+        except ValueError:
+            log.error("handler failed", module="websocket", api_key="abc")
+        log.log_trade("OPEN", "BTCUSDT", "BUY", 100.0, 0.5)
+        log.flush()
+
+        error = read_lines(tmp_path / "errors.log")[0]
+        assert error["message"] == "handler failed"
+        assert "ValueError: bad tick" in error["exc_info"]
+        assert error["context"] == {"api_key": "***MASKED***"}
+        assert len(read_lines(tmp_path / "trades.log")) == 1
+        assert read_lines(tmp_path / "system.log")[0]["bot_module"] == "trader"
+
+    def test_failed_batch_is_dropped_after_retries(self, make_logger):
+        log = make_logger()
+        client = FakeClient(fail=10)
+        log.set_supabase_client(client)
+        log.db_handler.max_retries = 1
+        log.warning("lost", module="supabase")
+        log.flush()
+        assert client.requests == [] and log.db_handler.dropped == 1
+
+    def test_sampling_only_below_warning(self):
+        sampler = LogSampler({"backtest": 0.25})
+        kept = [sampler.allow("backtest", 10) for _ in range(8)]
+        assert kept == [0, None, None, None, 3, None, None, None]
+        assert sampler.allow("backtest", 30) == 0
+        assert sampler.allow("trader", 10) == 0
+
+    def test_rate_limit_per_module(self):
+        sampler = LogSampler.from_spec("websocket:1", rate_limit=5)
+        assert sum(sampler.allow("websocket", 20) is not None for _ in range(50)) == 5
+        assert sampler.stats() == {"websocket": 45}
+
+    def test_filtered_records_are_never_masked(self, make_logger, tmp_path):
+        log = make_logger(level="INFO", sampler=LogSampler({"backtest": 1}))
+        log.debug("Opened %s position at %s", "BUY", 100.0, module="backtest", api_key="abc")
+        log.info("Opened %s position at %s", "BUY", 100.0, module="backtest", api_key="abc")
+        log.flush()
+        assert log.sampler._seen == {"backtest": 1}
+        assert list(log._masker._plans) == [("api_key",)]
+        record = read_lines(tmp_path / "system.log")[0]
+        assert record["message"] == "Opened BUY position at 100.0"
+        assert record["context"] == {"api_key": "***MASKED***"}
+
+    def test_masker_caches_plan_per_shape(self):
+        mask = SensitiveDataMasker({"api_key", "secret"})
+        row = {"API_KEY": "k", "orders": [{"client_secret": "s", "note": "x" * 30}], "qty": 1}
+        assert mask(row) == {"API_KEY": "***MASKED***",
+                             "orders": [{"client_secret": "***MASKED***", "note": "xxxx...xxxx"}], "qty": 1}
+        mask(dict(row))
+        assert len(mask._plans) == 2
+
+    def test_trade_is_one_record_per_file(self, make_logger, tmp_path):
+        log = make_logger()
+        log.log_trade("OPEN", "BTCUSDT", "BUY", 100.0, 0.5, token="t" * 32)
+        log.flush()
+        trade = read_lines(tmp_path / "trades.log")
+        system = read_lines(tmp_path / "system.log")
+        assert [r["message"] for r in trade + system] == [
+            "Trade: OPEN BUY 0.5 BTCUSDT @ 100.0", "Trade executed: OPEN BUY 0.5 BTCUSDT @ 100.0"]
+        assert trade[0]["context"]["token"] == "***MASKED***"
+
+    def test_forked_child_writes_synchronously(self, make_logger, tmp_path):
+        import multiprocessing
+        log = make_logger()
+        log.info("before fork", module="optimizer")
+        log.flush()
+
+        def work():
+            log.info("from worker", module="optimizer")
+
+        child = multiprocessing.get_context("fork").Process(target=work)
+        child.start()
+        child.join(timeout=10)
+        assert child.exitcode == 0
+        log.info("after fork", module="optimizer")
+        log.flush()
+        assert [r["message"] for r in read_lines(tmp_path / "system.log")] == [
+            "before fork", "from worker", "after fork"]
+        assert (tmp_path / "system.log.idx").stat().st_size == 3 * 17
+        page = log.query_logs(kinds=["system"])
+        assert [e["message"] for e in page] == ["after fork", "from worker", "before fork"]
+
+class TestLogIndex:
+    """Test suite for utils.log_index"""
+
+    def test_query_pages_by_time_and_level(self, make_logger, tmp_path):
+        log = make_logger()
+        for i in range(30):
+            (log.warning if i % 3 == 0 else log.info)(f"event {i}", module="scanner")
+        log.flush()
+        assert (tmp_path / "system.log.idx").stat().st_size == 30 * 17
+
+        page = log.query_logs(level="INFO", limit=5, kinds=["system"])
+        assert [e["message"] for e in page] == ["event 29", "event 28", "event 26", "event 25", "event 23"]
+        older = log.query_logs(end=page[-1]["created"], level="INFO", limit=3, kinds=["system"])
+        assert [e["message"] for e in older] == ["event 22", "event 20", "event 19"]
+        ranged = log.query_logs(start=page[2]["created"], kinds=["system"])
+        assert [e["message"] for e in ranged] == ["event 29", "event 28", "event 27", "event 26"]
+        assert [e["message"] for e in log.get_recent_logs(limit=2, level="WARNING")] == ["event 27", "event 24"]
+
+    def test_rotation_and_unindexed_files(self, tmp_path):
+        from utils.log_index import query_log_files, read_lines_reverse
+        old = tmp_path / "system.log.1"
+        old.write_text("".join(json.dumps({"asctime": f"2024-01-01 00:00:{i:02d}", "levelname": "INFO",
+                                           "message": f"old {i}"}) + "\n" for i in range(10)))
+        assert [line for line in read_lines_reverse(old, block_size=16)] == \
+            old.read_bytes().splitlines()[::-1]
+        entries = query_log_files([tmp_path / "system.log", old], limit=3)
+        assert [e["message"] for e in entries] == ["old 9", "old 8", "old 7"]
@@ -0,0 +1,122 @@
+"""
+Unit tests for bulk market_data writes and paginated range reads
+"""
+
+import asyncio
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.supabase_client import SupabaseManager, market_data_records
+
+class FakeTable:
+    """Just enough of the PostgREST query builder for market_data"""
+
+    def __init__(self, db):
+        self.db = db
+        self.filters = []
+        self.columns = None
+        self.n = None
+        self.rows = None
+
+    def upsert(self, rows, on_conflict=None):
+        self.rows = rows
+        return self
+
+    def select(self, columns):
+        self.columns = columns.split(",")
+        return self
+
+    def eq(self, col, value):
+        self.filters.append(lambda r: r[col] == value)
+        return self
+
+    def gt(self, col, value):
+        self.filters.append(lambda r: r[col] > value)
+        return self
+
+    def gte(self, col, value):
+        self.filters.append(lambda r: r[col] >= value)
+        return self
+
+    def lte(self, col, value):
+        self.filters.append(lambda r: r[col] <= value)
+        return self
+
+    def order(self, col):
+        return self
+
+    def limit(self, n):
+        self.n = n
+        return self
+
+    def execute(self):
+        if self.rows is not None:
+            self.db.requests.append(len(self.rows))
+            for row in self.rows:
+                self.db.rows[(row["symbol"], row["timeframe"], row["open_time"])] = row
+            return type("Response", (), {"data": self.rows})()
+        self.db.pages += 1
+        rows = sorted((r for r in self.db.rows.values() if all(f(r) for f in self.filters)),
+                      key=lambda r: r["open_time"])[:self.n]
+        return type("Response", (), {"data": [{c: r[c] for c in self.columns} for r in rows]})()
+
+class FakeClient:
+    def __init__(self):
+        self.rows = {}
+        self.requests = []
+        self.pages = 0
+
+    def table(self, name):
+        return FakeTable(self)
+
+@pytest.fixture
+def manager():
+    mgr = SupabaseManager.__new__(SupabaseManager)
+    mgr.client = FakeClient()
+    return mgr
+
+def minute_bars(n):
+    close = 100 + np.arange(n, dtype=float)
+    return pd.DataFrame({
+        "open_time": 1_704_067_200_000 + np.arange(n) * 60_000,  # 2024-01-01 00:00 UTC
+        "open": close, "high": close + 1, "low": close - 1, "close": close, "volume": np.ones(n),
+    })
+
+class TestMarketDataIO:
+    """Test suite for SupabaseManager market_data bulk I/O"""
+
+    def test_records_from_index_and_ms_column(self):
+        bars = minute_bars(2)
+        by_column = market_data_records("BTCUSDT", "1m", bars)
+        by_index = market_data_records("BTCUSDT", "1m", bars.set_index(pd.to_datetime(bars["open_time"], unit="ms")))
+        assert by_column == by_index
+        assert by_column[1] == {"symbol": "BTCUSDT", "timeframe": "1m", "open_time": "2024-01-01T00:01:00",
+                                "open": 101.0, "high": 102.0, "low": 100.0, "close": 101.0, "volume": 1.0}
+
+    def test_large_upsert_is_chunked(self, manager):
+        assert asyncio.run(manager.save_market_data("BTCUSDT", "1m", minute_bars(2500), chunk_size=1000))
+        assert sorted(manager.client.requests) == [500, 1000, 1000]
+        assert len(manager.client.rows) == 2500
+
+    def test_range_read_pages_with_keyset(self, manager):
+        asyncio.run(manager.save_market_data("BTCUSDT", "1m", minute_bars(2500)))
+        asyncio.run(manager.save_market_data("ETHUSDT", "1m", minute_bars(10)))
+
+        df = asyncio.run(manager.get_market_data_range(
+            "BTCUSDT", "1m", start="2024-01-01T00:10:00", end=1_704_067_200_000 + 2009 * 60_000, page_size=500))
+        assert len(df) == 2000
+        assert manager.client.pages == 5  # 4 full pages + the short one that ends the scan
+        assert df.index[0] == pd.Timestamp("2024-01-01 00:10:00")
+        assert df["close"].iloc[-1] == 100.0 + 2009
+        assert df["close"].dtype == np.float64
+        assert list(df.columns) == ["open", "high", "low", "close", "volume"]
+
+    def test_range_read_projection_and_empty(self, manager):
+        asyncio.run(manager.save_market_data("BTCUSDT", "1m", minute_bars(5)))
+        df = asyncio.run(manager.get_market_data_range("BTCUSDT", "1m", columns=["close"]))
+        assert list(df.columns) == ["close"] and len(df) == 5
+        assert asyncio.run(manager.get_market_data_range("SOLUSDT", "1m")).empty
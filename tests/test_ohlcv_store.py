@@ -0,0 +1,147 @@
+"""
+Unit tests for the local OHLCV store
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import ohlcv_store
+from core.ohlcv_store import OHLCVStore, INTERVAL_MS
+
+STEP = INTERVAL_MS["1m"]
+NOW = 1_700_000_000_000 - (1_700_000_000_000 % STEP) + 30_000  # mid-candle
+
+class FakeExchange:
+    """Serves synthetic 1m klines the way BinanceSpot.klines does"""
+
+    def __init__(self, first_open: int):
+        self.first_open = first_open
+        self.now = NOW  # exchange clock
+        self.calls = []
+
+    def klines(self, symbol, interval, limit=300, start_time=None, end_time=None):
+        self.calls.append((start_time, end_time, limit))
+        live_open = self.now - self.now % STEP
+        if start_time is None:
+            opens = np.arange(live_open - (limit - 1) * STEP, live_open + 1, STEP)
+        else:
+            start = max(start_time, self.first_open)
+            start += (-start) % STEP
+            stop = min(end_time if end_time is not None else live_open, live_open)
+            opens = np.arange(start, stop + 1, STEP)[:limit]
+        opens = opens[opens >= self.first_open]
+        close = 100.0 + (opens - self.first_open) / STEP
+        return pd.DataFrame({
+            "open_time": opens, "open": close, "high": close + 1,
+            "low": close - 1, "close": close, "volume": np.ones(len(opens))
+        })
+
+class TestOHLCVStore:
+    """Test suite for core.ohlcv_store"""
+
+    @pytest.fixture(autouse=True)
+    def frozen_clock(self, monkeypatch):
+        monkeypatch.setattr(ohlcv_store, "_now_ms", lambda: NOW)
+
+    def test_backfill_paginates_and_keeps_closed_bars(self, tmp_path):
+        exchange = FakeExchange(first_open=NOW - NOW % STEP - 2500 * STEP)
+        store = OHLCVStore(exchange, str(tmp_path))
+
+        added = store.sync("BTCUSDT", "1m", start_ms=exchange.first_open)
+        df = store.load("BTCUSDT", "1m")
+
+        assert added == 2500  # live candle excluded
+        assert len(exchange.calls) == 3
+        assert df["open_time"].is_monotonic_increasing
+        assert np.all(np.diff(df["open_time"]) == STEP)
+        assert df.attrs == {"symbol": "BTCUSDT", "interval": "1m"}
+
+    def test_incremental_sync_and_prepend(self, tmp_path):
+        exchange = FakeExchange(first_open=NOW - NOW % STEP - 500 * STEP)
+        store = OHLCVStore(exchange, str(tmp_path))
+        store.sync("BTCUSDT", "1m", start_ms=exchange.first_open + 200 * STEP)
+        assert store.sync("BTCUSDT", "1m") == 0  # nothing new
+
+        assert store.sync("BTCUSDT", "1m", start_ms=exchange.first_open) == 200
+        df = store.load("BTCUSDT", "1m")
+        assert len(df) == 500
+        assert df["open_time"].iloc[0] == exchange.first_open
+
+    def test_range_and_limit(self, tmp_path):
+        exchange = FakeExchange(first_open=NOW - NOW % STEP - 100 * STEP)
+        store = OHLCVStore(exchange, str(tmp_path))
+        store.sync("BTCUSDT", "1m", start_ms=exchange.first_open)
+
+        start = exchange.first_open + 10 * STEP
+        df = store.load("BTCUSDT", "1m", start, start + 9 * STEP)
+        assert len(df) == 10
+        assert df["open_time"].iloc[0] == start
+        assert len(store.load("BTCUSDT", "1m", limit=7)) == 7
+
+    def test_klines_appends_live_candle(self, tmp_path):
+        exchange = FakeExchange(first_open=NOW - NOW % STEP - 1000 * STEP)
+        store = OHLCVStore(exchange, str(tmp_path))
+
+        df = store.klines("BTCUSDT", "1m", limit=50)
+        assert len(df) == 50
+        assert df["open_time"].iloc[-1] == NOW - NOW % STEP
+        assert np.all(np.diff(df["open_time"]) == STEP)
+
+    def test_uneven_columns_are_repaired(self, tmp_path):
+        exchange = FakeExchange(first_open=NOW - NOW % STEP - 20 * STEP)
+        store = OHLCVStore(exchange, str(tmp_path))
+        store.sync("BTCUSDT", "1m", start_ms=exchange.first_open)
+
+        # Simulate a crash after only one column was appended
+        with open(tmp_path / "1m" / "BTCUSDT" / "close.bin", "ab") as f:
+            f.write(np.array([1.0]).tobytes())
+        assert len(store.load("BTCUSDT", "1m")) == 20
+        store.sync("BTCUSDT", "1m")
+        assert (tmp_path / "1m" / "BTCUSDT" / "close.bin").stat().st_size == 20 * 8
+
+    def test_local_clock_ahead_never_stores_live_candle(self, tmp_path, monkeypatch):
+        exchange = FakeExchange(first_open=NOW - NOW % STEP - 10 * STEP)
+        store = OHLCVStore(exchange, str(tmp_path))
+        monkeypatch.setattr(ohlcv_store, "_now_ms", lambda: NOW + STEP)  # local clock a minute fast
+        assert store.sync("BTCUSDT", "1m", start_ms=exchange.first_open) == 10
+        assert store.load("BTCUSDT", "1m")["open_time"].iloc[-1] == NOW - NOW % STEP - STEP
+
+    def test_candle_closing_between_sync_and_live_leaves_no_gap(self, tmp_path):
+        exchange = FakeExchange(first_open=NOW - NOW % STEP - 100 * STEP)
+        store = OHLCVStore(exchange, str(tmp_path))
+        store.sync("BTCUSDT", "1m", start_ms=exchange.first_open)
+        live = exchange.klines
+
+        def klines(symbol, interval, limit=300, start_time=None, end_time=None):
+            exchange.now = NOW + STEP  # a candle closes right after the sync
+            return live(symbol, interval, limit, start_time, end_time)
+
+        exchange.klines = klines
+        df = store.klines("BTCUSDT", "1m", limit=50)
+        assert df["open_time"].iloc[-1] == NOW - NOW % STEP + STEP
+        assert np.all(np.diff(df["open_time"]) == STEP)
+
+    def test_interrupted_prepend_keeps_previous_columns(self, tmp_path, monkeypatch):
+        exchange = FakeExchange(first_open=NOW - NOW % STEP - 50 * STEP)
+        store = OHLCVStore(exchange, str(tmp_path))
+        store.sync("BTCUSDT", "1m", start_ms=exchange.first_open + 20 * STEP)
+        replace = os.replace
+
+        def crash_on_swap(src, dst):
+            if str(src).endswith(".tmp"):
+                raise OSError("killed")
+            replace(src, dst)
+
+        monkeypatch.setattr(ohlcv_store.os, "replace", crash_on_swap)
+        with pytest.raises(OSError):
+            store.sync("BTCUSDT", "1m", start_ms=exchange.first_open)
+        monkeypatch.setattr(ohlcv_store.os, "replace", replace)
+
+        df = store.load("BTCUSDT", "1m")
+        assert len(df) == 30 and df["open_time"].iloc[0] == exchange.first_open + 20 * STEP
+        assert store.sync("BTCUSDT", "1m", start_ms=exchange.first_open) == 20
+        assert sorted(p.name for p in (tmp_path / "1m").iterdir()) == ["BTCUSDT"]
@@ -0,0 +1,96 @@
+"""
+Unit tests for the parallel parameter-sweep optimizer
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtesting import optimizer
+from backtesting.engine import BacktestEngine, BacktestConfig
+from backtesting.optimizer import optimize, build_combinations
+from strategies import sma_crossover
+
+GRID = {"short": [5, 10, 15], "long": [30, 40]}
+
+@pytest.fixture
+def data():
+    """Trending random walk with a tz-aware index, long enough for several crossovers"""
+    rng = np.random.default_rng(7)
+    n = 600
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n) + 0.002 * np.sin(np.arange(n) / 40)))
+    return pd.DataFrame({
+        "open": close * (1 + rng.normal(0, 0.001, n)),
+        "high": close * 1.005,
+        "low": close * 0.995,
+        "close": close,
+        "volume": rng.uniform(1000, 5000, n),
+    }, index=pd.date_range("2024-01-01", periods=n, freq="15min", tz="Asia/Seoul"))
+
+def params_of(table):
+    return [(int(r.short), int(r.long)) for r in table.itertuples()]
+
+class TestOptimizer:
+    """Test suite for backtesting.optimizer"""
+
+    def test_grid_and_random_combinations(self):
+        grid = build_combinations(GRID)
+        assert grid == [{"short": s, "long": l} for s in GRID["short"] for l in GRID["long"]]
+
+        sample = build_combinations(GRID, method="random", n_iter=4, seed=1)
+        assert len(sample) == 4
+        assert all(combo in grid for combo in sample)
+        assert len({tuple(c.values()) for c in sample}) == 4  # drawn without replacement
+        assert sample == build_combinations(GRID, method="random", n_iter=4, seed=1)
+        assert len(build_combinations(GRID, method="random", n_iter=100)) == len(grid)
+
+        with pytest.raises(ValueError):
+            build_combinations(GRID, method="bayes")
+
+    def test_parallel_matches_inline(self, data):
+        inline = optimize(data, "sma_crossover", GRID, max_workers=1)
+        parallel = optimize(data, "sma_crossover", GRID, max_workers=3)
+        assert len(inline) == len(GRID["short"]) * len(GRID["long"])
+        assert "error" not in inline.columns
+        pd.testing.assert_frame_equal(inline, parallel)
+
+        sampled = optimize(data, "sma_crossover", GRID, method="random", n_iter=3, seed=5, max_workers=2)
+        assert len(sampled) == 3
+        assert set(params_of(sampled)) <= set(params_of(inline))
+
+    def test_ranking_matches_run_vectorized(self, data):
+        table = optimize(data, "sma_crossover", GRID, max_workers=2)
+        assert table["rank"].tolist() == list(range(1, len(table) + 1))
+        assert table["sharpe_ratio"].is_monotonic_decreasing
+
+        for row in table.itertuples():
+            params = {"short": int(row.short), "long": int(row.long)}
+            result = BacktestEngine(BacktestConfig()).run_vectorized(
+                data.copy(), lambda df: sma_crossover.signal_series(df, **params))
+            metrics = result["metrics"]
+            assert row.total_trades == metrics["total_trades"]
+            assert row.sharpe_ratio == pytest.approx(metrics["sharpe_ratio"])
+            assert row.total_return == pytest.approx(metrics["total_return"])
+
+    def test_shared_memory_is_released(self, data, monkeypatch):
+        created = []
+
+        class Recording(optimizer.shared_memory.SharedMemory):
+            def __init__(self, name=None, create=False, size=0):
+                super().__init__(name=name, create=create, size=size)
+                if create:
+                    created.append(self.name)
+
+        monkeypatch.setattr(optimizer.shared_memory, "SharedMemory", Recording)
+        optimize(data, "sma_crossover", GRID, max_workers=2)
+        optimize(data, "sma_crossover", GRID, max_workers=1)
+        with pytest.raises(KeyError):  # fails after the segments were created
+            optimize(data.drop(columns="volume"), "sma_crossover", GRID, max_workers=2)
+
+        assert len(created) == 6
+        for name in created:
+            with pytest.raises(FileNotFoundError):
+                Recording(name=name)
@@ -0,0 +1,141 @@
+"""
+Unit tests for locally maintained order books
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.order_book import LocalOrderBook, OrderBookManager, BUY, SELL
+
+SNAPSHOT = {
+    "lastUpdateId": 100,
+    "bids": [["99.0", "1.0"], ["98.0", "2.0"], ["97.0", "5.0"]],
+    "asks": [["101.0", "1.0"], ["102.0", "2.0"], ["103.0", "5.0"]],
+}
+
+def diff(first, last, bids=(), asks=()):
+    return {"e": "depthUpdate", "s": "BTCUSDT", "U": first, "u": last, "b": list(bids), "a": list(asks)}
+
+class FakeWS:
+    def __init__(self):
+        self.callbacks = {}
+
+    def set_queue_policy(self, callback, overflow=None, maxsize=None):
+        pass
+
+    async def subscribe_depth_diff(self, symbol, callback):
+        self.callbacks[f"{symbol.lower()}@depth@100ms"] = callback
+
+    async def remove_callback(self, stream, callback):
+        self.callbacks.pop(stream, None)
+
+    async def emit(self, event):
+        await self.callbacks["btcusdt@depth@100ms"]({"stream_type": "depthUpdate", "raw_data": event})
+
+class FakeClient:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.calls = 0
+
+    async def depth(self, symbol, limit=1000):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return self.snapshot
+
+class TestLocalOrderBook:
+    """Test suite for core.order_book.LocalOrderBook"""
+
+    @pytest.fixture
+    def book(self):
+        book = LocalOrderBook("BTCUSDT")
+        book.apply_snapshot(SNAPSHOT)
+        return book
+
+    def test_snapshot_and_top_of_book(self, book):
+        assert book.best_bid() == (99.0, 1.0)
+        assert book.best_ask() == (101.0, 1.0)
+        assert book.mid() == 100.0
+        assert book.spread() == 2.0
+        assert book.depth(2) == {"bids": [(99.0, 1.0), (98.0, 2.0)], "asks": [(101.0, 1.0), (102.0, 2.0)]}
+
+    def test_microprice_leans_toward_thin_side(self, book):
+        assert book.apply_diff(diff(95, 101, bids=[["99.0", "3.0"]]))
+        # Heavy bid, light ask -> fair price closer to the ask
+        assert book.microprice() == pytest.approx((99.0 * 1.0 + 101.0 * 3.0) / 4.0)
+
+    def test_sequencing(self, book):
+        assert not book.synced
+        assert book.apply_diff(diff(90, 100))  # fully inside the snapshot, ignored
+        assert not book.synced
+        assert book.apply_diff(diff(95, 105, bids=[["99.0", "0"]], asks=[["100.5", "0.5"]]))
+        assert book.synced and book.last_update_id == 105
+        assert book.best_bid() == (98.0, 2.0)
+        assert book.best_ask() == (100.5, 0.5)
+
+        assert book.apply_diff(diff(106, 110))
+        assert not book.apply_diff(diff(112, 115))  # gap
+        assert book.last_update_id == 110
+
+    def test_first_diff_must_straddle_snapshot(self, book):
+        assert not book.apply_diff(diff(102, 105))
+
+    def test_estimate_fill_walks_levels(self, book):
+        fill = book.estimate_fill(BUY, quantity=2.0)
+        assert fill["avg_price"] == pytest.approx(101.5)
+        assert fill["worst_price"] == 102.0
+        assert fill["fully_filled"]
+        assert fill["slippage"] == pytest.approx(0.015)
+
+        fill = book.estimate_fill(SELL, quote_qty=99.0 + 98.0)
+        assert fill["filled_qty"] == pytest.approx(2.0)
+        assert fill["slippage"] == pytest.approx(0.015)
+
+    def test_estimate_fill_beyond_book(self, book):
+        fill = book.estimate_fill(BUY, quantity=100.0)
+        assert not fill["fully_filled"]
+        assert fill["filled_qty"] == pytest.approx(8.0)
+
+class TestOrderBookManager:
+    """Test suite for core.order_book.OrderBookManager"""
+
+    def test_buffers_until_snapshot_then_syncs(self):
+        async def run():
+            ws, client = FakeWS(), FakeClient(SNAPSHOT)
+            manager = OrderBookManager(ws, client)
+            await manager.track("BTCUSDT")
+            await ws.emit(diff(98, 101))
+            await ws.emit(diff(102, 103, asks=[["101.0", "0"]]))  # buffered while syncing
+            await asyncio.sleep(0.01)
+            return manager, client
+
+        manager, client = asyncio.run(run())
+        book = manager.get("BTCUSDT")
+        assert book is not None and book.last_update_id == 103
+        assert book.best_ask() == (102.0, 2.0)
+        assert client.calls == 1
+
+    def test_gap_triggers_resync(self):
+        async def run():
+            ws, client = FakeWS(), FakeClient(SNAPSHOT)
+            manager = OrderBookManager(ws, client)
+            await manager.track("BTCUSDT")
+            await ws.emit(diff(98, 101))
+            await asyncio.sleep(0.01)
+            client.snapshot = {**SNAPSHOT, "lastUpdateId": 120}
+            await ws.emit(diff(110, 121))  # skips 102..109
+            assert manager.get("BTCUSDT") is None
+            await asyncio.sleep(0.01)
+            return manager, client
+
+        manager, client = asyncio.run(run())
+        assert manager.resyncs == 1
+        assert client.calls == 2
+        assert manager.get("BTCUSDT").last_update_id == 121
+
+    def test_estimate_slippage_falls_back_to_snapshot(self):
+        manager = OrderBookManager(None, FakeClient(SNAPSHOT))
+        assert asyncio.run(manager.estimate_slippage("BTCUSDT", BUY, 101.0)) == pytest.approx(0.01)
+        assert asyncio.run(manager.estimate_slippage("BTCUSDT", BUY, 10_000.0)) == float("inf")
@@ -0,0 +1,73 @@
+"""
+Unit tests for the shared price book
+"""
+
+import asyncio
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.price_book import PriceBook
+
+class FakeClient:
+    def __init__(self):
+        self.calls = 0
+
+    def ticker_prices(self):
+        self.calls += 1
+        return {"BTCUSDT": 50000.0, "ETHUSDT": 3000.0}
+
+class TestPriceBook:
+    """Test suite for core.price_book"""
+
+    def test_mini_ticker_array_updates_book(self):
+        book = PriceBook()
+        book.on_mini_ticker({"stream_type": "miniTicker", "tickers": [
+            {"symbol": "BTCUSDT", "price": 50100.0},
+            {"symbol": "ETHUSDT", "price": 3010.0},
+        ]})
+        assert book.get("BTCUSDT") == 50100.0
+        assert book.get("ETHUSDT") == 3010.0
+        assert book.get("SOLUSDT") is None
+
+    def test_book_ticker_uses_mid_price(self):
+        book = PriceBook()
+        book.on_book_ticker({"symbol": "BTCUSDT", "bid_price": 99.0, "ask_price": 101.0})
+        assert book.get("BTCUSDT") == 100.0
+        assert book.quote("BTCUSDT") == (99.0, 101.0)
+
+    def test_stale_price_triggers_single_bulk_refresh(self):
+        book = PriceBook(max_age=0.0, min_refresh_interval=60)
+        client = FakeClient()
+        book.bind(client)
+        book.update("BTCUSDT", 1.0, ts=0.0)  # long stale
+
+        async def read_all():
+            return await asyncio.gather(
+                book.get_price("BTCUSDT"), book.get_price("ETHUSDT"), book.get_price("BTCUSDT"))
+
+        assert asyncio.run(read_all()) == [50000.0, 3000.0, 50000.0]
+        assert client.calls == 1
+
+    def test_throttled_or_failed_refresh_never_serves_expired_price(self):
+        class FailingClient:
+            def ticker_prices(self):
+                raise ConnectionError("exchange unavailable")
+
+        book = PriceBook(max_age=1.0, min_refresh_interval=60, hard_max_age=10.0)
+        now = time.monotonic()
+        book.update("BTCUSDT", 50000.0, ts=now - 5)
+        book.update("ETHUSDT", 3000.0, ts=now - 30)
+
+        book.bind(FailingClient())
+        assert asyncio.run(book.get_price("BTCUSDT")) == 50000.0  # stale but within the hard limit
+        assert asyncio.run(book.get_price("ETHUSDT")) is None
+
+        client = FakeClient()
+        book.bind(client)  # a refresh is due only after min_refresh_interval
+        assert asyncio.run(book.get_price("ETHUSDT")) is None
+        assert client.calls == 0
+
+    def test_missing_symbol_without_client(self):
+        assert asyncio.run(PriceBook().get_price("BTCUSDT")) is None
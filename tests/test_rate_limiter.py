@@ -0,0 +1,113 @@
+"""
+Unit tests for the exchange rate limiter and request coalescer
+"""
+
+import asyncio
+import time
+import pytest
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from binance.error import ClientError
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exchange.binance_client import BinanceRateLimiter, RequestCoalescer, BinanceSpot
+
+class FakeConnector:
+    """Mimics binance.spot.Spot(show_limit_usage=True) responses"""
+
+    def __init__(self, delay: float = 0.1):
+        self.delay = delay
+        self.calls = 0
+
+    def klines(self, symbol, interval, **params):
+        self.calls += 1
+        time.sleep(self.delay)
+        row = [0, "1", "2", "0.5", "1.5", "10", 59_999, "15", 3, "5", "7.5", "0"]
+        return {"limit_usage": {"x-mbx-used-weight-1m": "42"}, "data": [row]}
+
+    def ticker_price(self, symbol):
+        raise ClientError(429, -1003, "Too many requests", {"Retry-After": "30"})
+
+class TestBinanceRateLimiter:
+    """Test suite for exchange.binance_client.BinanceRateLimiter"""
+
+    def test_weight_budget(self):
+        limiter = BinanceRateLimiter(weight_limit=10, safety=1.0)
+        assert limiter.reserve(6) == 0.0
+        assert limiter.reserve(4) == 0.0
+        delay = limiter.reserve(1)
+        assert 0 < delay <= 60.05
+        assert limiter.stats()["throttled"] == 1
+
+    def test_order_budget_is_separate(self):
+        limiter = BinanceRateLimiter(weight_limit=100, order_limit_10s=1, safety=1.0)
+        assert limiter.reserve(1, orders=1) == 0.0
+        assert limiter.reserve(1, orders=1) > 0
+        assert limiter.reserve(1) == 0.0  # non-order requests still pass
+
+    def test_headers_correct_local_count(self):
+        limiter = BinanceRateLimiter(weight_limit=100, safety=1.0)
+        limiter.reserve(2)
+        limiter.update({"X-MBX-USED-WEIGHT-1M": "99", "X-MBX-ORDER-COUNT-10S": "3"})
+        stats = limiter.stats()
+        assert stats["weight"] == 99
+        assert stats["orders_10s"] == 3
+        assert limiter.reserve(2) > 0
+
+    def test_retry_after_blocks_everyone(self):
+        limiter = BinanceRateLimiter()
+        limiter.penalize(429, {"Retry-After": "30"})
+        assert 29 < limiter.reserve(1) <= 30
+
+class TestRequestCoalescer:
+    """Test suite for exchange.binance_client.RequestCoalescer"""
+
+    def test_identical_requests_share_one_call(self):
+        spot = BinanceSpot("", "", limiter=BinanceRateLimiter(), coalescer=RequestCoalescer())
+        spot.client = FakeConnector()
+
+        with ThreadPoolExecutor(4) as pool:
+            frames = list(pool.map(lambda _: spot.klines("BTCUSDT", "1m", 1), range(4)))
+
+        assert spot.client.calls == 1
+        assert spot.coalescer.coalesced == 3
+        assert spot.limiter.stats()["weight"] == 42
+        # Every caller gets its own frame
+        assert len({id(df) for df in frames}) == 4
+        assert all(df.attrs["symbol"] == "BTCUSDT" for df in frames)
+
+    def test_rate_limit_response_is_not_retried(self):
+        spot = BinanceSpot("", "", limiter=BinanceRateLimiter(), coalescer=RequestCoalescer())
+        spot.client = FakeConnector()
+        with pytest.raises(ClientError):
+            spot.ticker_price("BTCUSDT")
+        assert spot.limiter.reserve(1) > 29
+
+    def test_async_coalescing(self):
+        coalescer = RequestCoalescer()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return pd.DataFrame({"close": [1.0]})
+
+        async def main():
+            return await asyncio.gather(*(coalescer.run_async("k", fetch) for _ in range(3)))
+
+        frames = asyncio.run(main())
+        assert len(calls) == 1
+        assert len({id(df) for df in frames}) == 3
+
+    def test_first_caller_gets_a_copy_too(self):
+        coalescer = RequestCoalescer()
+        shared = pd.DataFrame({"close": [1.0]})
+
+        async def fetch():
+            return shared
+
+        assert coalescer.run("k", lambda: shared) is not shared
+        assert asyncio.run(coalescer.run_async("k", fetch)) is not shared
+        assert coalescer.run("k", lambda: {"price": 1.0}) == {"price": 1.0}
@@ -0,0 +1,123 @@
+"""
+Unit tests for the versioned read-through cache
+"""
+
+import asyncio
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.read_cache import ReadThroughCache
+from core.db_writer import SupabaseWriteQueue
+from core.supabase_client import SupabaseManager
+
+class Loader:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+class FakeClient:
+    def table(self, name):
+        return self
+
+    def insert(self, rows):
+        return self
+
+    def execute(self):
+        pass
+
+class TestReadThroughCache:
+    """Test suite for core.read_cache"""
+
+    def test_hit_after_miss_returns_copy(self):
+        cache = ReadThroughCache(ttl=60)
+        loader = Loader([{"id": "s1", "status": "ACTIVE"}])
+        first = cache.get("strategies", "active", loader)
+        first[0]["status"] = "MUTATED"
+        assert cache.get("strategies", "active", loader) == [{"id": "s1", "status": "ACTIVE"}]
+        assert loader.calls == 1
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    def test_invalidate_only_drops_that_table(self):
+        cache = ReadThroughCache(ttl=60)
+        strategies, positions = Loader(["s1"]), Loader(["p1"])
+        cache.get("strategies", "active", strategies)
+        cache.get("positions", ("open", None), positions)
+        cache.invalidate("positions", {"eventType": "UPDATE"})  # realtime callback signature
+        cache.get("strategies", "active", strategies)
+        cache.get("positions", ("open", None), positions)
+        assert (strategies.calls, positions.calls) == (1, 2)
+
+    def test_ttl_expiry(self):
+        cache = ReadThroughCache(ttl=60)
+        loader = Loader(1)
+        cache.get("performance", "latest", loader, ttl=0.01)
+        time.sleep(0.02)
+        cache.get("performance", "latest", loader, ttl=0.01)
+        assert loader.calls == 2
+
+    def test_result_loaded_across_invalidation_is_not_stored(self):
+        cache = ReadThroughCache(ttl=60)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            if len(calls) == 1:
+                cache.invalidate("positions")  # a write lands while the read is in flight
+            return len(calls)
+
+        assert cache.get("positions", "open", loader) == 1
+        assert cache.get("positions", "open", loader) == 2
+        assert cache.get("positions", "open", loader) == 2
+
+    def test_async_get_and_write_queue_invalidation(self):
+        cache = ReadThroughCache(ttl=60)
+        loader = Loader(["p1"])
+
+        async def run():
+            queue = SupabaseWriteQueue(FakeClient(), flush_interval=60, on_write=cache.invalidate)
+            await cache.get_async("positions", "open", loader)
+            await cache.get_async("positions", "open", loader)
+            queue.insert("positions", {"id": "p2"})
+            await queue.close()
+            await cache.get_async("positions", "open", loader)
+
+        asyncio.run(run())
+        assert loader.calls == 2
+        assert cache.version("positions") == 1
+
+    def test_queued_write_invalidates_only_once_written(self):
+        rows = []
+
+        class Table(FakeClient):
+            def insert(self, new_rows):
+                self.new_rows = new_rows
+                return self
+
+            def execute(self):
+                rows.extend(self.new_rows)
+
+        manager = SupabaseManager.__new__(SupabaseManager)
+        manager.cache = ReadThroughCache(ttl=60)
+        seen = []
+
+        def loader():
+            seen.append(list(rows))
+            return list(rows)
+
+        async def run():
+            manager.writer = SupabaseWriteQueue(Table(), flush_interval=60, on_write=manager.cache.invalidate)
+            await manager.cache.get_async("positions", "open", loader)
+            await manager._insert("positions", {"id": "p1"})
+            # Not written yet: a re-read now must not cache the old rows as fresh
+            await manager.cache.get_async("positions", "open", loader)
+            await manager.writer.close()
+            return await manager.cache.get_async("positions", "open", loader)
+
+        assert asyncio.run(run()) == [{"id": "p1"}]
+        assert seen == [[], [{"id": "p1"}]]
@@ -0,0 +1,79 @@
+"""
+Unit tests for the market scanner
+"""
+
+import asyncio
+import threading
+import time
+import pandas as pd
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.scanner import scan_symbols, scan_symbols_concurrent
+
+def make_klines(seed: int, n: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        'open_time': np.arange(n) * 900_000,
+        'open': close,
+        'high': close + 1,
+        'low': close - 1,
+        'close': close,
+        'volume': np.ones(n)
+    })
+
+SYMBOLS = [f"SYM{i}USDT" for i in range(12)]
+
+class TestConcurrentScanner:
+    """Test suite for core.scanner.scan_symbols_concurrent"""
+
+    def test_matches_sequential_scan(self):
+        def fetch(sym, interval):
+            if sym == "SYM3USDT":
+                raise RuntimeError("boom")
+            return make_klines(int(sym[3:-4]))
+
+        expected = scan_symbols(fetch, SYMBOLS)
+        with ThreadPoolExecutor(2) as pool:
+            result = asyncio.run(scan_symbols_concurrent(fetch, SYMBOLS, executor=pool))
+
+        key = ["symbol", "score", "rsi", "adx"]
+        pd.testing.assert_frame_equal(
+            result[key].sort_values("symbol").reset_index(drop=True),
+            expected[key].sort_values("symbol").reset_index(drop=True)
+        )
+        assert result.iloc[-1]["symbol"] == "SYM3USDT"
+
+    def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def fetch(sym, interval):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.05)
+            with lock:
+                state["active"] -= 1
+            return make_klines(1)
+
+        with ThreadPoolExecutor(2) as pool:
+            start = time.monotonic()
+            asyncio.run(scan_symbols_concurrent(fetch, SYMBOLS, max_concurrency=4, executor=pool))
+            elapsed = time.monotonic() - start
+
+        assert state["peak"] == 4
+        assert elapsed < 12 * 0.05
+
+    def test_async_fetch_is_awaited(self):
+        async def fetch(sym, interval):
+            await asyncio.sleep(0)
+            return make_klines(2)
+
+        with ThreadPoolExecutor(1) as pool:
+            result = asyncio.run(scan_symbols_concurrent(fetch, SYMBOLS[:3], executor=pool))
+        assert "error" not in result.columns
@@ -0,0 +1,145 @@
+"""
+Unit tests for the in-memory state store
+"""
+
+import json
+import time
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.state import StateStore
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "state.json"), str(tmp_path / "scan_result.json")
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+class TestStateStore:
+    """Test suite for utils.state"""
+
+    def test_reads_from_memory_and_writes_debounced(self, paths):
+        state_path, scan_path = paths
+        store = StateStore(state_path, scan_path, debounce=60)
+        assert store.get("auto_enabled") is False
+        store.set(auto_enabled=True)
+        store.set(selected_symbol="ETHUSDT")
+        assert store.get()["selected_symbol"] == "ETHUSDT"
+        assert not os.path.exists(state_path)  # still inside the debounce window
+
+        store.flush()
+        assert read(state_path)["selected_symbol"] == "ETHUSDT"
+        assert "scan_result" not in read(state_path)
+        assert not os.path.exists(scan_path)  # scan result untouched, not rewritten
+
+    def test_scan_result_is_separate_artifact(self, paths):
+        state_path, scan_path = paths
+        store = StateStore(state_path, scan_path, debounce=60)
+        store.set(scan_result=[{"symbol": "BTCUSDT", "score": 2.0}])
+        store.flush()
+        assert read(scan_path) == [{"symbol": "BTCUSDT", "score": 2.0}]
+        assert not os.path.exists(state_path)
+
+        reloaded = StateStore(state_path, scan_path)
+        assert reloaded.get("scan_result") == [{"symbol": "BTCUSDT", "score": 2.0}]
+        assert reloaded.get("selected_strategy") == "sma_crossover"
+
+    def test_migrates_embedded_scan_result(self, paths):
+        state_path, scan_path = paths
+        with open(state_path, "w", encoding="utf-8") as f:
+            json.dump({"auto_enabled": True, "scan_result": [{"symbol": "SOLUSDT"}]}, f)
+        store = StateStore(state_path, scan_path, debounce=60)
+        assert store.get("scan_result") == [{"symbol": "SOLUSDT"}]
+        store.flush()
+        assert read(state_path)["auto_enabled"] is True and "scan_result" not in read(state_path)
+        assert read(scan_path) == [{"symbol": "SOLUSDT"}]
+
+    def test_timer_flushes(self, paths):
+        state_path, scan_path = paths
+        store = StateStore(state_path, scan_path, debounce=0.01)
+        store.set(selected_strategy="bb_breakout")
+        deadline = time.time() + 2
+        while not os.path.exists(state_path) and time.time() < deadline:
+            time.sleep(0.01)
+        assert read(state_path)["selected_strategy"] == "bb_breakout"
+
+    def test_watchers_get_only_real_changes(self, paths):
+        store = StateStore(*paths, debounce=60)
+        seen, flags = [], []
+        store.watch(seen.append)
+        unwatch = store.watch(flags.append, keys=("auto_enabled",))
+        store.set(auto_enabled=False)  # unchanged
+        store.set(auto_enabled=True, selected_symbol="XRPUSDT")
+        store.set(selected_symbol="ADAUSDT")
+        unwatch()
+        store.set(auto_enabled=False)
+        assert seen == [{"auto_enabled": True, "selected_symbol": "XRPUSDT"},
+                        {"selected_symbol": "ADAUSDT"}, {"auto_enabled": False}]
+        assert flags == [{"auto_enabled": True, "selected_symbol": "XRPUSDT"}]
+
+    def test_writes_do_not_hold_the_state_lock(self, paths, monkeypatch):
+        import threading
+        from utils import state as state_module
+        store = StateStore(*paths, debounce=60)
+        store.set(selected_symbol="ETHUSDT")
+        writing, release = threading.Event(), threading.Event()
+        write_atomic = state_module._write_atomic
+
+        def slow_write(path, data):
+            writing.set()
+            release.wait(timeout=5)
+            write_atomic(path, data)
+
+        monkeypatch.setattr(state_module, "_write_atomic", slow_write)
+        flusher = threading.Thread(target=store.flush)
+        flusher.start()
+        assert writing.wait(timeout=5)
+        setter = threading.Thread(target=store.set, kwargs={"selected_symbol": "SOLUSDT"})
+        setter.start()
+        setter.join(timeout=1)
+        assert not setter.is_alive()  # set() is not blocked behind the disk write
+        release.set()
+        flusher.join(timeout=5)
+        assert read(paths[0])["selected_symbol"] == "ETHUSDT"
+
+        store.flush()  # the change made during the write is still pending
+        assert read(paths[0])["selected_symbol"] == "SOLUSDT"
+
+    def test_failed_write_stays_dirty(self, paths, monkeypatch):
+        from utils import state as state_module
+        store = StateStore(*paths, debounce=60)
+        store.set(auto_enabled=True)
+
+        def failing_write(path, data):
+            raise OSError("disk full")
+
+        write_atomic = state_module._write_atomic
+        monkeypatch.setattr(state_module, "_write_atomic", failing_write)
+        store.flush()
+        monkeypatch.setattr(state_module, "_write_atomic", write_atomic)
+        store.flush()
+        assert read(paths[0])["auto_enabled"] is True
+
+    def test_failed_write_is_retried_without_another_set(self, paths, monkeypatch):
+        from utils import state as state_module
+        store = StateStore(*paths, debounce=0.01)
+        write_atomic = state_module._write_atomic
+        attempts = []
+
+        def flaky_write(path, data):
+            attempts.append(path)
+            if len(attempts) == 1:
+                raise OSError("disk full")
+            write_atomic(path, data)
+
+        monkeypatch.setattr(state_module, "_write_atomic", flaky_write)
+        store.set(auto_enabled=True)
+        deadline = time.time() + 2
+        while not os.path.exists(paths[0]) and time.time() < deadline:
+            time.sleep(0.01)
+        assert read(paths[0])["auto_enabled"] is True
+        assert len(attempts) == 2 and store._failures == 0
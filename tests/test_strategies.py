@@ -13,6 +13,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from strategies.sma_crossover import sma_crossover_signal
 from strategies.rsi_reversion import rsi_reversion_signal
 from strategies.bb_breakout import bb_breakout_signal
+from strategies import sma_crossover, rsi_reversion, bb_breakout
 
 class TestStrategies:
     """Test suite for trading strategies"""
@@ -97,9 +98,9 @@ class TestStrategies:
         
         # In strong uptrend, should eventually generate BUY signal
         # Check if fast SMA is above slow SMA at the end
-        from core.indicators import calculate_sma
-        sma_fast = calculate_sma(bullish_trend_data['close'], 20)
-        sma_slow = calculate_sma(bullish_trend_data['close'], 50)
+        from core.indicators import sma
+        sma_fast = sma(bullish_trend_data['close'], 20)
+        sma_slow = sma(bullish_trend_data['close'], 50)
         
         if not sma_fast.isna().iloc[-1] and not sma_slow.isna().iloc[-1]:
             if sma_fast.iloc[-1] > sma_slow.iloc[-1]:
@@ -113,9 +114,9 @@ class TestStrategies:
         assert signal in ['BUY', 'SELL', 'HOLD']
         
         # In strong downtrend, should eventually generate SELL signal
-        from core.indicators import calculate_sma
-        sma_fast = calculate_sma(bearish_trend_data['close'], 20)
-        sma_slow = calculate_sma(bearish_trend_data['close'], 50)
+        from core.indicators import sma
+        sma_fast = sma(bearish_trend_data['close'], 20)
+        sma_slow = sma(bearish_trend_data['close'], 50)
         
         if not sma_fast.isna().iloc[-1] and not sma_slow.isna().iloc[-1]:
             if sma_fast.iloc[-1] < sma_slow.iloc[-1]:
@@ -237,4 +238,21 @@ class TestStrategies:
         signal1 = strategy_func(bullish_trend_data)
         signal2 = strategy_func(bullish_trend_data)
         
-        assert signal1 == signal2  # Should be deterministic
\ No newline at end of file
+        assert signal1 == signal2  # Should be deterministic
+    
+    @pytest.mark.parametrize("strategy_module,aux_column", [
+        (sma_crossover, "trend_up"),
+        (rsi_reversion, "rsi"),
+        (bb_breakout, "width")
+    ])
+    def test_signal_series_matches_signal(self, strategy_module, aux_column, sideways_data):
+        """Every row of signal_series equals signal() on the frame up to that row"""
+        series = strategy_module.signal_series(sideways_data)
+        
+        assert list(series.index) == list(sideways_data.index)
+        assert {"buy", "sell", aux_column} <= set(series.columns)
+        
+        for i in range(60, len(sideways_data)):
+            expected = strategy_module.signal(sideways_data.iloc[:i + 1])
+            assert bool(series["buy"].iloc[i]) == expected["buy"]
+            assert bool(series["sell"].iloc[i]) == expected["sell"]
@@ -0,0 +1,100 @@
+"""
+Unit tests for streaming (incremental) indicators
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.indicators import sma, ema, rsi, bbands, atr, adx
+from core.streaming_indicators import (
+    StreamingSMA, StreamingEMA, StreamingRSI,
+    StreamingBBands, StreamingATR, StreamingADX, warm_up
+)
+
+class TestStreamingIndicators:
+    """Streaming indicators must reproduce the batch functions bar by bar"""
+
+    @pytest.fixture
+    def sample_data(self):
+        """Generate sample OHLCV data for testing"""
+        np.random.seed(7)
+        n = 400
+        close_prices = 45000 + np.cumsum(np.random.randn(n) * 100)
+
+        df = pd.DataFrame({
+            'open': close_prices + np.random.randn(n) * 50,
+            'high': close_prices + abs(np.random.randn(n) * 100),
+            'low': close_prices - abs(np.random.randn(n) * 100),
+            'close': close_prices,
+            'volume': np.random.uniform(100, 1000, n)
+        })
+        df['high'] = df[['open', 'high', 'close']].max(axis=1)
+        df['low'] = df[['open', 'low', 'close']].min(axis=1)
+        return df
+
+    @staticmethod
+    def _stream_close(indicator, series):
+        return np.array([indicator.update(x) for x in series])
+
+    @staticmethod
+    def _stream_ohlc(indicator, df):
+        return np.array([indicator.update(h, l, c)
+                         for h, l, c in zip(df['high'], df['low'], df['close'])])
+
+    def test_sma_matches_batch(self, sample_data):
+        expected = sma(sample_data['close'], 20).to_numpy()
+        got = self._stream_close(StreamingSMA(20), sample_data['close'])
+        np.testing.assert_allclose(got, expected, rtol=1e-9, equal_nan=True)
+
+    def test_ema_matches_batch(self, sample_data):
+        expected = ema(sample_data['close'], 20).to_numpy()
+        got = self._stream_close(StreamingEMA(20), sample_data['close'])
+        np.testing.assert_allclose(got, expected, rtol=1e-9, equal_nan=True)
+
+    def test_ema_with_nan_gap(self, sample_data):
+        series = sample_data['close'].copy()
+        series[30:34] = np.nan
+        expected = ema(series, 10).to_numpy()
+        got = self._stream_close(StreamingEMA(10), series)
+        np.testing.assert_allclose(got, expected, rtol=1e-9, equal_nan=True)
+
+    def test_rsi_matches_batch(self, sample_data):
+        expected = rsi(sample_data['close'], 14).to_numpy()
+        got = self._stream_close(StreamingRSI(14), sample_data['close'])
+        np.testing.assert_allclose(got, expected, rtol=1e-9, equal_nan=True)
+
+    def test_rsi_is_neutral_on_flat_prices(self):
+        flat = pd.Series(np.full(20, 45000.0))
+        expected = rsi(flat, 14).to_numpy()
+        assert np.isnan(expected[0]) and np.all(expected[1:] == 50.0)
+        np.testing.assert_array_equal(self._stream_close(StreamingRSI(14), flat), expected)
+
+    def test_bbands_matches_batch(self, sample_data):
+        expected = np.column_stack([s.to_numpy() for s in bbands(sample_data['close'], 20, 2.0)])
+        stream = StreamingBBands(20, 2.0)
+        got = np.array([stream.update(x) for x in sample_data['close']])
+        np.testing.assert_allclose(got, expected, rtol=1e-7, equal_nan=True)
+
+    def test_atr_matches_batch(self, sample_data):
+        expected = atr(sample_data, 14).to_numpy()
+        got = self._stream_ohlc(StreamingATR(14), sample_data)
+        np.testing.assert_allclose(got, expected, rtol=1e-9, equal_nan=True)
+
+    def test_adx_matches_batch(self, sample_data):
+        expected = adx(sample_data, 14).to_numpy()
+        got = self._stream_ohlc(StreamingADX(14), sample_data)
+        np.testing.assert_allclose(got, expected, rtol=1e-7, equal_nan=True)
+
+    def test_warm_up_then_continue(self, sample_data):
+        """Seeding from history then streaming the rest equals batch on the whole frame"""
+        head, tail = sample_data.iloc[:300], sample_data.iloc[300:]
+        stream = StreamingATR(14)
+        warm_up(stream, head)
+        last = None
+        for h, l, c in zip(tail['high'], tail['low'], tail['close']):
+            last = stream.update(h, l, c)
+        assert abs(last - atr(sample_data, 14).iloc[-1]) < 1e-6
@@ -0,0 +1,147 @@
+"""
+Unit tests for the event-driven auto-trading loop
+"""
+
+import asyncio
+import time
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import trader
+from core.trader import run_auto_loop_ws
+
+STEP = 60_000
+
+class FakeWSManager:
+    """Records callbacks the way BinanceWebSocketManager stores them"""
+
+    def __init__(self):
+        self.callbacks = {}
+
+    async def _add(self, stream, callback):
+        self.callbacks.setdefault(stream, []).append(callback)
+
+    async def subscribe_kline(self, symbol, interval, callback):
+        await self._add(f"{symbol.lower()}@kline_{interval}", callback)
+
+    async def subscribe_trade(self, symbol, callback):
+        await self._add(f"{symbol.lower()}@trade", callback)
+
+    async def subscribe_book_ticker(self, symbol, callback):
+        await self._add(f"{symbol.lower()}@bookTicker", callback)
+
+    def set_queue_policy(self, callback, overflow=None, maxsize=None):
+        pass
+
+    async def remove_callback(self, stream, callback):
+        self.callbacks[stream].remove(callback)
+
+    async def emit(self, stream, data):
+        for callback in self.callbacks.get(stream, []):
+            await callback(data)
+
+class TestRunAutoLoopWS:
+    """Test suite for core.trader.run_auto_loop_ws"""
+
+    @pytest.fixture
+    def history(self):
+        now = int(time.time() * 1000)
+        last_open = now - now % STEP
+        opens = last_open - np.arange(100, -1, -1) * STEP  # 100 closed bars + live bar
+        close = np.full(len(opens), 100.0)
+        return pd.DataFrame({
+            "open_time": opens, "open": close, "high": close + 1,
+            "low": close - 1, "close": close, "volume": np.ones(len(opens))
+        })
+
+    def test_buys_on_close_and_exits_on_tick(self, history, monkeypatch):
+        evaluations = []
+
+        def sma_signal(df, *args):
+            evaluations.append(len(df))
+            return {"buy": True, "sell": False, "trend_up": True}
+
+        monkeypatch.setitem(trader.STRATEGIES, "sma_crossover", sma_signal)
+        monkeypatch.setitem(trader.STRATEGIES, "rsi_reversion", lambda df, *a: {"buy": False, "sell": False})
+
+        ws = FakeWSManager()
+        orders, logs = [], []
+        flag = {"on": True}
+
+        async def send_log(msg):
+            logs.append(msg)
+
+        async def scenario():
+            task = asyncio.create_task(run_auto_loop_ws(
+                ws, lambda s, i: history,
+                lambda s, q: orders.append(("BUY", q)),
+                lambda s, q: orders.append(("SELL", q)),
+                "BTCUSDT", "1m", 100.0, 2.0, 1.5, lambda: flag["on"], send_log
+            ))
+            while "btcusdt@bookTicker" not in ws.callbacks:
+                await asyncio.sleep(0.01)
+
+            bar = {"open_time": int(history["open_time"].iloc[-1]), "open": 100.0, "high": 101.0,
+                   "low": 99.0, "close": 100.0, "volume": 1.0}
+            await ws.emit("btcusdt@kline_1m", {**bar, "is_closed": False})
+            assert evaluations == []  # in-progress candle is ignored
+
+            await ws.emit("btcusdt@kline_1m", {**bar, "is_closed": True})
+            assert orders == [("BUY", 100.0)]
+            assert evaluations == [101]  # seeded closed bars + the new one
+
+            await ws.emit("btcusdt@bookTicker", {"bid_price": 101.0})
+            assert len(orders) == 1  # inside TP/SL band
+            await ws.emit("btcusdt@bookTicker", {"bid_price": 110.0})
+            assert orders[-1] == ("SELL", pytest.approx(1.0))
+
+            flag["on"] = False
+            await asyncio.wait_for(task, 3)
+
+        asyncio.run(scenario())
+        assert all(not cbs for cbs in ws.callbacks.values())
+        assert any("TP" in msg for msg in logs)
+
+    def test_failed_sell_keeps_position(self, history, monkeypatch):
+        monkeypatch.setitem(trader.STRATEGIES, "sma_crossover",
+                            lambda df, *a: {"buy": True, "sell": False, "trend_up": True})
+        monkeypatch.setitem(trader.STRATEGIES, "rsi_reversion", lambda df, *a: {"buy": False, "sell": False})
+
+        ws = FakeWSManager()
+        orders, logs = [], []
+        flag = {"on": True}
+        failures = {"left": 1}
+
+        def sell(symbol, qty):
+            if failures["left"]:
+                failures["left"] -= 1
+                raise ConnectionError("exchange unavailable")
+            orders.append(("SELL", qty))
+
+        async def send_log(msg):
+            logs.append(msg)
+
+        async def scenario():
+            task = asyncio.create_task(run_auto_loop_ws(
+                ws, lambda s, i: history, lambda s, q: orders.append(("BUY", q)), sell,
+                "BTCUSDT", "1m", 100.0, 2.0, 1.5, lambda: flag["on"], send_log
+            ))
+            while "btcusdt@bookTicker" not in ws.callbacks:
+                await asyncio.sleep(0.01)
+            bar = {"open_time": int(history["open_time"].iloc[-1]), "open": 100.0, "high": 101.0,
+                   "low": 99.0, "close": 100.0, "volume": 1.0, "is_closed": True}
+            await ws.emit("btcusdt@kline_1m", bar)
+            await ws.emit("btcusdt@bookTicker", {"bid_price": 110.0})
+            assert orders == [("BUY", 100.0)]  # sell failed, position kept
+            await ws.emit("btcusdt@bookTicker", {"bid_price": 110.0})
+            assert orders[-1] == ("SELL", pytest.approx(1.0))
+
+            flag["on"] = False
+            await asyncio.wait_for(task, 3)
+
+        asyncio.run(scenario())
+        assert any("매도 실패" in msg for msg in logs)
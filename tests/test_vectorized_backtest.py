@@ -0,0 +1,114 @@
+"""
+Unit tests for the array-based backtest simulation
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtesting.engine import BacktestEngine, BacktestConfig
+from backtesting.vectorized import simulate, to_signal_array, BUY, SELL, HOLD
+from strategies import sma_crossover, rsi_reversion, bb_breakout
+
+def make_config(**overrides):
+    """BacktestConfig with fixed percentage stops unless overridden"""
+    return BacktestConfig(**{"use_atr_stops": False, **overrides})
+
+@pytest.fixture
+def market_data():
+    """Oscillating random walk, so every strategy trades and stops get hit"""
+    rng = np.random.default_rng(11)
+    n = 400
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.008, n)) + 0.08 * np.sin(np.arange(n) / 15))
+    spread = np.abs(rng.normal(0, 0.006, n))
+    return pd.DataFrame({
+        "open": np.r_[close[0], close[:-1]],
+        "high": close * (1 + spread),
+        "low": close * (1 - spread),
+        "close": close,
+        "volume": rng.uniform(1000, 5000, n),
+    }, index=pd.date_range("2024-01-01", periods=n, freq="15min"))
+
+class TestVectorizedBacktest:
+    """Test suite for backtesting.vectorized"""
+
+    def test_signal_normalization(self):
+        frame = pd.DataFrame({"buy": [True, False, True], "sell": [False, True, True]})
+        assert to_signal_array(frame, 3).tolist() == [BUY, SELL, BUY]
+        assert to_signal_array(np.array(["HOLD", "BUY", "SELL"]), 3).tolist() == [HOLD, BUY, SELL]
+        assert to_signal_array([0.0, 2.0, -1.0], 3).tolist() == [HOLD, BUY, SELL]
+
+        with pytest.raises(ValueError):
+            to_signal_array([1, 0], 3)
+
+    def test_signal_exit(self):
+        close = np.array([100.0, 100.0, 101.0, 102.0, 103.0])
+        signals = np.array([HOLD, BUY, HOLD, SELL, HOLD], dtype=np.int8)
+        result = simulate(close, close + 0.5, close - 0.5, None, signals, make_config(), warmup=0)
+
+        assert len(result["trades"]) == 1
+        trade = result["trades"][0]
+        assert (trade["entry_idx"], trade["exit_idx"]) == (1, 3)
+        assert trade["exit_reason"] == "signal"
+        assert trade["pnl"] > 0
+        # Initial capital plus one equity point per simulated bar
+        assert len(result["equity_curve"]) == len(close) + 1
+
+    def test_stop_loss_and_take_profit(self):
+        close = np.array([100.0, 100.0, 99.0, 100.0, 100.0, 100.0])
+        low = close - 0.1
+        high = close + 0.1
+        low[2] = 97.0    # below the 2% stop
+        high[5] = 105.0  # above the 4% target
+        signals = np.array([BUY, HOLD, HOLD, BUY, HOLD, HOLD], dtype=np.int8)
+        result = simulate(close, high, low, None, signals, make_config(), warmup=0)
+
+        reasons = [t["exit_reason"] for t in result["trades"]]
+        assert reasons == ["stop_loss", "take_profit"]
+
+    def test_open_position_closed_at_end(self):
+        close = np.linspace(100, 101, 10)
+        signals = np.zeros(10, dtype=np.int8)
+        signals[3] = BUY
+        result = simulate(close, close, close, None, signals, make_config(), warmup=0)
+
+        assert result["trades"][-1]["exit_reason"] == "end_of_data"
+        assert result["trades"][-1]["exit_idx"] == 9
+
+    def test_no_trades_before_warmup(self):
+        close = np.full(60, 100.0)
+        signals = np.full(60, BUY, dtype=np.int8)
+        signals[50:] = HOLD
+        result = simulate(close, close, close, None, signals, make_config(), warmup=50)
+
+        assert result["trades"] == []
+        assert np.all(result["equity_curve"] == 10000)
+
+    @pytest.mark.parametrize("config", [
+        BacktestConfig(use_atr_stops=False),
+        BacktestConfig(use_atr_stops=True),
+        BacktestConfig(use_atr_stops=False, stop_loss_pct=0.5, take_profit_pct=1.0)  # signal exits
+    ], ids=["pct_stops", "atr_stops", "wide_stops"])
+    @pytest.mark.parametrize("strategy_module,signal_func", [
+        (sma_crossover, sma_crossover.sma_crossover_signal),
+        (rsi_reversion, rsi_reversion.rsi_reversion_signal),
+        (bb_breakout, bb_breakout.bb_breakout_signal)
+    ])
+    def test_run_vectorized_matches_per_bar_run(self, strategy_module, signal_func, config, market_data):
+        loop = BacktestEngine(config).run(market_data.copy(), lambda df, i: signal_func(df))
+        vectorized = BacktestEngine(config).run_vectorized(market_data.copy(), strategy_module.signal_series)
+
+        assert loop["metrics"]["total_trades"] > 0
+        assert vectorized["metrics"] == pytest.approx(loop["metrics"])
+        assert len(vectorized["trades"]) == len(loop["trades"])
+        for got, expected in zip(vectorized["trades"], loop["trades"]):
+            assert got["entry_time"] == expected["entry_time"]
+            assert got["exit_time"] == expected["exit_time"]
+            assert got["exit_reason"] == expected["exit_reason"]
+            assert got["entry_price"] == pytest.approx(expected["entry_price"])
+            assert got["exit_price"] == pytest.approx(expected["exit_price"])
+            assert got["pnl"] == pytest.approx(expected["pnl"])
+        np.testing.assert_allclose(vectorized["equity_curve"], loop["equity_curve"])
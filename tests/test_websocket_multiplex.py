@@ -0,0 +1,102 @@
+"""
+Unit tests for the multiplexed WebSocket mode
+"""
+
+import asyncio
+import json
+import pytest
+import websockets
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.websocket_manager import BinanceWebSocketManager
+
+class FakeBinanceStreamServer:
+    """Minimal /stream endpoint honouring SUBSCRIBE/UNSUBSCRIBE frames"""
+
+    def __init__(self):
+        self.connections = []
+        self.frames = []
+
+    async def handler(self, websocket):
+        subscribed = set()
+        self.connections.append((websocket, subscribed))
+        async for message in websocket:
+            frame = json.loads(message)
+            self.frames.append(frame)
+            if frame["method"] == "SUBSCRIBE":
+                subscribed.update(frame["params"])
+            else:
+                subscribed.difference_update(frame["params"])
+            await websocket.send(json.dumps({"result": None, "id": frame["id"]}))
+
+    async def publish(self, stream, data):
+        for websocket, subscribed in self.connections:
+            if stream in subscribed:
+                await websocket.send(json.dumps({"stream": stream, "data": data}))
+
+async def wait_for(predicate, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+def run_with_server(scenario, **manager_kwargs):
+    async def main():
+        fake = FakeBinanceStreamServer()
+        async with websockets.serve(fake.handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            manager = BinanceWebSocketManager(multiplex=True, **manager_kwargs)
+            manager.base_url = f"ws://127.0.0.1:{port}"
+            try:
+                await scenario(manager, fake)
+            finally:
+                await manager.close_all()
+    asyncio.run(main())
+
+class TestMultiplexedWebSocket:
+    """Test suite for BinanceWebSocketManager(multiplex=True)"""
+
+    def test_streams_share_one_connection(self):
+        async def scenario(manager, fake):
+            received = []
+            for symbol in ["BTCUSDT", "ETHUSDT", "SOLUSDT"]:
+                await manager.subscribe_trade(symbol, received.append)
+
+            await wait_for(lambda: fake.connections and len(fake.connections[0][1]) == 3)
+            assert len(fake.connections) == 1
+            assert {f["method"] for f in fake.frames} == {"SUBSCRIBE"}
+
+            await fake.publish("ethusdt@trade", {"s": "ETHUSDT", "p": "3000.5", "q": "1", "t": 7})
+            await wait_for(lambda: received)
+            assert received[0]["symbol"] == "ETHUSDT"
+            assert received[0]["price"] == 3000.5
+        run_with_server(scenario)
+
+    def test_unsubscribe_sends_control_frame_without_reconnect(self):
+        async def scenario(manager, fake):
+            callback = lambda data: None
+            await manager.subscribe_trade("BTCUSDT", callback)
+            await manager.subscribe_trade("ETHUSDT", callback)
+            await wait_for(lambda: fake.connections and len(fake.connections[0][1]) == 2)
+
+            await manager.remove_callback("btcusdt@trade", callback)
+            await wait_for(lambda: fake.connections[0][1] == {"ethusdt@trade"})
+            assert fake.frames[-1]["method"] == "UNSUBSCRIBE"
+            assert len(fake.connections) == 1
+            assert "btcusdt@trade" not in manager.callbacks
+        run_with_server(scenario)
+
+    def test_streams_are_sharded_across_pool(self):
+        async def scenario(manager, fake):
+            for i in range(6):
+                await manager.subscribe_trade(f"SYM{i}USDT", lambda data: None)
+            await wait_for(lambda: sum(len(s) for _, s in fake.connections) == 6)
+
+            assert len(fake.connections) == 2
+            assert sorted(len(s) for _, s in fake.connections) == [3, 3]
+            with pytest.raises(RuntimeError):
+                for i in range(6, 9):
+                    await manager.subscribe_trade(f"SYM{i}USDT", lambda data: None)
+        run_with_server(scenario, max_streams_per_connection=4, max_connections=2)
@@ -0,0 +1,138 @@
+"""
+Unit tests for per-subscriber WebSocket queues
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.websocket_manager import BinanceWebSocketManager
+
+def trade(symbol, price):
+    return {"e": "trade", "E": 1700000000000, "s": symbol, "p": str(price), "q": "1", "t": 1, "m": False}
+
+async def drain(manager, callback):
+    subscriber = manager._subscribers[callback]
+    while subscriber._queue:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.01)
+
+class TestSubscriberQueues:
+    """Test suite for BinanceWebSocketManager subscriber queues"""
+
+    def test_slow_consumer_does_not_stall_reader(self):
+        async def scenario():
+            manager = BinanceWebSocketManager(fast_decode=True, queue_size=3)
+            gate = asyncio.Event()
+            seen = []
+
+            async def slow(event):
+                await gate.wait()
+                seen.append(event["price"])
+
+            manager.callbacks["btcusdt@trade"] = [slow]
+            for price in range(10):
+                await asyncio.wait_for(manager._dispatch("btcusdt@trade", "trade", trade("BTCUSDT", price)), 1)
+
+            stats = next(iter(manager.queue_stats().values()))
+            gate.set()
+            await drain(manager, slow)
+            await manager.close_all()
+            return seen, stats
+
+        seen, stats = asyncio.run(scenario())
+        # First event was taken by the consumer before the queue filled; the rest keep the newest 3
+        assert seen == [0.0, 7.0, 8.0, 9.0]
+        assert stats["dropped"] == 6
+        assert stats["depth"] == 3
+
+    def test_conflate_keeps_latest_per_symbol(self):
+        async def scenario():
+            manager = BinanceWebSocketManager(fast_decode=True)
+            gate = asyncio.Event()
+            seen = []
+
+            async def consumer(event):
+                await gate.wait()
+                seen.append((event["symbol"], event["price"]))
+
+            manager.set_queue_policy(consumer, overflow="conflate")
+            manager.callbacks["btcusdt@trade"] = [consumer]
+            manager.callbacks["ethusdt@trade"] = [consumer]
+            await manager._dispatch("btcusdt@trade", "trade", trade("BTCUSDT", 1))
+            await asyncio.sleep(0)  # consumer picks up the first event and waits
+            for price in (2, 3, 4):
+                await manager._dispatch("btcusdt@trade", "trade", trade("BTCUSDT", price))
+                await manager._dispatch("ethusdt@trade", "trade", trade("ETHUSDT", price * 10))
+            gate.set()
+            await drain(manager, consumer)
+            stats = manager._subscribers[consumer].stats()
+            await manager.close_all()
+            return seen, stats
+
+        seen, stats = asyncio.run(scenario())
+        assert seen == [("BTCUSDT", 1.0), ("BTCUSDT", 4.0), ("ETHUSDT", 40.0)]
+        assert stats["conflated"] == 4
+
+    def test_block_policy_applies_backpressure(self):
+        async def scenario():
+            manager = BinanceWebSocketManager(fast_decode=True)
+            gate = asyncio.Event()
+            seen = []
+
+            async def consumer(event):
+                await gate.wait()
+                seen.append(event["price"])
+
+            manager.set_queue_policy(consumer, overflow="block", maxsize=1)
+            manager.callbacks["btcusdt@trade"] = [consumer]
+            await manager._dispatch("btcusdt@trade", "trade", trade("BTCUSDT", 1))
+            await asyncio.sleep(0)
+            await manager._dispatch("btcusdt@trade", "trade", trade("BTCUSDT", 2))
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    asyncio.shield(manager._dispatch("btcusdt@trade", "trade", trade("BTCUSDT", 3))), 0.1)
+            gate.set()
+            await drain(manager, consumer)
+            await manager.close_all()
+            return seen
+
+        assert asyncio.run(scenario()) == [1.0, 2.0, 3.0]
+
+    def test_keep_closed_conflates_only_open_klines(self):
+        def kline(minute, close, closed):
+            return {"e": "kline", "E": 1700000000000, "s": "BTCUSDT",
+                    "k": {"t": minute * 60_000, "i": "1m", "o": "1", "h": "1", "l": "1",
+                          "c": str(close), "v": "1", "x": closed}}
+
+        async def scenario():
+            manager = BinanceWebSocketManager(offline=True)
+            gate = asyncio.Event()
+            seen = []
+
+            async def consumer(event):
+                await gate.wait()
+                seen.append((event["open_time"] // 60_000, event["close"], event["is_closed"]))
+
+            manager.set_queue_policy(consumer, overflow="keep_closed", maxsize=1)
+            manager.callbacks["btcusdt@kline_1m"] = [consumer]
+            await manager._dispatch("btcusdt@kline_1m", "kline", kline(0, 1, False))
+            await asyncio.sleep(0)  # consumer holds the first update
+            for close in (2, 3):
+                await manager._dispatch("btcusdt@kline_1m", "kline", kline(0, close, False))
+            for minute, close, closed in ((0, 4, True), (1, 5, False), (1, 6, True), (2, 7, False), (2, 8, False)):
+                await asyncio.wait_for(
+                    manager._dispatch("btcusdt@kline_1m", "kline", kline(minute, close, closed)), 1)
+            gate.set()
+            await drain(manager, consumer)
+            await manager.close_all()
+            return seen
+
+        assert asyncio.run(scenario()) == [(0, 1, False), (0, 4, True), (1, 6, True), (2, 8, False)]
+
+    def test_unknown_policy_is_rejected(self):
+        manager = BinanceWebSocketManager()
+        with pytest.raises(ValueError):
+            manager.set_queue_policy(print, overflow="newest")
@@ -0,0 +1,76 @@
+"""
+Unit tests for fast-path WebSocket decoding
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.ws_decode import LazyEvent, loads
+from core.websocket_manager import BinanceWebSocketManager
+from core.price_book import PriceBook
+
+PAYLOADS = {
+    "ticker": {"e": "24hrTicker", "E": 1700000000000, "s": "BTCUSDT", "c": "50000.1", "v": "10",
+               "q": "500000", "P": "1.5", "h": "51000", "l": "49000"},
+    "trade": {"e": "trade", "E": 1700000000000, "s": "BTCUSDT", "t": 12345, "p": "50000.5",
+              "q": "0.01", "m": True},
+    "aggTrade": {"e": "aggTrade", "E": 1700000000000, "s": "ETHUSDT", "a": 1, "p": "3000",
+                 "q": "2", "f": 100, "l": 105, "m": False},
+    "bookTicker": {"u": 400900217, "s": "BNBUSDT", "b": "25.35", "B": "31.2", "a": "25.36", "A": "40.6"},
+    "depth": {"e": "depthUpdate", "E": 1700000000000, "s": "BTCUSDT", "u": 160,
+              "b": [["0.0024", "10"]], "a": [["0.0026", "100"]]},
+}
+
+MINI_TICKERS = [
+    {"e": "24hrMiniTicker", "E": 1700000000000, "s": "BTCUSDT", "c": "50000", "o": "49000",
+     "h": "51000", "l": "48000", "v": "100", "q": "5000000"},
+    {"e": "24hrMiniTicker", "E": 1700000000000, "s": "ETHUSDT", "c": "3000", "o": "2900",
+     "h": "3100", "l": "2800", "v": "1000", "q": "3000000"},
+]
+
+@pytest.fixture(scope="module")
+def manager():
+    return BinanceWebSocketManager()
+
+class TestLazyEvent:
+    """Test suite for core.ws_decode"""
+
+    @pytest.mark.parametrize("stream_type", list(PAYLOADS))
+    def test_same_fields_as_process_data(self, manager, stream_type):
+        payload = PAYLOADS[stream_type]
+        expected = asyncio.run(manager._process_data(payload, stream_type))
+        event = LazyEvent(stream_type, payload)
+
+        assert set(event) == set(expected)
+        for key in expected:
+            if key != "timestamp":
+                assert event[key] == expected[key], key
+
+    def test_kline_fields(self, manager):
+        payload = {"e": "kline", "E": 1700000000000, "s": "BTCUSDT",
+                   "k": {"t": 1699999940000, "i": "1m", "o": "1", "h": "2", "l": "0.5", "c": "1.5",
+                         "v": "10", "x": True}}
+        event = LazyEvent("kline", payload)
+        assert (event["open_time"], event["close"], event["is_closed"]) == (1699999940000, 1.5, True)
+        assert event.get("missing") is None
+
+    def test_timestamp_from_event_time(self):
+        event = LazyEvent("trade", PAYLOADS["trade"])
+        assert event.event_time == 1700000000000
+        assert event["timestamp"] == "2023-11-14T22:13:20"
+
+    def test_mini_ticker_batch(self):
+        event = LazyEvent("miniTicker", loads(json.dumps(MINI_TICKERS)))
+        batch = event["batch"]
+        assert batch.dtype.names[:2] == ("symbol", "event_time")
+        assert batch["close"].tolist() == [50000.0, 3000.0]
+        assert event["tickers"][1]["symbol"] == "ETHUSDT"
+        assert event["tickers"][1]["price"] == 3000.0
+
+        book = PriceBook()
+        book.on_mini_ticker(event)
+        assert book.get("BTCUSDT") == 50000.0
@@ -0,0 +1,225 @@
+"""
+Log file index and reverse reading
+
+``IndexedRotatingFileHandler`` writes, next to every JSON log file, a
+``<file>.idx`` sidecar of fixed-size entries (created timestamp, byte
+offset of the line, level number). Entries are appended in write order,
+so a time range is found by binary search and only the matching lines
+are read from the log. Files without a sidecar (written before it
+existed) are read backwards in blocks instead of with ``readlines()``.
+"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import time
+from logging import FileHandler, LogRecord, getLevelName
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+_ENTRY = struct.Struct("<dQB")  # created, line offset, levelno
+INDEX_SUFFIX = ".idx"
+BLOCK_SIZE = 64 * 1024
+
+
+def index_path(log_path) -> Path:
+    return Path(f"{log_path}{INDEX_SUFFIX}")
+
+
+class IndexedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that records where each line starts"""
+
+    def __init__(self, filename, *args, **kwargs):
+        super().__init__(filename, *args, **kwargs)
+        self._index = None
+
+    def _index_file(self):
+        if self._index is None:
+            if not index_path(self.baseFilename).exists():
+                build_index(self.baseFilename)
+            self._index = open(index_path(self.baseFilename), "ab")
+        return self._index
+
+    def emit(self, record: LogRecord):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            index = self._index_file()
+            # Other processes (forked workers) append to the same file
+            offset = self.stream.seek(0, os.SEEK_END)
+            FileHandler.emit(self, record)
+            index.write(_ENTRY.pack(record.created, offset, record.levelno))
+            index.flush()  # readers live in other processes (API server)
+        except Exception:
+            self.handleError(record)
+
+    def doRollover(self):
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        super().doRollover()
+        # Shift the sidecars the same way the log files were shifted
+        base = self.baseFilename
+        if self.backupCount > 0:
+            for i in range(self.backupCount - 1, 0, -1):
+                src = index_path(f"{base}.{i}")
+                if src.exists():
+                    os.replace(src, index_path(f"{base}.{i + 1}"))
+            if index_path(base).exists():
+                os.replace(index_path(base), index_path(f"{base}.1"))
+        else:
+            index_path(base).unlink(missing_ok=True)
+
+    def close(self):
+        self.acquire()
+        try:
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+        finally:
+            self.release()
+        super().close()
+
+
+def build_index(log_path):
+    """Write the sidecar for an existing log file (one pass, timestamps to the second)"""
+    entries = []
+    offset = 0
+    if os.path.exists(log_path):
+        with open(log_path, "rb") as f:
+            for line in f:
+                entry = _parse(line)
+                if entry is not None:
+                    level = getLevelName(str(entry.get("levelname", "")))
+                    entries.append(_ENTRY.pack(_asctime_epoch(entry), offset, level if isinstance(level, int) else 0))
+                offset += len(line)
+    with open(index_path(log_path), "wb") as f:
+        f.write(b"".join(entries))
+
+
+class _IndexView:
+    """Sequence of created timestamps over an mmapped index, for bisect"""
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.n = len(buf) // _ENTRY.size
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        return _ENTRY.unpack_from(self.buf, i * _ENTRY.size)[0]
+
+    def entry(self, i):
+        return _ENTRY.unpack_from(self.buf, i * _ENTRY.size)
+
+
+def read_lines_reverse(path, block_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+    """Lines of a file from last to first, reading fixed blocks from the end"""
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        tail = b""
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + tail).split(b"\n")
+            tail = lines.pop(0)  # may continue in the previous block
+            for line in reversed(lines):
+                if line:
+                    yield line
+        if tail:
+            yield tail
+
+
+def _parse(line: bytes) -> Optional[Dict]:
+    try:
+        entry = json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return entry if isinstance(entry, dict) else None
+
+
+def _asctime_epoch(entry: Dict) -> float:
+    try:
+        return time.mktime(time.strptime(entry.get("asctime", ""), "%Y-%m-%d %H:%M:%S"))
+    except ValueError:
+        return 0.0
+
+
+def _query_indexed(log_path: Path, start: float, end: float, levelno: Optional[int],
+                   limit: int) -> List[Dict]:
+    idx = index_path(log_path)
+    size = idx.stat().st_size - idx.stat().st_size % _ENTRY.size
+    if size == 0:
+        return []
+    results = []
+    with open(idx, "rb") as fi, mmap.mmap(fi.fileno(), size, access=mmap.ACCESS_READ) as buf, \
+            open(log_path, "rb") as fl:
+        view = _IndexView(buf)
+        lo = bisect.bisect_left(view, start) if start is not None else 0
+        i = bisect.bisect_left(view, end) if end is not None else len(view)
+        while i > lo and len(results) < limit:
+            i -= 1
+            created, offset, entry_level = view.entry(i)
+            if levelno is not None and entry_level != levelno:
+                continue
+            fl.seek(offset)
+            entry = _parse(fl.readline())
+            if entry is not None:
+                entry["created"] = created
+                results.append(entry)
+    return results
+
+
+def _query_scan(log_path: Path, start: float, end: float, level: Optional[str],
+                limit: int) -> List[Dict]:
+    results = []
+    for line in read_lines_reverse(log_path):
+        entry = _parse(line)
+        if entry is None:
+            continue
+        created = _asctime_epoch(entry)
+        if end is not None and created >= end:
+            continue
+        if start is not None and created < start:
+            break
+        if level and entry.get("levelname") != level:
+            continue
+        entry["created"] = created
+        results.append(entry)
+        if len(results) >= limit:
+            break
+    return results
+
+
+def query_log_files(paths: List[Path], start: float = None, end: float = None,
+                    level: str = None, limit: int = 100) -> List[Dict]:
+    """Newest-first entries from ``paths`` (a file and its rotations, newest first)
+
+    ``start`` is inclusive and ``end`` exclusive (epoch seconds); each
+    entry gets a ``created`` field, so the next page is ``end=<oldest created>``.
+    """
+    levelno = None
+    if level:
+        level = level.upper()
+        levelno = getLevelName(level)
+        if not isinstance(levelno, int):
+            return []
+    results: List[Dict] = []
+    for path in paths:
+        if len(results) >= limit:
+            break
+        if not path.exists() or path.stat().st_size == 0:
+            continue
+        if index_path(path).exists():
+            found = _query_indexed(path, start, end, levelno, limit - len(results))
+        else:
+            found = _query_scan(path, start, end, level, limit - len(results))
+        results.extend(found)
+    return results
@@ -1,19 +1,34 @@
 """
 Enhanced logging system with Supabase integration and structured logging
+
+Log calls only build a record and put it on a queue; a single writer
+thread (``_LogListener``) formats it for the rotating files and stdout and
+collects rows for Supabase, which are inserted in multi-row batches.
+Chatty modules (``websocket``, ``backtest``) can be sampled and rate
+limited below WARNING via ``LogSampler``.
 """
 
+import atexit
 import logging
 import json
+import queue
+import re
 import sys
-import traceback
+import threading
+import time
+import weakref
+from collections import deque
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener
 from pythonjsonlogger import jsonlogger
 import os
 from enum import Enum
 
+from config import cfg
+from utils.log_index import IndexedRotatingFileHandler, query_log_files
+
 class LogLevel(Enum):
     DEBUG = "DEBUG"
     INFO = "INFO"
@@ -21,47 +36,297 @@ class LogLevel(Enum):
     ERROR = "ERROR"
     CRITICAL = "CRITICAL"
 
+class LogSampler:
+    """Level-based sampling and per-module rate limiting for hot modules
+
+    Only modules listed in ``sample_rates`` are affected, and only below
+    ``min_level``: a rate of 0.1 keeps every 10th record, and at most
+    ``rate_limit`` records per second pass per module (0 = no limit).
+    """
+
+    def __init__(self, sample_rates: Dict[str, float] = None, rate_limit: float = 0,
+                 min_level: int = logging.WARNING):
+        self.sample_rates = dict(sample_rates or {})
+        self.rate_limit = rate_limit
+        self.min_level = min_level
+        self._seen: Dict[str, int] = {}
+        self._buckets: Dict[str, List[float]] = {}  # module -> [tokens, last refill]
+        self._suppressed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_spec(cls, spec: str, rate_limit: float = 0) -> "LogSampler":
+        """Build from ``"websocket:1,backtest:0.1"``"""
+        rates = {}
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            module, _, rate = item.partition(":")
+            rates[module.strip()] = float(rate or 1)
+        return cls(rates, rate_limit)
+
+    def allow(self, module: Optional[str], level: int) -> Optional[int]:
+        """None to drop the record, otherwise how many were dropped before it"""
+        rate = self.sample_rates.get(module)
+        if rate is None or level >= self.min_level:
+            return 0
+        with self._lock:
+            seen = self._seen.get(module, 0)
+            self._seen[module] = seen + 1
+            keep = rate > 0 and seen % max(1, round(1 / rate)) == 0
+            if keep and self.rate_limit > 0:
+                now = time.monotonic()
+                bucket = self._buckets.setdefault(module, [self.rate_limit, now])
+                bucket[0] = min(self.rate_limit, bucket[0] + (now - bucket[1]) * self.rate_limit)
+                bucket[1] = now
+                keep = bucket[0] >= 1
+                if keep:
+                    bucket[0] -= 1
+            if not keep:
+                self._suppressed[module] = self._suppressed.get(module, 0) + 1
+                return None
+            return self._suppressed.pop(module, 0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._suppressed)
+
+class DatabaseLogHandler(logging.Handler):
+    """Collects rows for Supabase and inserts them in batches
+
+    Runs inside the writer thread: ``emit`` buffers, ``flush`` (called
+    when the batch is full and on every idle tick) sends one insert per
+    table. Rows that still fail after ``max_retries`` are dropped.
+    """
+
+    def __init__(self, client=None, table: str = "logs", batch_size: int = 200,
+                 max_buffer: int = 10_000, max_retries: int = 2):
+        super().__init__()
+        self.client = client
+        self.table = table
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self._buffer: deque = deque(maxlen=max_buffer)
+        self._buffer_lock = threading.Lock()
+        self.requests = 0
+        self.rows = 0
+        self.dropped = 0
+
+    def submit(self, table: str, row: Dict):
+        """Queue a row for any table (written with the next batch)"""
+        if self.client is None:
+            return
+        with self._buffer_lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append((table, row))
+
+    def emit(self, record: logging.LogRecord):
+        if self.client is None:
+            return
+        self.submit(self.table, {
+            "level": record.levelname,
+            "module": getattr(record, "bot_module", None),
+            "message": record.getMessage(),
+            "context": getattr(record, "context", None) or {},
+            "error_trace": record.exc_text,
+            "timestamp": datetime.utcfromtimestamp(record.created).isoformat(),
+        })
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        with self._buffer_lock:
+            if not self._buffer or self.client is None:
+                return
+            pending, self._buffer = list(self._buffer), deque(maxlen=self._buffer.maxlen)
+        by_table: Dict[str, List[Dict]] = {}
+        for table, row in pending:
+            by_table.setdefault(table, []).append(row)
+        for table, rows in by_table.items():
+            # Round-trip through JSON so datetimes/numpy values in context don't break the request
+            rows = json.loads(json.dumps(rows, default=str))
+            for i in range(0, len(rows), self.batch_size):
+                self._insert(table, rows[i:i + self.batch_size])
+
+    def _insert(self, table: str, rows: List[Dict]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.client.table(table).insert(rows).execute()
+                self.requests += 1
+                self.rows += len(rows)
+                return
+            except Exception as e:
+                error = e
+        self.dropped += len(rows)
+        # Not through the logger: that would queue another row for the failing table
+        sys.stderr.write(f"Failed to write {len(rows)} rows to Supabase {table}: {error}\n")
+
+class SensitiveDataMasker:
+    """Masks sensitive keys and token-like strings
+
+    Keys are matched with one precompiled pattern, and the per-key
+    decision is cached by the dict's key tuple, so records of the same
+    shape (the usual case) skip the matching entirely.
+    """
+
+    def __init__(self, fields, max_shapes: int = 4096):
+        self.pattern = re.compile("|".join(re.escape(f) for f in sorted(fields)), re.IGNORECASE)
+        self.max_shapes = max_shapes
+        self._plans: Dict[tuple, tuple] = {}
+
+    def _plan(self, keys: tuple) -> tuple:
+        plan = self._plans.get(keys)
+        if plan is None:
+            if len(self._plans) >= self.max_shapes:
+                self._plans.clear()
+            plan = self._plans[keys] = tuple(self.pattern.search(str(key)) is not None for key in keys)
+        return plan
+
+    def __call__(self, data: Any) -> Any:
+        if isinstance(data, dict):
+            return {key: "***MASKED***" if hide else self(value)
+                    for (key, value), hide in zip(data.items(), self._plan(tuple(data)))}
+        elif isinstance(data, list):
+            return [self(item) for item in data]
+        elif isinstance(data, str):
+            # Check if string looks like a key/token
+            if len(data) > 20 and ' ' not in data:
+                return f"{data[:4]}...{data[-4:]}"
+        return data
+
+class _QueueHandler(QueueHandler):
+    """Enqueues records unformatted; only a traceback is rendered here, while its frames are alive"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if not record.exc_info:
+            return record
+        record = logging.makeLogRecord(record.__dict__)
+        if record.exc_info[0] is not None and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+class _SyncHandler(_QueueHandler):
+    """Used in forked children, which have no writer thread: hands records straight to the handlers"""
+
+    def __init__(self, listener: "_LogListener"):
+        super().__init__(None)
+        self.listener = listener
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.listener.handle(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+class _LogListener(QueueListener):
+    """QueueListener that flushes its handlers whenever the queue goes idle"""
+
+    def __init__(self, log_queue, *handlers, flush_interval: float = 2.0, mask=None):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+        self.mask = mask  # applied to record.context once, before any handler sees it
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, timeout=self.flush_interval)
+            except queue.Empty:
+                self.flush()
+
+    def handle(self, record: logging.LogRecord):
+        flush_event = getattr(record, "flush_event", None)
+        if flush_event is not None:
+            self.flush()
+            flush_event.set()
+            return
+        if self.mask is not None and getattr(record, "context", None):
+            record.context = self.mask(record.context)
+        super().handle(record)
+
+    def flush(self):
+        for handler in self.handlers:
+            try:
+                handler.flush()
+            except Exception:
+                pass  # e.g. stdout already closed at interpreter exit
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+        self.flush()
+
 class CryptoLogger:
     """Enhanced logger with Supabase integration and structured logging"""
     
-    def __init__(self, name: str = "crypto_bot", log_dir: str = "logs"):
+    def __init__(self, name: str = "crypto_bot", log_dir: str = "logs",
+                 sampler: LogSampler = None, db_batch_size: int = 200, flush_interval: float = 2.0,
+                 level: str = "DEBUG"):
         self.name = name
         self.log_dir = Path(log_dir)
-        self.log_dir.mkdir(exist_ok=True)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.sampler = sampler
+        self.level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+        
+        # Sensitive fields to mask (in the writer thread, only for records that are emitted)
+        self.sensitive_fields = {
+            'api_key', 'api_secret', 'password', 'token', 
+            'secret', 'private_key', 'seed', 'mnemonic'
+        }
+        self._masker = SensitiveDataMasker(self.sensitive_fields)
+        
+        # Every logger feeds one queue, drained by a single writer thread
+        self._queue = queue.SimpleQueue()
+        self._handlers: List[logging.Handler] = []
         
         # Create separate loggers for different purposes
         self.system_logger = self._setup_logger(f"{name}_system", "system.log")
         self.trade_logger = self._setup_logger(f"{name}_trade", "trades.log")
         self.error_logger = self._setup_logger(f"{name}_error", "errors.log")
         
+        # Console handler for important messages
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(logging.INFO)
+        console_handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        ))
+        self._handlers.append(console_handler)
+        
         # Supabase client will be initialized separately
         self.supabase = None
+        trade_logger_name = self.trade_logger.name
+        self.db_handler = DatabaseLogHandler(batch_size=db_batch_size)
+        self.db_handler.addFilter(lambda record: record.name != trade_logger_name)
+        self._handlers.append(self.db_handler)
         
-        # Sensitive fields to mask
-        self.sensitive_fields = {
-            'api_key', 'api_secret', 'password', 'token', 
-            'secret', 'private_key', 'seed', 'mnemonic'
-        }
+        self._listener = _LogListener(self._queue, *self._handlers, flush_interval=flush_interval,
+                                      mask=self._masker)
+        self._listener.start()
+        atexit.register(self.close)
+        os.register_at_fork(after_in_child=_after_fork_callback(weakref.ref(self)))
     
     def set_supabase_client(self, supabase_client):
         """Set Supabase client for database logging"""
         self.supabase = supabase_client
+        # SupabaseManager wraps the supabase-py client that has .table()
+        self.db_handler.client = getattr(supabase_client, "client", supabase_client)
     
     def _setup_logger(self, logger_name: str, filename: str) -> logging.Logger:
-        """Setup individual logger with JSON formatting and rotation"""
+        """Setup individual logger feeding the queue, plus its JSON file handler with rotation"""
         logger = logging.getLogger(logger_name)
-        logger.setLevel(logging.DEBUG)
+        logger.setLevel(self.level)
         
         # Remove existing handlers
         logger.handlers = []
         
-        # File handler with rotation
+        # File handler with rotation, written by the listener thread
         file_path = self.log_dir / filename
-        file_handler = RotatingFileHandler(
+        file_handler = IndexedRotatingFileHandler(
             file_path,
             maxBytes=10 * 1024 * 1024,  # 10MB
             backupCount=5
         )
+        file_handler.addFilter(logging.Filter(logger_name))
         
         # JSON formatter
         formatter = jsonlogger.JsonFormatter(
@@ -69,157 +334,93 @@ class CryptoLogger:
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         file_handler.setFormatter(formatter)
+        self._handlers.append(file_handler)
         
-        # Console handler for important messages
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(logging.INFO)
-        console_formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        console_handler.setFormatter(console_formatter)
-        
-        # Add handlers
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        logger.addHandler(_QueueHandler(self._queue))
         
         return logger
     
+    def flush(self):
+        """Block until queued records are written (files and Supabase)"""
+        done = threading.Event()
+        marker = logging.makeLogRecord({"name": "__flush__", "levelno": logging.DEBUG})
+        marker.flush_event = done
+        if self._listener._thread is None:
+            self._listener.flush()
+            return
+        self._queue.put(marker)
+        done.wait(timeout=10)
+    
+    def close(self):
+        """Stop the writer thread after draining the queue"""
+        self._listener.stop()
+    
+    def _after_fork(self):
+        """Switch a forked child (e.g. a ProcessPoolExecutor worker) to synchronous writes
+        
+        The writer thread does not survive fork, so queued records would only
+        pile up. Records the parent had queued stay with the parent, and the
+        child skips Supabase: its copy of the HTTP client is not fork-safe.
+        """
+        self._queue = queue.SimpleQueue()
+        self._listener.queue = self._queue
+        self._listener._thread = None
+        self.db_handler.client = None
+        self.db_handler._buffer.clear()
+        # Locks another thread held at fork time would stay locked in the child
+        self.db_handler._buffer_lock = threading.Lock()
+        if self.sampler is not None:
+            self.sampler._lock = threading.Lock()
+        for target in (self.system_logger, self.trade_logger, self.error_logger):
+            target.handlers = [_SyncHandler(self._listener)]
+    
     def _mask_sensitive_data(self, data: Any) -> Any:
         """Recursively mask sensitive information in logs"""
-        if isinstance(data, dict):
-            masked = {}
-            for key, value in data.items():
-                if any(sensitive in key.lower() for sensitive in self.sensitive_fields):
-                    masked[key] = "***MASKED***"
-                else:
-                    masked[key] = self._mask_sensitive_data(value)
-            return masked
-        elif isinstance(data, list):
-            return [self._mask_sensitive_data(item) for item in data]
-        elif isinstance(data, str):
-            # Check if string looks like a key/token
-            if len(data) > 20 and not ' ' in data:
-                return f"{data[:4]}...{data[-4:]}"
-            return data
-        return data
+        return self._masker(data)
     
-    async def _log_to_supabase(self, level: str, module: str, message: str, 
-                               context: Dict = None, error_trace: str = None):
-        """Log to Supabase database"""
-        if not self.supabase:
+    def isEnabledFor(self, level: int) -> bool:
+        """Whether a record at ``level`` would be emitted (guard for expensive log arguments)"""
+        return self.system_logger.isEnabledFor(level)
+    
+    def _log(self, target: logging.Logger, level: int, message: str, args: tuple, module: str,
+             exc_info: bool = False, kwargs: Dict = None):
+        if not target.isEnabledFor(level):
             return
-        
-        try:
-            log_entry = {
-                "level": level,
-                "module": module,
-                "message": message,
-                "context": self._mask_sensitive_data(context) if context else {},
-                "error_trace": error_trace,
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            
-            await self.supabase.table("logs").insert(log_entry).execute()
-        except Exception as e:
-            # Fallback to file logging if Supabase fails
-            self.system_logger.error(f"Failed to log to Supabase: {e}")
+        if self.sampler is not None:
+            suppressed = self.sampler.allow(module, level)
+            if suppressed is None:
+                return
+            if suppressed:
+                kwargs = {**(kwargs or {}), "suppressed": suppressed}
+        # %-style args and context are formatted/masked by the writer thread
+        target.log(level, message, *args, exc_info=exc_info,
+                   extra={"bot_module": module, "context": kwargs or {}})
     
-    def debug(self, message: str, module: str = None, **kwargs):
+    def debug(self, message: str, *args, module: str = None, **kwargs):
         """Log debug message"""
-        context = self._mask_sensitive_data(kwargs) if kwargs else {}
-        self.system_logger.debug(message, extra={"bot_module": module, "context": context})
-        
-        if self.supabase:
-            try:
-                import asyncio
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    asyncio.create_task(self._log_to_supabase("DEBUG", module, message, context))
-            except RuntimeError:
-                pass  # No event loop, skip Supabase logging
+        self._log(self.system_logger, logging.DEBUG, message, args, module, kwargs=kwargs)
     
-    def info(self, message: str, module: str = None, **kwargs):
+    def info(self, message: str, *args, module: str = None, **kwargs):
         """Log info message"""
-        context = self._mask_sensitive_data(kwargs) if kwargs else {}
-        self.system_logger.info(message, extra={"bot_module": module, "context": context})
-        
-        if self.supabase:
-            try:
-                import asyncio
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    asyncio.create_task(self._log_to_supabase("INFO", module, message, context))
-            except RuntimeError:
-                pass  # No event loop, skip Supabase logging
+        self._log(self.system_logger, logging.INFO, message, args, module, kwargs=kwargs)
     
-    def warning(self, message: str, module: str = None, **kwargs):
+    def warning(self, message: str, *args, module: str = None, **kwargs):
         """Log warning message"""
-        context = self._mask_sensitive_data(kwargs) if kwargs else {}
-        self.system_logger.warning(message, extra={"bot_module": module, "context": context})
-        
-        if self.supabase:
-            try:
-                import asyncio
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    asyncio.create_task(self._log_to_supabase("WARNING", module, message, context))
-            except RuntimeError:
-                pass  # No event loop, skip Supabase logging
+        self._log(self.system_logger, logging.WARNING, message, args, module, kwargs=kwargs)
     
-    def error(self, message: str, module: str = None, exc_info: bool = True, **kwargs):
+    def error(self, message: str, *args, module: str = None, exc_info: bool = True, **kwargs):
         """Log error message with traceback"""
-        context = self._mask_sensitive_data(kwargs) if kwargs else {}
-        error_trace = None
-        
-        if exc_info:
-            error_trace = traceback.format_exc()
-            
-        self.error_logger.error(
-            message, 
-            exc_info=exc_info,
-            extra={"bot_module": module, "context": context}
-        )
-        
-        if self.supabase:
-            try:
-                import asyncio
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    asyncio.create_task(
-                        self._log_to_supabase("ERROR", module, message, context, error_trace)
-                    )
-            except RuntimeError:
-                pass  # No event loop, skip Supabase logging
+        self._log(self.error_logger, logging.ERROR, message, args, module, exc_info, kwargs)
     
-    def critical(self, message: str, module: str = None, exc_info: bool = True, **kwargs):
+    def critical(self, message: str, *args, module: str = None, exc_info: bool = True, **kwargs):
         """Log critical message"""
-        context = self._mask_sensitive_data(kwargs) if kwargs else {}
-        error_trace = None
-        
-        if exc_info:
-            error_trace = traceback.format_exc()
-            
-        self.error_logger.critical(
-            message,
-            exc_info=exc_info,
-            extra={"bot_module": module, "context": context}
-        )
-        
-        if self.supabase:
-            try:
-                import asyncio
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    asyncio.create_task(
-                        self._log_to_supabase("CRITICAL", module, message, context, error_trace)
-                    )
-            except RuntimeError:
-                pass  # No event loop, skip Supabase logging
+        self._log(self.error_logger, logging.CRITICAL, message, args, module, exc_info, kwargs)
     
     def log_trade(self, action: str, symbol: str, side: str, 
                   price: float, quantity: float, **kwargs):
         """Log trading activity"""
+        if not self.trade_logger.isEnabledFor(logging.INFO):
+            return
         trade_data = {
             "action": action,
             "symbol": symbol,
@@ -227,28 +428,25 @@ class CryptoLogger:
             "price": price,
             "quantity": quantity,
             "timestamp": datetime.utcnow().isoformat(),
-            **self._mask_sensitive_data(kwargs)
+            **kwargs
         }
+        args = (action, side, quantity, symbol, price)
         
         self.trade_logger.info(
-            f"Trade: {action} {side} {quantity} {symbol} @ {price}",
-            extra=trade_data
+            "Trade: %s %s %s %s @ %s", *args,
+            extra={"bot_module": "trader", "context": trade_data}
         )
         
         # Also log to main logger for visibility
-        self.info(
-            f"Trade executed: {action} {side} {quantity} {symbol} @ {price}",
-            module="trader",
-            **trade_data
-        )
+        self._log(self.system_logger, logging.INFO, "Trade executed: %s %s %s %s @ %s", args,
+                  "trader", kwargs=trade_data)
     
     def log_position(self, action: str, position: Dict):
         """Log position changes"""
-        masked_position = self._mask_sensitive_data(position)
-        
+        # Shallow copy: the caller may keep updating the dict before the writer thread gets to it
         self.trade_logger.info(
-            f"Position {action}: {position.get('symbol', 'N/A')}",
-            extra={"action": action, "position": masked_position}
+            "Position %s: %s", action, position.get('symbol', 'N/A'),
+            extra={"bot_module": "trader", "context": {"action": action, "position": dict(position)}}
         )
     
     def log_performance(self, metrics: Dict):
@@ -260,8 +458,8 @@ class CryptoLogger:
         )
     
     def log_alert(self, alert_type: str, title: str, message: str, 
-                  severity: str = "INFO", metadata: Dict = None):
-        """Log alerts and notifications"""
+                  severity: str = "INFO", metadata: Dict = None, save: bool = True):
+        """Log alerts and notifications (``save=False`` when the caller already stored the alert)"""
         alert_data = {
             "type": alert_type,
             "title": title,
@@ -272,46 +470,51 @@ class CryptoLogger:
         
         # Choose logger based on severity
         if severity in ["ERROR", "CRITICAL"]:
-            self.error(f"Alert: {title} - {message}", module="alert", **alert_data)
+            self.error(f"Alert: {title} - {message}", module="alert", alert=alert_data)
         elif severity == "WARNING":
-            self.warning(f"Alert: {title} - {message}", module="alert", **alert_data)
+            self.warning(f"Alert: {title} - {message}", module="alert", alert=alert_data)
         else:
-            self.info(f"Alert: {title} - {message}", module="alert", **alert_data)
+            self.info(f"Alert: {title} - {message}", module="alert", alert=alert_data)
         
-        # Save to Supabase alerts table
-        if self.supabase:
-            import asyncio
-            asyncio.create_task(self._save_alert_to_supabase(alert_data))
-    
-    async def _save_alert_to_supabase(self, alert_data: Dict):
-        """Save alert to Supabase alerts table"""
-        try:
-            await self.supabase.table("alerts").insert(alert_data).execute()
-        except Exception as e:
-            self.error(f"Failed to save alert to Supabase: {e}", module="logger")
+        # Save to Supabase alerts table with the next log batch
+        if save:
+            self.db_handler.submit("alerts", alert_data)
     
     def get_recent_logs(self, limit: int = 100, level: str = None) -> list:
         """Get recent logs from files"""
-        logs = []
+        return self.query_logs(level=level, limit=limit)
+    
+    def query_logs(self, start: float = None, end: float = None, level: str = None,
+                   limit: int = 100, kinds: List[str] = None) -> List[Dict]:
+        """Newest-first log entries by time range (epoch seconds, end exclusive) and level
         
-        for log_file in self.log_dir.glob("*.log"):
-            if log_file.stat().st_size > 0:
-                with open(log_file, 'r') as f:
-                    lines = f.readlines()[-limit:]
-                    for line in lines:
-                        try:
-                            log_entry = json.loads(line)
-                            if not level or log_entry.get('levelname') == level:
-                                logs.append(log_entry)
-                        except json.JSONDecodeError:
-                            continue
+        ``kinds`` picks files by stem ("system", "trades", "errors"). Rotated
+        files are searched too; page back with ``end=<last entry's created>``.
+        """
+        results = []
+        for log_file in sorted(self.log_dir.glob("*.log")):
+            if kinds and log_file.stem not in kinds:
+                continue
+            rotations = [log_file]
+            while log_file.with_name(f"{log_file.name}.{len(rotations)}").exists():
+                rotations.append(log_file.with_name(f"{log_file.name}.{len(rotations)}"))
+            results.extend(query_log_files(rotations, start, end, level, limit))
         
         # Sort by timestamp
-        logs.sort(key=lambda x: x.get('asctime', ''), reverse=True)
-        return logs[:limit]
+        results.sort(key=lambda x: x.get('created', 0), reverse=True)
+        return results[:limit]
+
+def _after_fork_callback(ref):
+    def callback():
+        log = ref()
+        if log is not None:
+            log._after_fork()
+    return callback
 
 # Singleton instance
-logger = CryptoLogger()
+logger = CryptoLogger(log_dir=cfg.log_dir,
+                      sampler=LogSampler.from_spec(cfg.log_sample_rates, cfg.log_rate_limit),
+                      level=cfg.log_level)
 
 # Convenience functions
 debug = logger.debug
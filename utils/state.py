@@ -1,7 +1,11 @@
-import json, os, threading
+import atexit, json, logging, os, tempfile, threading
 
-_LOCK = threading.Lock()
 _STATE_PATH = "state.json"
+# 스캔 결과는 크고 자주 바뀌므로 별도 파일로 저장
+_SCAN_PATH = "scan_result.json"
+_SCAN_KEY = "scan_result"
+# 쓰기 실패 시 재시도 간격 상한(초)
+_MAX_RETRY_DELAY = 30.0
 
 _DEFAULT = {
     "auto_enabled": False,
@@ -10,21 +14,137 @@ _DEFAULT = {
     "scan_result": [],
 }
 
-def _read():
-    if not os.path.exists(_STATE_PATH):
-        return _DEFAULT.copy()
-    with open(_STATE_PATH, "r", encoding="utf-8") as f:
+_log = logging.getLogger(__name__)
+
+def _write_atomic(path, data):
+    # 임시 파일에 쓴 뒤 교체 → 중간에 죽어도 이전 파일이 온전히 남음
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".state-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def _read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
+class StateStore:
+    """In-memory bot state; changes are written back atomically after ``debounce`` seconds"""
+
+    def __init__(self, path=_STATE_PATH, scan_path=_SCAN_PATH, debounce=0.5):
+        self.path = path
+        self.scan_path = scan_path
+        self.debounce = debounce
+        self._lock = threading.RLock()
+        # 디스크 쓰기는 상태 락 밖에서, 대신 flush 끼리는 순서대로
+        self._write_lock = threading.Lock()
+        self._state = None
+        self._dirty = set()  # {"state", "scan"}
+        self._timer = None
+        self._failures = 0  # 연속 쓰기 실패 횟수 → 재시도 간격
+        self._watchers = []  # (keys | None, callback)
+
+    def _load(self):
+        saved = _read_json(self.path, {})
+        state = {**_DEFAULT, **saved}
+        if _SCAN_KEY in saved:
+            # 예전 형식: state.json 안에 scan_result → 분리해서 다시 저장
+            self._dirty.update(("state", "scan"))
+        else:
+            state[_SCAN_KEY] = _read_json(self.scan_path, [])
+        return state
+
+    def _loaded(self):
+        if self._state is None:
+            self._state = self._load()
+            if self._dirty:
+                self._schedule()
+        return self._state
+
+    def get(self, key=None, default=None):
+        with self._lock:
+            state = self._loaded()
+            return dict(state) if key is None else state.get(key, default)
+
+    def set(self, **kwargs):
+        with self._lock:
+            state = self._loaded()
+            changes = {k: v for k, v in kwargs.items() if k not in state or state[k] != v}
+            state.update(kwargs)
+            if changes:
+                if _SCAN_KEY in changes:
+                    self._dirty.add("scan")
+                if set(changes) - {_SCAN_KEY}:
+                    self._dirty.add("state")
+                self._schedule()
+            snapshot = dict(state)
+            watchers = list(self._watchers)
+        for keys, callback in watchers:
+            if changes and (keys is None or not keys.isdisjoint(changes)):
+                try:
+                    callback(changes)
+                except Exception:
+                    _log.exception("state watcher failed")
+        return snapshot
+
+    def watch(self, callback, keys=None):
+        """``callback(changes)`` on every change (of ``keys`` only, if given); returns an unsubscribe function"""
+        entry = (frozenset(keys) if keys else None, callback)
+        with self._lock:
+            self._watchers.append(entry)
+
+        def unwatch():
+            with self._lock:
+                if entry in self._watchers:
+                    self._watchers.remove(entry)
+        return unwatch
+
+    def _schedule(self, delay=None):
+        if self._timer is None:
+            self._timer = threading.Timer(self.debounce if delay is None else delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        with self._write_lock:
+            # 스냅샷만 락 안에서 → 쓰는 동안에도 get/set 은 막히지 않음
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if self._state is None or not self._dirty:
+                    return
+                dirty, self._dirty = self._dirty, set()
+                state = {k: v for k, v in self._state.items() if k != _SCAN_KEY}
+                scan = self._state[_SCAN_KEY]
+            try:
+                if "scan" in dirty:
+                    _write_atomic(self.scan_path, scan)
+                if "state" in dirty:
+                    _write_atomic(self.path, state)
+            except OSError:
+                with self._lock:
+                    self._dirty |= dirty
+                    # 다른 set() 이 없어도 다시 시도 (간격은 점점 늘림)
+                    self._failures += 1
+                    self._schedule(min(self.debounce * 2 ** self._failures, _MAX_RETRY_DELAY))
+                _log.exception("failed to persist state")
+            else:
+                self._failures = 0
+
+store = StateStore()
+atexit.register(store.flush)
+
 def get_state():
-    with _LOCK:
-        s = _read()
-    return s
+    return store.get()
 
 def set_state(**kwargs):
-    with _LOCK:
-        s = _read()
-        s.update(kwargs)
-        with open(_STATE_PATH, "w", encoding="utf-8") as f:
-            json.dump(s, f, ensure_ascii=False, indent=2)
-    return s
\ No newline at end of file
+    return store.set(**kwargs)